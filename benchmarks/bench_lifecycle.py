@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Benchmark the skill lifecycle scripts on synthetic skill trees.
+
+Generates throwaway repositories with N skills (configurable file count,
+file size and directory nesting) and times validation, sync planning and
+applying, deploys and version bumps against them. Sync and deploy write
+into local directories under the scratch tree, which stand in for the agent
+directories that `npx add-skill` would otherwise install into, so nothing
+outside the scratch tree is touched.
+
+Results are written as JSON; pass an earlier results file to --compare to
+see how each stage moved between commits.
+
+Usage:
+    python benchmarks/bench_lifecycle.py
+    python benchmarks/bench_lifecycle.py --skills 10 100 1000 --files 8 --file-size 4096 --depth 3
+    python benchmarks/bench_lifecycle.py --output after.json --compare before.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import version_skill  # noqa: E402
+from deploy_skill import deploy_many  # noqa: E402
+from skill_hash import CACHE_DIR_NAME  # noqa: E402
+from sync_skills import build_plans, sync_skills  # noqa: E402
+from targets import DeployTarget  # noqa: E402
+from validate_skill import validate_all  # noqa: E402
+
+RESULTS_VERSION = 1
+
+STAGES = [
+    "validate_cold",
+    "validate_cached",
+    "sync_plan_cold",
+    "sync_apply_full",
+    "sync_plan_noop",
+    "sync_apply_incremental",
+    "deploy_copy",
+    "deploy_symlink",
+    "version_bump",
+]
+
+# Share of skills edited before the incremental sync
+TOUCH_FRACTION = 0.01
+
+_WORDS = ("skill agent deploy sync manifest target version hash cache token "
+          "context prompt validate package workflow tool script").split()
+
+
+def make_tree(repo_root: Path, skills: int, files: int, file_size: int, depth: int, seed: int = 0):
+    """
+    Write a synthetic repository with `skills` skills under repo_root/skills.
+
+    Each skill gets a valid SKILL.md, a .skillmeta and `files` extra files
+    of about `file_size` bytes, spread over directories nested up to
+    `depth` levels deep.
+
+    Returns:
+        (file_count, byte_count) for the whole tree
+    """
+    rng = random.Random(seed)
+    skills_dir = repo_root / "skills"
+    file_count = byte_count = 0
+
+    for i in range(skills):
+        name = f"bench-skill-{i:05d}"
+        skill_dir = skills_dir / name
+        skill_dir.mkdir(parents=True)
+        skill_md = (
+            f"---\nname: {name}\ndescription: Synthetic benchmark skill {i}\n---\n\n"
+            f"# Bench Skill {i}\n\n## Notes\n- Version: 1.0.0\n"
+        )
+        (skill_dir / "SKILL.md").write_text(skill_md, encoding="utf-8")
+        (skill_dir / ".skillmeta").write_text(json.dumps({"version": "1.0.0", "dependencies": [], "tags": []},
+                                                         indent=2), encoding="utf-8")
+        file_count += 2
+        byte_count += len(skill_md)
+
+        for j in range(files):
+            parts = ["scripts"] + [f"level{k}" for k in range(1, rng.randint(0, depth) + 1)]
+            path = skill_dir.joinpath(*parts) / f"file_{j}.{'py' if j % 2 else 'md'}"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            text = " ".join(rng.choice(_WORDS) for _ in range(file_size // 6 + 1))[:file_size]
+            path.write_text(text, encoding="utf-8")
+            file_count += 1
+            byte_count += len(text)
+
+    return file_count, byte_count
+
+
+def touch_skills(skills_dir: Path, fraction: float, seed: int):
+    """Append a line to the SKILL.md of a fraction of the skills (at least one)."""
+    rng = random.Random(seed)
+    names = sorted(p.name for p in skills_dir.iterdir() if p.is_dir())
+    for name in rng.sample(names, max(1, int(len(names) * fraction))):
+        with open(skills_dir / name / "SKILL.md", "a", encoding="utf-8") as f:
+            f.write(f"\n<!-- touched {rng.random()} -->\n")
+
+
+def reset(*paths):
+    for path in paths:
+        if path.is_symlink() or path.is_file():
+            path.unlink()
+        elif path.exists():
+            shutil.rmtree(path)
+
+
+def measure(fn, setup=None, repeat: int = 3):
+    """
+    Time fn() `repeat` times, running setup() untimed before each run.
+
+    Script output is swallowed so it does not skew timings.
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            with contextlib.redirect_stdout(io.StringIO()):
+                setup()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    return {
+        "min": round(min(samples), 6),
+        "median": round(statistics.median(samples), 6),
+        "max": round(max(samples), 6),
+        "runs": len(samples),
+    }
+
+
+def bench_tree(scratch: Path, skills: int, files: int, file_size: int, depth: int,
+               workers: int, repeat: int, seed: int):
+    """Generate one tree and time every lifecycle stage on it."""
+    repo_root = scratch / f"repo-{skills}"
+    file_count, byte_count = make_tree(repo_root, skills, files, file_size, depth, seed)
+    skills_dir = repo_root / "skills"
+    cache = repo_root / CACHE_DIR_NAME
+    sync_dir = scratch / f"sync-{skills}"
+    deploy_dir = scratch / f"deploy-{skills}"
+    sync_targets = {"local": sync_dir}
+    skill_paths = sorted(p for p in skills_dir.iterdir() if p.is_dir())
+
+    def full_sync():
+        reset(cache, sync_dir)
+        sync_skills(targets=sync_targets, workers=workers, repo_root=repo_root)
+
+    def deploy(mode):
+        target = DeployTarget("bench", deploy_dir, mode=mode, max_concurrency=workers)
+        rows = deploy_many(skill_paths, [target], workers=workers)
+        failed = [r for r in rows if not r[2]]
+        if failed:
+            raise RuntimeError(f"{len(failed)} deploy(s) failed, e.g. {failed[0]}")
+
+    def bump_all():
+        if not version_skill.bump_skills(skill_paths, "patch", workers):
+            raise RuntimeError("version bump failed")
+
+    touch_seed = iter(range(seed, seed + 10 ** 6))
+    timings = {
+        "validate_cold": measure(lambda: validate_all(skills_dir, workers=workers, repo_root=repo_root),
+                                 setup=lambda: reset(cache), repeat=repeat),
+        "validate_cached": measure(lambda: validate_all(skills_dir, workers=workers, repo_root=repo_root),
+                                   repeat=repeat),
+        "sync_plan_cold": measure(lambda: build_plans(targets=sync_targets, repo_root=repo_root),
+                                  setup=lambda: reset(cache, sync_dir), repeat=repeat),
+        "sync_apply_full": measure(lambda: sync_skills(targets=sync_targets, workers=workers, repo_root=repo_root),
+                                   setup=lambda: reset(cache, sync_dir), repeat=repeat),
+        "sync_plan_noop": measure(lambda: build_plans(targets=sync_targets, repo_root=repo_root),
+                                  setup=full_sync, repeat=repeat),
+        "sync_apply_incremental": measure(
+            lambda: sync_skills(targets=sync_targets, workers=workers, repo_root=repo_root),
+            setup=lambda: touch_skills(skills_dir, TOUCH_FRACTION, next(touch_seed)), repeat=repeat),
+        "deploy_copy": measure(lambda: deploy("copy"), setup=lambda: reset(deploy_dir), repeat=repeat),
+        "deploy_symlink": measure(lambda: deploy("symlink"), setup=lambda: reset(deploy_dir), repeat=repeat),
+        "version_bump": measure(bump_all, repeat=repeat),
+    }
+
+    reset(repo_root, sync_dir, deploy_dir)
+    return {
+        "skills": skills,
+        "files": file_count,
+        "bytes": byte_count,
+        "timings": timings,
+    }
+
+
+def git_commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                                capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def print_table(results, baseline=None):
+    """Median per stage and tree size, with the ratio to a baseline run when given."""
+    base = {}
+    for tree in (baseline or {}).get("trees", []):
+        base[tree["skills"]] = tree["timings"]
+
+    for tree in results["trees"]:
+        print(f"\n📏 {tree['skills']} skills, {tree['files']} files, {tree['bytes'] / 1024:.0f} KB")
+        for stage in STAGES:
+            median = tree["timings"][stage]["median"]
+            line = f"   {stage:<24} {median * 1000:10.1f} ms"
+            old = base.get(tree["skills"], {}).get(stage)
+            if old and old["median"]:
+                ratio = median / old["median"]
+                flag = " ⚠️" if ratio > 1.2 else ""
+                line += f"   x{ratio:.2f} vs baseline{flag}"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the skill lifecycle scripts on synthetic trees')
+    parser.add_argument('--skills', type=int, nargs='+', default=[10, 100, 500],
+                        help='Tree sizes (number of skills) to benchmark')
+    parser.add_argument('--files', type=int, default=5, help='Extra files per skill')
+    parser.add_argument('--file-size', type=int, default=2048, help='Approximate bytes per extra file')
+    parser.add_argument('--depth', type=int, default=2, help='Maximum directory nesting inside a skill')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Workers for every stage')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per stage')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the synthetic trees')
+    parser.add_argument('--output', default='bench-results.json', help='Where to write the JSON results')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    parser.add_argument('--scratch', help='Directory for the synthetic trees (default: a temp dir)')
+
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+
+    results = {
+        "version": RESULTS_VERSION,
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": {
+            "files": args.files,
+            "file_size": args.file_size,
+            "depth": args.depth,
+            "workers": args.workers,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "trees": [],
+    }
+
+    scratch_parent = Path(args.scratch) if args.scratch else None
+    if scratch_parent:
+        scratch_parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix="mapache-bench-", dir=scratch_parent) as scratch:
+        for size in args.skills:
+            print(f"⏱️ Benchmarking {size} skills...")
+            results["trees"].append(bench_tree(Path(scratch), size, args.files, args.file_size, args.depth,
+                                               args.workers, args.repeat, args.seed))
+
+    Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print_table(results, baseline)
+    print(f"\n✅ Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
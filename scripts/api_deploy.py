@@ -0,0 +1,359 @@
+"""
+Upload skills to the Claude API's /v1/skills endpoint.
+
+Each skill's content hash (the same Merkle root package_skill.py records)
+is compared with what the last deploy to that API recorded in
+.mapache/api-ledger.json, and only changed skills are sent. A skill the
+API does not have yet is created; a skill it already holds (matched by
+display_title) gets a new version. Requests for different skills run
+concurrently over one pool of keep-alive connections, and every file is
+streamed from disk, so no skill is held in memory.
+
+Failed requests are retried with exponential backoff (honouring
+Retry-After) on connection errors, 429 and 5xx. Each accepted skill is
+recorded in the ledger straight away, so an interrupted deploy resumes
+where it stopped: skills already uploaded match the remote version and
+are skipped.
+
+Protocol (point MAPACHE_API_URL at a local mock server to test):
+    GET  /v1/skills?source=custom&page=<token>
+         -> {"data": [{"id", "display_title", "latest_version"}], "has_more": bool, "next_page": token}
+    POST /v1/skills                        create: display_title plus one `files[]` part per file
+         -> {"id", "display_title", "latest_version"}
+    POST /v1/skills/{skill_id}/versions    new version: one `files[]` part per file
+         -> {"skill_id", "version"}
+
+File parts are named <skill>/<relative path>, so every upload has the
+common root directory the endpoint requires, with SKILL.md at its top.
+"""
+
+import http.client
+import json
+import mimetypes
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import quote, urlencode, urlsplit
+
+from skill_hash import HashCache, cache_dir, hash_skill, iter_skill_files, write_json_atomic
+import tracing
+
+DEFAULT_BASE_URL = "https://api.anthropic.com"
+SKILLS_PATH = "/v1/skills"
+API_VERSION = "2023-06-01"
+SKILLS_BETA = "skills-2025-10-02"
+
+# Documented limit on the total size of one skill upload
+MAX_UPLOAD_BYTES = 8 * 1024 * 1024
+
+DEFAULT_WORKERS = 4
+DEFAULT_RETRIES = 3
+DEFAULT_TIMEOUT = 60.0
+
+# Bytes read from a file per write to the socket
+STREAM_CHUNK = 64 * 1024
+
+# Transient failures only: uploads are not idempotent, so a conflict or a rejected request is final
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504, 529}
+
+LEDGER_NAME = "api-ledger.json"
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}" if status else message)
+        self.status = status
+
+
+class ConnectionPool:
+    """A fixed-size pool of keep-alive HTTP(S) connections to one host, shared by threads."""
+
+    def __init__(self, base_url: str, size: int = DEFAULT_WORKERS, timeout: float = DEFAULT_TIMEOUT):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported API URL: {base_url}")
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max(1, size))
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        tracing.count("api.connections")
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it goes back to the pool unless the request failed."""
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class Upload:
+    """One skill waiting to be sent: its files and content hash."""
+
+    __slots__ = ("skill", "skill_dir", "root", "files", "size")
+
+    def __init__(self, skill_dir: Path, root: str):
+        self.skill = skill_dir.name
+        self.skill_dir = skill_dir
+        self.root = root
+        self.files = [(rel_path, abs_path, abs_path.stat().st_size)
+                      for rel_path, abs_path in iter_skill_files(skill_dir)]
+        self.size = sum(size for _, _, size in self.files)
+
+
+class MultipartBody:
+    """A multipart/form-data body streamed from files, with its length known up front."""
+
+    def __init__(self, fields, files):
+        """fields: {name: value}; files: [(part filename, path, size)], sent as `files[]`."""
+        self.boundary = f"mapache-{uuid.uuid4().hex}"
+        self._fields = b"".join(
+            (f"--{self.boundary}\r\n"
+             f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+             f"{value}\r\n").encode("utf-8")
+            for name, value in fields.items()
+        )
+        self._files = [(self._file_head(filename), path, size) for filename, path, size in files]
+        self._tail = f"--{self.boundary}--\r\n".encode("ascii")
+        self.length = (len(self._fields) + sum(len(head) + size + 2 for head, _, size in self._files)
+                       + len(self._tail))
+
+    def _file_head(self, filename: str) -> bytes:
+        quoted = filename.replace('"', "%22")
+        content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        return (f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="files[]"; filename="{quoted}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n").encode("utf-8")
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __iter__(self):
+        """Fresh on every iteration, so a retried request re-reads the files."""
+        yield self._fields
+        for head, path, _ in self._files:
+            yield head
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(STREAM_CHUNK)
+                    if not chunk:
+                        break
+                    yield chunk
+            yield b"\r\n"
+        yield self._tail
+
+
+class SkillsApiClient:
+    """The /v1/skills calls deploys need, over a pooled connection with retry and backoff."""
+
+    def __init__(self, api_key: str, base_url: str = None, workers: int = DEFAULT_WORKERS,
+                 retries: int = DEFAULT_RETRIES, backoff: float = 1.0, timeout: float = DEFAULT_TIMEOUT):
+        self.api_key = api_key
+        self.base_url = (base_url or os.getenv("MAPACHE_API_URL") or DEFAULT_BASE_URL).rstrip("/")
+        self.pool = ConnectionPool(self.base_url, workers, timeout)
+        self.retries = retries
+        self.backoff = backoff
+
+    def close(self):
+        self.pool.close()
+
+    def _headers(self, extra=None):
+        headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": API_VERSION,
+            "anthropic-beta": SKILLS_BETA,
+            "Accept": "application/json",
+        }
+        headers.update(extra or {})
+        return headers
+
+    def request(self, method: str, path: str, body=None, headers=None):
+        """
+        Send one request, retrying transient failures.
+
+        Returns:
+            Decoded JSON response
+
+        Raises:
+            ApiError: On a non-retryable status or once retries run out
+        """
+        for attempt in range(self.retries + 1):
+            delay = None
+            try:
+                with tracing.span("api.request", method=method, path=path, attempt=attempt):
+                    with self.pool.connection() as conn:
+                        conn.request(method, self.pool.prefix + path, body=body, headers=self._headers(headers))
+                        response = conn.getresponse()
+                        payload = response.read()
+                if 200 <= response.status < 300:
+                    return json.loads(payload or b"{}")
+                error = ApiError(response.status, _error_message(payload))
+                if response.status not in RETRY_STATUSES:
+                    raise error
+                retry_after = response.getheader("retry-after")
+                if retry_after and retry_after.replace(".", "", 1).isdigit():
+                    delay = float(retry_after)
+            except (OSError, http.client.HTTPException) as e:
+                error = ApiError(0, f"{type(e).__name__}: {e}")
+            if attempt == self.retries:
+                raise error
+            tracing.count("api.retries")
+            # Exponential backoff with jitter so parallel uploads do not retry in lockstep
+            time.sleep(delay if delay is not None else self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    def list_skills(self):
+        """{display_title: skill object} for every custom skill on the account."""
+        skills = {}
+        page = None
+        while True:
+            params = {"source": "custom"}
+            if page:
+                params["page"] = page
+            data = self.request("GET", f"{SKILLS_PATH}?{urlencode(params)}")
+            for item in data.get("data", []):
+                skills.setdefault(item.get("display_title"), item)
+            page = data.get("next_page")
+            if not data.get("has_more") or not page:
+                return skills
+
+    def _post_files(self, path: str, upload: Upload, fields=None):
+        body = MultipartBody(fields or {}, [(f"{upload.skill}/{rel}", p, size) for rel, p, size in upload.files])
+        tracing.count("api.bytes_sent", body.length)
+        return self.request("POST", path, body=body, headers={
+            "Content-Type": body.content_type,
+            "Content-Length": str(body.length),
+        })
+
+    def create_skill(self, upload: Upload):
+        """Create a skill titled after its directory; returns the skill object."""
+        return self._post_files(SKILLS_PATH, upload, {"display_title": upload.skill})
+
+    def create_version(self, skill_id: str, upload: Upload):
+        """Upload a new version of an existing skill; returns the version object."""
+        return self._post_files(f"{SKILLS_PATH}/{quote(skill_id, safe='')}/versions", upload)
+
+
+def _error_message(payload: bytes) -> str:
+    try:
+        data = json.loads(payload)
+        return data.get("error", {}).get("message") or json.dumps(data)
+    except (ValueError, AttributeError):
+        return payload.decode("utf-8", errors="replace")[:200] or "no response body"
+
+
+def remote_matches(item, root: str, ledger_entry) -> bool:
+    """True when the remote skill's current version is the one the ledger recorded for hash root."""
+    if item is None or not ledger_entry:
+        return False
+    return ledger_entry.get("hash") == root and ledger_entry.get("id") == item.get("id") \
+        and ledger_entry.get("version") == item.get("latest_version")
+
+
+def deploy_to_api(skill_paths, api_key: str = None, base_url: str = None, workers: int = DEFAULT_WORKERS,
+                  force: bool = False, repo_root: Path = None, client: SkillsApiClient = None,
+                  max_bytes: int = MAX_UPLOAD_BYTES):
+    """
+    Diff skills against the ledger and create or version the changed ones on the API.
+
+    Returns:
+        List of (skill, "api", ok, seconds, error) rows, like deploy_many;
+        skills already current on the API are ok with error "unchanged"
+    """
+    repo_root = repo_root or Path(__file__).parent.parent
+    skill_paths = list(skill_paths)
+    api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+    if client is None and not api_key:
+        return [(p.name, "api", False, 0.0, "ANTHROPIC_API_KEY is not set") for p in skill_paths]
+
+    own_client = client is None
+    client = client or SkillsApiClient(api_key, base_url, workers)
+    ledger_path = cache_dir(repo_root) / LEDGER_NAME
+    try:
+        ledger_all = json.loads(ledger_path.read_text(encoding="utf-8")) if ledger_path.exists() else {}
+    except (OSError, ValueError):
+        ledger_all = {}
+    ledger = ledger_all.setdefault(client.base_url, {})
+    ledger_lock = threading.Lock()
+
+    rows = []
+    try:
+        with tracing.span("api.hash", skills=len(skill_paths)):
+            hash_cache = HashCache(cache_dir(repo_root) / "hash-cache.json")
+            uploads = [Upload(p, hash_skill(p, hash_cache)[0]) for p in skill_paths]
+            hash_cache.save()
+
+        start = time.perf_counter()
+        try:
+            with tracing.span("api.list"):
+                remote = client.list_skills()
+        except ApiError as e:
+            return [(u.skill, "api", False, time.perf_counter() - start, f"listing skills failed: {e}")
+                    for u in uploads]
+
+        pending = []
+        for upload in uploads:
+            if not force and remote_matches(remote.get(upload.skill), upload.root, ledger.get(upload.skill)):
+                rows.append((upload.skill, "api", True, 0.0, "unchanged"))
+            elif upload.size > max_bytes:
+                rows.append((upload.skill, "api", False, 0.0,
+                             f"skill is {upload.size} bytes, over the {max_bytes} byte upload limit"))
+            else:
+                pending.append(upload)
+
+        def send(upload):
+            upload_start = time.perf_counter()
+            item = remote.get(upload.skill)
+            with tracing.span("api.upload", skill=upload.skill, bytes=upload.size):
+                if item is None:
+                    created = client.create_skill(upload)
+                    entry = {"id": created.get("id"), "version": created.get("latest_version")}
+                else:
+                    version = client.create_version(item["id"], upload)
+                    entry = {"id": item["id"], "version": version.get("version")}
+            with ledger_lock:
+                ledger[upload.skill] = dict(entry, hash=upload.root)
+                # Recorded per skill, so an interrupted deploy resumes instead of starting over
+                write_json_atomic(ledger_path, ledger_all)
+            return time.perf_counter() - upload_start
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(max(1, workers), len(pending))) as pool:
+                futures = {pool.submit(send, upload): upload for upload in pending}
+                for future in as_completed(futures):
+                    upload = futures[future]
+                    try:
+                        rows.append((upload.skill, "api", True, future.result(), None))
+                    except Exception as e:
+                        rows.append((upload.skill, "api", False, 0.0, str(e)))
+    finally:
+        if own_client:
+            client.close()
+    return rows
@@ -0,0 +1,224 @@
+"""
+Persistent skill catalog backed by SQLite FTS5.
+
+Indexes name, description, tags, version, dependencies and the nosync flag
+of every skill into .mapache/catalog.db. Refreshes are incremental: a skill
+is only re-read when the mtime of its SKILL.md or .skillmeta moved, and only
+re-parsed when their content hash actually changed.
+"""
+
+import json
+import re
+import sqlite3
+from pathlib import Path
+
+from frontmatter import FrontmatterError, read_frontmatter
+from skill_hash import cache_dir, file_digest
+from tracing import traced
+
+CATALOG_NAME = "catalog.db"
+SCHEMA_VERSION = 1
+
+# bm25() column weights for (name, description, tags)
+RANK_WEIGHTS = (10.0, 1.0, 5.0)
+
+# Skills (aliased s) whose JSON tag list holds the bound tag
+TAG_FILTER = "EXISTS (SELECT 1 FROM json_each(s.tags) WHERE json_each.value = ?)"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS skills (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '[]',
+    version TEXT,
+    dependencies TEXT NOT NULL DEFAULT '[]',
+    nosync INTEGER NOT NULL DEFAULT 0,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS skills_fts USING fts5(
+    name, description, tags, tokenize = 'unicode61 remove_diacritics 2'
+);
+"""
+
+
+class SkillCatalog:
+    """SQLite-backed index over the skills/ tree."""
+
+    def __init__(self, skills_dir: Path, db_path: Path = None):
+        self.skills_dir = skills_dir
+        self.db_path = db_path or cache_dir(skills_dir.parent) / CATALOG_NAME
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.row_factory = sqlite3.Row
+
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self.conn.executescript("DROP TABLE IF EXISTS skills; DROP TABLE IF EXISTS skills_fts;")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @traced("catalog.refresh")
+    def refresh(self):
+        """
+        Bring the index up to date with skills/.
+
+        Returns:
+            Dict with counts of added, updated, removed and unchanged skills
+        """
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        known = {row["name"]: row for row in self.conn.execute(
+            "SELECT id, name, mtime_ns, content_hash FROM skills")}
+        seen = set()
+
+        with self.conn:
+            for skill_dir in sorted(self.skills_dir.iterdir()):
+                skill_md = skill_dir / "SKILL.md"
+                if not skill_dir.is_dir() or not skill_md.exists():
+                    continue
+                seen.add(skill_dir.name)
+
+                meta_path = skill_dir / ".skillmeta"
+                sources = [p for p in (skill_md, meta_path) if p.exists()]
+                mtime_ns = max(p.stat().st_mtime_ns for p in sources)
+
+                row = known.get(skill_dir.name)
+                if row is not None and row["mtime_ns"] == mtime_ns:
+                    stats["unchanged"] += 1
+                    continue
+
+                content_hash = ":".join(file_digest(p) for p in sources)
+                if row is not None and row["content_hash"] == content_hash:
+                    # Touched but not edited; remember the new mtime so we skip it next time
+                    self.conn.execute("UPDATE skills SET mtime_ns = ? WHERE id = ?", (mtime_ns, row["id"]))
+                    stats["unchanged"] += 1
+                    continue
+
+                record = self._read_skill(skill_dir, skill_md, meta_path)
+                record.update(mtime_ns=mtime_ns, content_hash=content_hash)
+                self._upsert(record, row["id"] if row is not None else None)
+                stats["updated" if row is not None else "added"] += 1
+
+            for name, row in known.items():
+                if name not in seen:
+                    self.conn.execute("DELETE FROM skills WHERE id = ?", (row["id"],))
+                    self.conn.execute("DELETE FROM skills_fts WHERE rowid = ?", (row["id"],))
+                    stats["removed"] += 1
+
+        return stats
+
+    def _read_skill(self, skill_dir: Path, skill_md: Path, meta_path: Path):
+        record = {
+            "name": skill_dir.name,
+            "description": "",
+            "tags": [],
+            "version": None,
+            "dependencies": [],
+            "nosync": False,
+        }
+
+        try:
+            frontmatter = read_frontmatter(skill_md)
+        except FrontmatterError as e:
+            print(f"⚠️ Warning: {e}")
+            frontmatter = None
+        if frontmatter is not None:
+            record["description"] = str(frontmatter.description or "")
+            record["nosync"] = frontmatter.nosync
+
+        if meta_path.exists():
+            try:
+                meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                record["tags"] = list(meta.get("tags") or [])
+                record["version"] = meta.get("version")
+                record["dependencies"] = list(meta.get("dependencies") or [])
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Warning: Could not read {meta_path}: {e}")
+
+        return record
+
+    def _upsert(self, record: dict, row_id=None):
+        values = (
+            record["name"],
+            record["description"],
+            json.dumps(record["tags"]),
+            record["version"],
+            json.dumps(record["dependencies"]),
+            int(record["nosync"]),
+            record["mtime_ns"],
+            record["content_hash"],
+        )
+        if row_id is None:
+            cur = self.conn.execute(
+                "INSERT INTO skills (name, description, tags, version, dependencies, nosync, "
+                "mtime_ns, content_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", values)
+            row_id = cur.lastrowid
+        else:
+            self.conn.execute(
+                "UPDATE skills SET name = ?, description = ?, tags = ?, version = ?, dependencies = ?, "
+                "nosync = ?, mtime_ns = ?, content_hash = ? WHERE id = ?", values + (row_id,))
+            self.conn.execute("DELETE FROM skills_fts WHERE rowid = ?", (row_id,))
+
+        self.conn.execute(
+            "INSERT INTO skills_fts (rowid, name, description, tags) VALUES (?, ?, ?, ?)",
+            (row_id, record["name"].replace("-", " "), record["description"], " ".join(record["tags"])))
+
+    @traced("catalog.search")
+    def search(self, query: str, limit: int = 10, tag: str = None):
+        """
+        Ranked full-text search over name, description and tags.
+
+        Every query term is matched as a prefix. If requiring all terms finds
+        nothing, any-term matching is used instead. A tag restricts the
+        matches before they are ranked and limited.
+        """
+        terms = re.findall(r"\w+", query.lower())
+        if not terms:
+            return []
+
+        tag_filter, tag_params = ("AND " + TAG_FILTER, (tag,)) if tag else ("", ())
+        for joiner in (" AND ", " OR "):
+            match = joiner.join(f'"{t}"*' for t in terms)
+            rows = self.conn.execute(
+                "SELECT s.*, bm25(skills_fts, ?, ?, ?) AS score FROM skills_fts "
+                "JOIN skills s ON s.id = skills_fts.rowid "
+                f"WHERE skills_fts MATCH ? {tag_filter} ORDER BY score LIMIT ?",
+                RANK_WEIGHTS + (match,) + tag_params + (limit,)).fetchall()
+            if rows or len(terms) == 1:
+                return [self._to_dict(row) for row in rows]
+        return []
+
+    def list(self, tag: str = None, include_nosync: bool = True):
+        """All indexed skills, optionally filtered by tag."""
+        if tag:
+            rows = self.conn.execute(f"SELECT * FROM skills s WHERE {TAG_FILTER} ORDER BY name", (tag,)).fetchall()
+        else:
+            rows = self.conn.execute("SELECT * FROM skills ORDER BY name").fetchall()
+        skills = [self._to_dict(row) for row in rows]
+        if not include_nosync:
+            skills = [s for s in skills if not s["nosync"]]
+        return skills
+
+    @staticmethod
+    def _to_dict(row):
+        result = {
+            "name": row["name"],
+            "description": row["description"],
+            "tags": json.loads(row["tags"]),
+            "version": row["version"],
+            "dependencies": json.loads(row["dependencies"]),
+            "nosync": bool(row["nosync"]),
+            "modified_ns": row["mtime_ns"],
+        }
+        if "score" in row.keys():
+            # bm25 is lower-is-better; flip it so bigger means more relevant
+            result["score"] = round(-row["score"], 4)
+        return result
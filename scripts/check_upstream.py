@@ -3,18 +3,22 @@
 Check for updates and documentation changes in the vercel-labs/add-skill repository.
 """
 
+import argparse
 import subprocess
 import re
 import sys
 import json
 from pathlib import Path
 
+import tracing
+
 UPSTREAM_URL = "https://github.com/vercel-labs/add-skill"
 NPM_PACKAGE = "add-skill"
 
 def get_current_npm_version():
     try:
-        result = subprocess.run(["npx", NPM_PACKAGE, "--version"], capture_output=True, text=True, shell=True)
+        with tracing.span("upstream.npx_version"):
+            result = subprocess.run(["npx", NPM_PACKAGE, "--version"], capture_output=True, text=True, shell=True)
         return result.stdout.strip()
     except:
         return None
@@ -36,5 +40,13 @@ def check_upstream():
     print(f"   * Recommendation: 'Watch' the repo for 'Releases' to get notified of new agents or features.")
     print(f"   * Check 'Creating Skills' section in README if your skills stop working.")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Check vercel-labs/add-skill for updates')
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        check_upstream()
+
 if __name__ == "__main__":
-    check_upstream()
+    main()
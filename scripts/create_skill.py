@@ -12,6 +12,8 @@ import sys
 from pathlib import Path
 from datetime import datetime
 
+import tracing
+
 SKILL_TEMPLATE = """---
 name: {name}
 description: {description}
@@ -67,6 +69,7 @@ SKILLMETA_TEMPLATE = """{
 """
 
 
+@tracing.traced("create.create_skill")
 def create_skill(name: str, description: str, base_path: str = None):
     """Create a new skill directory with template files."""
     if base_path is None:
@@ -128,7 +131,7 @@ def create_skill(name: str, description: str, base_path: str = None):
     return True
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description='Create a new Mapache Skill from template'
     )
@@ -148,10 +151,12 @@ def main():
         help='Base path for skills repository (default: parent of scripts/)'
     )
     
-    args = parser.parse_args()
-    
-    success = create_skill(args.name, args.description, args.path)
-    sys.exit(0 if success else 1)
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        success = create_skill(args.name, args.description, args.path)
+        sys.exit(0 if success else 1)
 
 
 if __name__ == '__main__':
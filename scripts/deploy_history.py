@@ -0,0 +1,277 @@
+"""
+Content-addressed history of deployed skill versions, for instant rollback.
+
+Every deploy publishes the skill into a local object store:
+
+    <store>/objects/ab/abcd...      one file per distinct content (".x" if executable)
+    <store>/versions/<skill>/<root> the skill's tree, hardlinked to its objects
+    <store>/refs/<target>/<skill>.json
+                                    {"current": root, "history": [{root, label, deployed_at}]}
+
+A file shared by many versions is stored once. A version directory is
+never modified after it is published, so a target can point straight at
+it. Targets in "versioned" mode are a symlink into the store, which makes
+both deploys and rollbacks a single pointer swap. Other targets are
+restored from the store by symlink, or by an incremental atomic copy in
+"copy" mode.
+
+Garbage collection keeps each target's current version plus the newest
+`keep` versions in its history. It then deletes the other version
+directories, and any object no version still links to (hardlink count 1).
+Configure it in deploy_targets.json:
+
+    {"history": {"path": "~/.mapache/store", "keep": 5, "auto_gc": true}}
+"""
+
+import json
+import os
+import shutil
+import stat
+import threading
+import time
+from pathlib import Path
+
+from atomic_deploy import atomic_copy_deploy, atomic_symlink
+from skill_hash import HashCache, cache_dir, hash_skill, iter_skill_files, write_json_atomic
+from targets import load_config
+import tracing
+
+DEFAULT_STORE = "~/.mapache/store"
+DEFAULT_KEEP = 5
+
+# Version directories are referred to by this many leading hex digits in listings
+SHORT_ROOT = 12
+
+
+class HistoryError(Exception):
+    pass
+
+
+def skill_label(skill_dir: Path):
+    """The .skillmeta version of a skill, if it has one."""
+    meta_path = skill_dir / ".skillmeta"
+    try:
+        return json.loads(meta_path.read_text(encoding="utf-8")).get("version")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _is_executable(path: Path) -> bool:
+    return bool(path.stat().st_mode & stat.S_IXUSR)
+
+
+class DeployHistory:
+    def __init__(self, store: Path, keep: int = DEFAULT_KEEP, auto_gc: bool = True,
+                 hash_cache: HashCache = None):
+        self.store = Path(os.path.expandvars(str(store))).expanduser()
+        self.keep = max(1, int(keep))
+        self.auto_gc = auto_gc
+        self.hash_cache = hash_cache or HashCache()
+
+    @classmethod
+    def load(cls, repo_root: Path = None):
+        """History configured by the "history" section of deploy_targets.json ($MAPACHE_STORE wins)."""
+        repo_root = repo_root or Path(__file__).parent.parent
+        config = load_config(repo_root, section="history")
+        store = os.environ.get("MAPACHE_STORE") or config.get("path", DEFAULT_STORE)
+        return cls(store, keep=config.get("keep", DEFAULT_KEEP), auto_gc=config.get("auto_gc", True),
+                   hash_cache=HashCache(cache_dir(repo_root) / "hash-cache.json"))
+
+    # Publishing
+
+    def _object_path(self, digest: str, executable: bool) -> Path:
+        return self.store / "objects" / digest[:2] / (digest + (".x" if executable else ""))
+
+    def _put_object(self, src: Path, digest: str, executable: bool) -> Path:
+        obj = self._object_path(digest, executable)
+        if obj.exists():
+            tracing.count("history.objects_reused")
+            return obj
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        tmp = obj.with_name(f".{obj.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.copy2(src, tmp)
+        # Objects are shared by every version that contains them, so they must not be edited in place
+        os.chmod(tmp, 0o555 if executable else 0o444)
+        os.replace(tmp, obj)
+        tracing.count("history.objects_written")
+        return obj
+
+    def version_dir(self, skill: str, root: str) -> Path:
+        return self.store / "versions" / skill / root
+
+    @tracing.traced("history.publish")
+    def publish(self, skill_dir: Path) -> str:
+        """
+        Add the skill's current content to the store (a no-op if that version exists).
+
+        Returns:
+            The version's content root hash
+        """
+        root, files = hash_skill(skill_dir, self.hash_cache)
+        version = self.version_dir(skill_dir.name, root)
+        if version.exists():
+            return root
+
+        staging = version.with_name(f".{root}.{os.getpid()}.{threading.get_ident()}.tmp")
+        staging.mkdir(parents=True)
+        try:
+            for rel_path, abs_path in iter_skill_files(skill_dir):
+                obj = self._put_object(abs_path, files[rel_path], _is_executable(abs_path))
+                dst = staging / rel_path
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(obj, dst)
+                except OSError:
+                    shutil.copy2(obj, dst)  # no hardlinks here: still correct, just not deduplicated
+            try:
+                os.rename(staging, version)
+            except OSError:
+                if not version.exists():
+                    raise
+                shutil.rmtree(staging)  # published concurrently by another deploy
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return root
+
+    # Pointers
+
+    def _ref_path(self, target: str, skill: str) -> Path:
+        return self.store / "refs" / target / f"{skill}.json"
+
+    def read_ref(self, target: str, skill: str) -> dict:
+        try:
+            return json.loads(self._ref_path(target, skill).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {"current": None, "history": []}
+
+    def record(self, target: str, skill: str, root: str, label: str = None):
+        """Note that target now holds this version of the skill."""
+        ref = self.read_ref(target, skill)
+        if ref["current"] != root or not ref["history"]:
+            ref["history"].append({"root": root, "label": label, "deployed_at": time.time()})
+        ref["current"] = root
+        write_json_atomic(self._ref_path(target, skill), ref)
+
+    def resolve(self, target: str, skill: str, version: str = None) -> str:
+        """
+        The root to roll back to: a version label ("1.2.0" or "v1.2.0"), a
+        root hash prefix, or by default the version deployed before the
+        current one.
+
+        Raises:
+            HistoryError: If no such version is recorded and still in the store
+        """
+        ref = self.read_ref(target, skill)
+        history = ref["history"]
+        if not history:
+            raise HistoryError(f"No deploy history for {skill} on {target}")
+
+        if version is None:
+            current = ref["current"]
+            last = max((i for i, e in enumerate(history) if e["root"] == current), default=len(history))
+            candidates = [e["root"] for e in reversed(history[:last]) if e["root"] != current]
+            if not candidates:
+                raise HistoryError(f"{skill} on {target} has no earlier version to roll back to")
+        else:
+            wanted = version.lstrip("v")
+            candidates = [e["root"] for e in reversed(history)
+                          if (e.get("label") or "").lstrip("v") == wanted or e["root"].startswith(version)]
+            if not candidates:
+                raise HistoryError(f"No version '{version}' of {skill} in the history of {target}")
+
+        root = candidates[0]
+        if not self.version_dir(skill, root).is_dir():
+            raise HistoryError(f"Version {root[:SHORT_ROOT]} of {skill} was garbage collected")
+        return root
+
+    @tracing.traced("history.rollback")
+    def rollback(self, target, skill: str, version: str = None) -> str:
+        """
+        Point target's copy of skill back at an earlier version.
+
+        A pointer swap unless the target is in "copy" mode, in which case
+        the version is restored from the store with an incremental copy.
+
+        Returns:
+            The root hash now deployed
+        """
+        root = self.resolve(target.name, skill, version)
+        source = self.version_dir(skill, root)
+        dest = target.path / skill
+        if target.mode == "copy":
+            atomic_copy_deploy(source, dest)
+            # Store objects are read-only; a restored copy should be as editable as a deployed one
+            for _, path in iter_skill_files(dest):
+                os.chmod(path, path.stat().st_mode | stat.S_IWUSR)
+        else:
+            atomic_symlink(source, dest)
+        ref = self.read_ref(target.name, skill)
+        ref["current"] = root
+        write_json_atomic(self._ref_path(target.name, skill), ref)
+        return root
+
+    def versions(self, target: str, skill: str):
+        """[(root, label, deployed_at, current, available)] newest first."""
+        ref = self.read_ref(target, skill)
+        return [(e["root"], e.get("label"), e["deployed_at"], e["root"] == ref["current"],
+                 self.version_dir(skill, e["root"]).is_dir())
+                for e in reversed(ref["history"])]
+
+    # Garbage collection
+
+    @tracing.traced("history.gc")
+    def gc(self, keep: int = None):
+        """
+        Delete versions no target needs and objects no version links to.
+
+        Returns:
+            {"versions": n, "objects": n, "bytes": n} removed
+        """
+        keep = self.keep if keep is None else max(1, keep)
+        removed = {"versions": 0, "objects": 0, "bytes": 0}
+        live = {}
+        refs_dir = self.store / "refs"
+        for ref_path in refs_dir.glob("*/*.json") if refs_dir.exists() else ():
+            skill = ref_path.stem
+            try:
+                ref = json.loads(ref_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                continue
+            kept = set()
+            if ref.get("current"):
+                kept.add(ref["current"])
+            for entry in reversed(ref.get("history", [])):
+                if len(kept) >= keep and entry["root"] not in kept:
+                    continue
+                kept.add(entry["root"])
+            # Forget history entries whose versions are going away
+            trimmed = [e for e in ref.get("history", []) if e["root"] in kept]
+            if len(trimmed) != len(ref.get("history", [])):
+                ref["history"] = trimmed
+                write_json_atomic(ref_path, ref)
+            live.setdefault(skill, set()).update(kept)
+
+        versions_dir = self.store / "versions"
+        for skill_dir in versions_dir.iterdir() if versions_dir.exists() else ():
+            for version in skill_dir.iterdir():
+                if version.name.startswith(".") or version.name in live.get(skill_dir.name, ()):
+                    continue
+                shutil.rmtree(version)
+                removed["versions"] += 1
+            if not any(skill_dir.iterdir()):
+                skill_dir.rmdir()
+
+        objects_dir = self.store / "objects"
+        for obj in objects_dir.glob("*/*") if objects_dir.exists() else ():
+            st = obj.stat()
+            # The store's own name is the only link left once no version contains the file
+            if st.st_nlink == 1 and not obj.name.startswith("."):
+                os.chmod(obj, 0o644)
+                obj.unlink()
+                removed["objects"] += 1
+                removed["bytes"] += st.st_size
+        return removed
+
+    def save(self):
+        self.hash_cache.save()
@@ -2,100 +2,326 @@
 """
 Deploy Mapache Skills to target environments.
 
+Targets come from the registry in targets.py (Claude Code, Gemini CLI,
+Antigravity, ... plus any directories configured in deploy_targets.json).
+
 Usage:
     python deploy_skill.py skill-name/ --env code
     python deploy_skill.py skill-name/ --env all
+    python deploy_skill.py skill-name/ --env gemini-cli --mode copy
+    python deploy_skill.py --all-skills --env all --workers 8
+    python deploy_skill.py skills/skill-manager --with-dependents
+    python deploy_skill.py --all-skills --env api
+    python deploy_skill.py --rollback n8n-flow-builder [1.2.0] --env code
+    python deploy_skill.py --history n8n-flow-builder
+
+Every deploy is recorded in a content-addressed version store (see
+deploy_history.py), so --rollback is a pointer swap rather than a rebuild.
+
+API deploys (see api_deploy.py) need ANTHROPIC_API_KEY. They create
+skills the API does not have and add a version only for skills whose
+content changed since the last deploy.
+
+Multi-skill deploys run in topological waves from the `.skillmeta`
+dependency graph (see skill_graph.py): a skill only deploys after the
+skills it depends on, and each wave deploys in parallel.
 """
 
 import argparse
+import os
 import sys
-import shutil
-import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from api_deploy import deploy_to_api
+from atomic_deploy import atomic_copy_deploy, atomic_symlink
+from deploy_history import DeployHistory, HistoryError, SHORT_ROOT, skill_label
+from skill_graph import SkillGraph, plan_waves
+from targets import load_targets
+import tracing
+from validate_skill import SkillValidator, validate_all
+
+DEFAULT_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
 
 class SkillDeployer:
-    def __init__(self, skill_path: Path, repo_root: Path = None):
+    def __init__(self, skill_path: Path, repo_root: Path = None, mode: str = None, targets: dict = None,
+                 history: DeployHistory = None):
         self.skill_path = skill_path
         self.skill_name = skill_path.name
+        # auto: symlink, falling back to an atomic copy; symlink/copy force one;
+        # versioned: symlink to the skill's version in the history store.
+        # None defers to each target's configured mode.
+        self.mode = mode
+        # Every deploy is recorded here for --rollback (None keeps no history)
+        self.history = history
         
         if repo_root is None:
             # Assume repo root is parent of scripts/
             self.repo_root = Path(__file__).parent.parent
         else:
             self.repo_root = repo_root
+        
+        self.targets = targets if targets is not None else load_targets(self.repo_root)
     
-    def deploy_to_code_cli(self):
-        """Deploy skill to Claude Code CLI (~/.claude/skills/)."""
-        print(f"Deploying {self.skill_name} to Claude Code CLI...")
+    def deploy_to_target(self, target, verbose: bool = True):
+        """Install the skill into a registered target directory."""
+        log = print if verbose else (lambda *a, **k: None)
+        log(f"Deploying {self.skill_name} to {target.label}...")
         
-        # Target directory for Claude Code
-        home = Path.home()
-        claude_skills_dir = home / ".claude" / "skills"
+        # Create the skills directory if it doesn't exist
+        target.path.mkdir(parents=True, exist_ok=True)
         
-        # Create .claude/skills directory if it doesn't exist
-        claude_skills_dir.mkdir(parents=True, exist_ok=True)
+        dest = target.path / self.skill_name
+        mode = self.mode or target.mode
         
-        target = claude_skills_dir / self.skill_name
+        if dest.exists() or dest.is_symlink():
+            log(f"   Replacing existing version at {dest}")
         
-        # Check if already exists
-        if target.exists():
-            print(f"   Warning: Skill already exists at {target}")
-            print(f"   Removing old version...")
-            if target.is_symlink():
-                target.unlink()
-            else:
-                shutil.rmtree(target)
+        if mode == 'versioned' and self.history is None:
+            self.history = DeployHistory.load(self.repo_root)
+        root = None
+        if self.history is not None:
+            root = self.history.publish(self.skill_path)
         
-        # Try to create symlink first (preferred)
-        try:
-            target.symlink_to(self.skill_path.resolve())
-            print(f"   Created symlink: {target} -> {self.skill_path}")
-            print(f"   Successfully deployed to Code CLI")
-            return True
-        except OSError as e:
-            # If symlink fails (Windows permissions), copy instead
-            print(f"   Symlink failed ({e}), copying files instead...")
-            shutil.copytree(self.skill_path, target)
-            print(f"   Copied to: {target}")
-            print(f"   Successfully deployed to Code CLI")
+        ok = self._install(target, dest, mode, root, log)
+        if ok and root is not None:
+            self.history.record(target.name, self.skill_name, root, skill_label(self.skill_path))
+        return ok
+    
+    def _install(self, target, dest: Path, mode: str, root: str, log):
+        if mode == 'versioned':
+            version = self.history.version_dir(self.skill_name, root)
+            with tracing.span("deploy.symlink", skill=self.skill_name, target=target.name):
+                atomic_symlink(version, dest)
+            log(f"   Pointed {dest} at version {root[:SHORT_ROOT]}")
+            log(f"   Successfully deployed to {target.label}")
             return True
+        
+        # Try to create symlink first (preferred)
+        if mode in ('auto', 'symlink'):
+            try:
+                with tracing.span("deploy.symlink", skill=self.skill_name, target=target.name):
+                    atomic_symlink(self.skill_path, dest)
+                log(f"   Created symlink: {dest} -> {self.skill_path}")
+                log(f"   Successfully deployed to {target.label}")
+                return True
+            except OSError as e:
+                if mode == 'symlink':
+                    log(f"   Symlink failed ({e})")
+                    return False
+                # If symlink fails (Windows permissions), copy instead
+                log(f"   Symlink failed ({e}), copying files instead...")
+        
+        start = time.perf_counter()
+        with tracing.span("deploy.copy", skill=self.skill_name, target=target.name):
+            stats = atomic_copy_deploy(self.skill_path, dest)
+        elapsed = time.perf_counter() - start
+        log(f"   Copied to: {dest}")
+        log(f"   {stats['copied']} copied ({stats['bytes_copied']} bytes), "
+            f"{stats['reflinked']} reflinked, {stats['linked']} unchanged "
+            f"in {elapsed * 1000:.1f} ms")
+        log(f"   Successfully deployed to {target.label}")
+        return True
+    
+    def deploy_to_code_cli(self):
+        """Deploy skill to Claude Code CLI (~/.claude/skills/)."""
+        return self.deploy_to_target(self.targets['claude-code'])
     
-    def deploy_to_api(self):
+    def deploy_to_api(self, force: bool = False):
         """Deploy skill to Claude API via /v1/skills endpoint."""
         print(f"Deploying {self.skill_name} to Claude API...")
-        print(f"   API deployment not yet implemented")
-        print(f"   Manual upload required via Claude Console")
-        print(f"   Visit: https://console.anthropic.com")
-        return False
+        [(_, _, ok, seconds, error)] = deploy_to_api([self.skill_path], force=force, repo_root=self.repo_root)
+        if error == "unchanged":
+            print("   Already current on the API, skipped")
+        elif ok:
+            print(f"   Uploaded in {seconds * 1000:.1f} ms")
+        else:
+            print(f"   Upload failed: {error}")
+        return ok
     
-    def deploy(self, environments):
+    def deploy(self, environments, force: bool = False):
         """Deploy to specified environments."""
         results = {}
+        targets, include_api = resolve_environments(environments, self.targets)
         
-        if 'code' in environments or 'all' in environments:
-            results['code'] = self.deploy_to_code_cli()
+        for target in targets:
+            results[target.name] = self.deploy_to_target(target)
         
-        if 'api' in environments or 'all' in environments:
-            results['api'] = self.deploy_to_api()
-
+        if include_api:
+            results['api'] = self.deploy_to_api(force=force)
         
         return all(results.values()) if results else False
 
 
-def main():
+def resolve_environments(environments, registry):
+    """
+    Map --env values onto registry targets.
+
+    'code' is Claude Code, 'all' is every installed target plus the API, and
+    any other value names a registry target directly.
+
+    Returns:
+        (list of DeployTarget, include_api)
+    """
+    targets = {}
+    include_api = False
+    for env in environments:
+        if env == 'all':
+            targets.update((n, t) for n, t in registry.items() if t.is_installed())
+            include_api = True
+        elif env == 'api':
+            include_api = True
+        elif env == 'code':
+            targets['claude-code'] = registry['claude-code']
+        else:
+            targets[env] = registry[env]
+    return list(targets.values()), include_api
+
+
+def deploy_many(skill_paths, targets, workers: int = DEFAULT_WORKERS, mode: str = None, graph=None,
+                history: DeployHistory = None):
+    """
+    Deploy every skill to every target concurrently.
+
+    A shared pool bounds total parallelism while a per-target semaphore caps
+    how many installs hit the same directory at once. With a dependency
+    graph, skills deploy in topological waves and a skill whose dependency
+    failed on a target is skipped on that target.
+
+    Returns:
+        List of (skill, target, ok, seconds, error) rows
+    """
+    registry = {t.name: t for t in targets}
+    limits = {t.name: threading.Semaphore(t.max_concurrency) for t in targets}
+    
+    def run(skill_path, target):
+        with limits[target.name]:
+            start = time.perf_counter()
+            try:
+                deployer = SkillDeployer(skill_path, mode=mode, targets=registry, history=history)
+                ok = deployer.deploy_to_target(target, verbose=False)
+                error = None if ok else "deploy failed"
+            except Exception as e:
+                ok, error = False, str(e)
+            return skill_path.name, target.name, ok, time.perf_counter() - start, error
+    
+    by_name = {p.name: p for p in skill_paths}
+    failed = {t.name: set() for t in targets}
+    rows = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for i, wave in enumerate(plan_waves(graph, by_name)):
+            with tracing.span("deploy.wave", wave=i, skills=len(wave)):
+                futures = []
+                for name in wave:
+                    for target in targets:
+                        blocked = graph.blocked_by(name, failed[target.name]) if graph else []
+                        if blocked:
+                            failed[target.name].add(name)
+                            rows.append((name, target.name, False, 0.0,
+                                         f"skipped: dependency {', '.join(blocked)} failed"))
+                        else:
+                            futures.append(pool.submit(run, by_name[name], target))
+                for future in futures:
+                    row = future.result()
+                    rows.append(row)
+                    if not row[2]:
+                        failed[row[1]].add(row[0])
+    return rows
+
+
+def print_results_table(rows, elapsed: float):
+    """Aggregated per-deploy table followed by per-target totals."""
+    print(f"{'SKILL':<28} {'TARGET':<16} {'RESULT':<8} {'TIME':>10}")
+    for skill, target, ok, seconds, error in sorted(rows, key=lambda r: (r[0], r[1])):
+        result = "OK" if ok else "FAILED"
+        print(f"{skill:<28} {target:<16} {result:<8} {seconds * 1000:>7.1f} ms")
+        if error:
+            print(f"   {error}")
+    
+    print("-" * 66)
+    totals = {}
+    for _, target, ok, seconds, _ in rows:
+        ok_count, failed, total = totals.get(target, (0, 0, 0.0))
+        totals[target] = (ok_count + ok, failed + (not ok), total + seconds)
+    for target, (ok_count, failed, total) in sorted(totals.items()):
+        print(f"{target:<16} {ok_count} ok, {failed} failed, {total * 1000:.1f} ms busy")
+    print(f"Wall time: {elapsed * 1000:.1f} ms")
+
+
+def main(argv=None):
+    registry = load_targets()
+    
     parser = argparse.ArgumentParser(
         description='Deploy Mapache Skill to target environments'
     )
     parser.add_argument(
         'skill_path',
+        nargs='?',
         help='Path to skill directory'
     )
+    parser.add_argument(
+        '--all-skills',
+        action='store_true',
+        help='Deploy every skill under skills/ concurrently'
+    )
+    parser.add_argument(
+        '--with-dependents',
+        action='store_true',
+        help='Also redeploy every skill that depends on skill_path, in dependency order'
+    )
     parser.add_argument(
         '--env',
-        choices=['code', 'api', 'all'],
-        default='code',
-        help='Target environment (default: code)'
+        action='append',
+        choices=['code', 'api', 'all'] + [n for n in registry if n != 'code'],
+        help='Target environment or registry target, repeatable (default: code)'
+    )
+    parser.add_argument(
+        '--mode',
+        choices=['auto', 'symlink', 'copy', 'versioned'],
+        default=None,
+        help='Install mode: symlink with atomic-copy fallback, force one, or symlink to a stored version '
+             '(default: per target, auto)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Maximum concurrent deploys for --all-skills (default: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--rollback',
+        nargs='+',
+        metavar=('SKILL', 'VERSION'),
+        help='Return SKILL on each --env target to VERSION (a .skillmeta version or hash prefix), '
+             'or to the version deployed before the current one'
+    )
+    parser.add_argument(
+        '--history',
+        metavar='SKILL',
+        help="List SKILL's deployed versions on each --env target"
+    )
+    parser.add_argument(
+        '--gc',
+        action='store_true',
+        help='Remove stored versions beyond the newest --keep per target, then exit'
+    )
+    parser.add_argument(
+        '--keep',
+        type=int,
+        help='Versions per skill and target kept by garbage collection (default: history.keep, 5)'
+    )
+    parser.add_argument(
+        '--no-history',
+        action='store_true',
+        help='Do not record this deploy in the version history'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Upload to the API even when the remote skill already matches'
     )
     parser.add_argument(
         '--validate',
@@ -104,40 +330,163 @@ def main():
         help='Validate skill before deploying (default: true)'
     )
     
-    args = parser.parse_args()
-    skill_path = Path(args.skill_path)
-    
-    if not skill_path.exists():
-        print(f"Error: Skill directory not found: {skill_path}")
-        sys.exit(1)
-    
-    # Validate first if requested
-    if args.validate:
-        print("Running validation first...\n")
-        result = subprocess.run(
-            [sys.executable, Path(__file__).parent / "validate_skill.py", str(skill_path)],
-            capture_output=False
-        )
-        if result.returncode != 0:
-            print("\nValidation failed. Fix errors before deploying.")
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        environments = args.env or ['code']
+        history = None if args.no_history else DeployHistory.load()
+
+        if args.rollback or args.history or args.gc:
+            if history is None:
+                parser.error('--rollback, --history and --gc need the version history')
+            if args.rollback and len(args.rollback) > 2:
+                parser.error('--rollback takes a skill and at most one version')
+            sys.exit(0 if manage_history(history, environments, registry, args) else 1)
+
+        if args.all_skills:
+            success = deploy_all_skills(environments, registry, args, history=history)
+            finish_history(history, args)
+            sys.exit(0 if success else 1)
+
+        if not args.skill_path:
+            parser.error('skill_path is required unless --all-skills is given')
+
+        skill_path = Path(args.skill_path)
+
+        if not skill_path.exists():
+            print(f"Error: Skill directory not found: {skill_path}")
             sys.exit(1)
-        print()
 
+        if args.with_dependents:
+            success = deploy_all_skills(environments, registry, args, changed=[skill_path.resolve().name],
+                                        history=history)
+            finish_history(history, args)
+            sys.exit(0 if success else 1)
+
+        # Validate first if requested
+        if args.validate:
+            print("Running validation first...\n")
+            with tracing.span("deploy.validate"):
+                valid = SkillValidator(skill_path).validate()
+            if not valid:
+                print("\nValidation failed. Fix errors before deploying.")
+                sys.exit(1)
+            print()
+
+
+        # Deploy
+        deployer = SkillDeployer(skill_path, mode=args.mode, targets=registry, history=history)
+
+        print("=" * 60)
+        success = deployer.deploy(environments, force=args.force)
+        print("=" * 60)
+        finish_history(history, args)
+
+        if success:
+            print("\nDeployment complete!")
+        else:
+            print("\nDeployment completed with warnings")
+
+        sys.exit(0 if success else 1)
+
+
+def finish_history(history, args):
+    """Save hashes computed while publishing and collect old versions if configured to."""
+    if history is None:
+        return
+    history.save()
+    if history.auto_gc:
+        history.gc(args.keep)
+
+
+def manage_history(history, environments, registry, args):
+    """Handle --gc, --history and --rollback against the --env targets."""
+    if args.gc:
+        removed = history.gc(args.keep)
+        print(f"🧹 Removed {removed['versions']} version(s) and {removed['objects']} object(s), "
+              f"{removed['bytes']} bytes freed")
+        return True
+
+    targets, include_api = resolve_environments(environments, registry)
+    if include_api:
+        print("ℹ️ The API keeps its own versions; skipping it")
+
+    if args.history:
+        for target in targets:
+            print(f"{target.label}:")
+            versions = history.versions(target.name, args.history)
+            if not versions:
+                print("   (no deploys recorded)")
+            for root, label, deployed_at, current, available in versions:
+                marker = "*" if current else " "
+                when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(deployed_at))
+                note = "" if available else "  (collected)"
+                print(f" {marker} {root[:SHORT_ROOT]}  {label or '-':<10} {when}{note}")
+        return True
+
+    skill = args.rollback[0].rstrip("/\\").split("/")[-1]
+    version = args.rollback[1] if len(args.rollback) > 1 else None
+    ok = True
+    for target in targets:
+        start = time.perf_counter()
+        try:
+            root = history.rollback(target, skill, version)
+        except (HistoryError, OSError) as e:
+            print(f"❌ {target.label}: {e}")
+            ok = False
+            continue
+        print(f"✅ {target.label}: {skill} rolled back to {root[:SHORT_ROOT]} "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+    return ok
+
+
+def deploy_all_skills(environments, registry, args, changed=None, history=None):
+    """
+    Fan skills out to every requested target in dependency waves and print
+    one results table.
+
+    Args:
+        changed: Only deploy these skills and their dependents (default: every skill)
+    """
+    repo_root = Path(__file__).parent.parent
+    skills_dir = repo_root / "skills"
+    skill_paths = sorted(p for p in skills_dir.iterdir() if p.is_dir() and (p / "SKILL.md").exists())
+
+    graph = SkillGraph.load(skills_dir)
+    for problem in graph.problems():
+        print(f"⚠️ Warning: {problem}")
+    if changed is not None:
+        affected = graph.affected(changed)
+        skill_paths = [p for p in skill_paths if p.name in affected]
     
-    # Deploy
-    deployer = SkillDeployer(skill_path)
-    environments = [args.env]
+    if args.validate:
+        print("Running validation first...")
+        with tracing.span("deploy.validate"):
+            failed = {r["skill"] for r in validate_all(skills_dir, workers=args.workers) if not r["passed"]}
+        # A skill cannot go out without the skills it depends on
+        skipped = graph.affected(failed) & {p.name for p in skill_paths}
+        if skipped:
+            print(f"Skipping skills that failed validation or depend on one: {', '.join(sorted(skipped))}")
+            skill_paths = [p for p in skill_paths if p.name not in skipped]
+        print()
     
-    print("=" * 60)
-    success = deployer.deploy(environments)
-    print("=" * 60)
+    targets, include_api = resolve_environments(environments, registry)
+    if not targets and not include_api:
+        print("No installed targets found.")
+        return False
     
-    if success:
-        print("\nDeployment complete!")
-    else:
-        print("\nDeployment completed with warnings")
+    print(f"Deploying {len(skill_paths)} skill(s) to {', '.join(t.name for t in targets) or 'api'}...")
+    print("=" * 66)
+    start = time.perf_counter()
+    rows = deploy_many(skill_paths, targets, workers=args.workers, mode=args.mode, graph=graph, history=history)
+    if include_api:
+        with tracing.span("deploy.api", skills=len(skill_paths)):
+            rows.extend(deploy_to_api(skill_paths, workers=args.workers, force=args.force, repo_root=repo_root))
+    print_results_table(rows, time.perf_counter() - start)
+    print("=" * 66)
     
-    sys.exit(0 if success else 1)
+    return all(row[2] for row in rows)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,175 @@
+"""
+Shared SKILL.md frontmatter reader.
+
+Reads only the YAML header block: the file is consumed line by line and
+reading stops at the closing `---`, so the (often much larger) markdown
+body is never loaded. Top-level keys are indexed with their line numbers
+for error reporting; full YAML parsing happens lazily, and only when a
+caller needs a value that is not a plain scalar.
+"""
+
+import re
+from pathlib import Path
+
+from tracing import count, span
+
+DELIMITER = b"---"
+
+# An unterminated header should not turn into a read of the whole file
+MAX_HEADER_BYTES = 64 * 1024
+
+TOP_LEVEL_KEY = re.compile(r"^([A-Za-z_][\w-]*)\s*:(.*)$")
+
+TRUE_VALUES = {"true", "True", "TRUE", "yes", "Yes", "YES", "on", "On", "ON"}
+
+
+class FrontmatterError(ValueError):
+    """Malformed frontmatter, with the offending file and 1-based line number."""
+
+    def __init__(self, message: str, path=None, line: int = None):
+        super().__init__(message)
+        self.message = message
+        self.path = path
+        self.line = line
+
+    def __str__(self):
+        location = str(self.path) if self.path else "<frontmatter>"
+        if self.line is not None:
+            location += f":{self.line}"
+        return f"{location}: {self.message}"
+
+
+class Frontmatter:
+    """
+    Parsed SKILL.md header.
+
+    Attributes:
+        path: File the header was read from
+        lines: Header lines between the delimiters (without line endings)
+        fields: {key: raw scalar text} for every top-level key
+        field_lines: {key: 1-based line number in the file}
+        end_line: Line number of the closing delimiter
+        body_offset: Byte offset of the first byte after the closing delimiter
+    """
+
+    __slots__ = ("path", "lines", "fields", "field_lines", "end_line", "body_offset", "_data")
+
+    def __init__(self, path, lines, end_line: int, body_offset: int):
+        self.path = path
+        self.lines = lines
+        self.end_line = end_line
+        self.body_offset = body_offset
+        self.fields = {}
+        self.field_lines = {}
+        self._data = None
+
+        # Header content starts on line 2 (line 1 is the opening delimiter)
+        for lineno, line in enumerate(lines, start=2):
+            match = TOP_LEVEL_KEY.match(line)
+            if match and match.group(1) not in self.fields:
+                self.fields[match.group(1)] = match.group(2).strip()
+                self.field_lines[match.group(1)] = lineno
+
+    def __repr__(self):
+        return f"Frontmatter({self.path}, keys={list(self.fields)})"
+
+    def __contains__(self, key):
+        return key in self.fields
+
+    @property
+    def raw(self) -> str:
+        return "\n".join(self.lines)
+
+    @property
+    def data(self) -> dict:
+        """Full YAML mapping, parsed on first access."""
+        if self._data is None:
+            import yaml
+
+            try:
+                with span("frontmatter.yaml"):
+                    loaded = yaml.safe_load(self.raw)
+            except yaml.YAMLError as e:
+                mark = getattr(e, "problem_mark", None)
+                line = mark.line + 2 if mark is not None else None
+                problem = getattr(e, "problem", None) or str(e)
+                raise FrontmatterError(f"Invalid YAML: {problem}", self.path, line) from None
+            if loaded is None:
+                loaded = {}
+            if not isinstance(loaded, dict):
+                raise FrontmatterError("Frontmatter must be a YAML mapping", self.path, 2)
+            self._data = loaded
+        return self._data
+
+    def scalar(self, key: str, default=None):
+        """Raw, unquoted text of a single-line top-level value, without parsing YAML."""
+        value = self.fields.get(key)
+        if value is None or value in ("", "|", ">", "|-", ">-"):
+            return default if value is None else self.data.get(key, default)
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+            return value[1:-1]
+        return value
+
+    @property
+    def name(self):
+        return self.scalar("name")
+
+    @property
+    def description(self):
+        return self.scalar("description")
+
+    @property
+    def nosync(self) -> bool:
+        if "nosync" not in self.fields:
+            return False
+        return self.scalar("nosync") in TRUE_VALUES
+
+    def with_field(self, key: str, value: str) -> str:
+        """Return the header block (delimiters included) with one scalar field replaced."""
+        lines = list(self.lines)
+        lineno = self.field_lines.get(key)
+        if lineno is None:
+            lines.append(f"{key}: {value}")
+        else:
+            lines[lineno - 2] = f"{key}: {value}"
+        return "---\n" + "\n".join(lines) + "\n---\n"
+
+
+def read_frontmatter(path: Path):
+    """
+    Read the frontmatter of a markdown file.
+
+    Returns:
+        Frontmatter, or None if the file does not start with a `---` line
+
+    Raises:
+        FrontmatterError: If the header is never closed
+    """
+    path = Path(path)
+    count("frontmatter.reads")
+    lines = []
+    offset = 0
+    with open(path, "rb") as f:
+        first = f.readline()
+        if first.rstrip(b"\r\n") != DELIMITER:
+            return None
+        offset += len(first)
+
+        lineno = 1
+        while offset <= MAX_HEADER_BYTES:
+            line = f.readline()
+            if not line:
+                break
+            lineno += 1
+            offset += len(line)
+            stripped = line.rstrip(b"\r\n")
+            if stripped == DELIMITER:
+                try:
+                    text = [l.decode("utf-8") for l in lines]
+                except UnicodeDecodeError as e:
+                    raise FrontmatterError(f"Frontmatter is not valid UTF-8: {e.reason}", path) from None
+                count("frontmatter.bytes", offset)
+                return Frontmatter(path, text, lineno, offset)
+            lines.append(stripped)
+
+    raise FrontmatterError("YAML frontmatter not properly closed with ---", path, 1)
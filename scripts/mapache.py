@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the Mapache skill lifecycle scripts.
+
+Each subcommand is the `main(argv)` of an existing script, imported only
+when that subcommand runs, so `mapache version` never pays for the deploy
+or validation machinery.
+
+`mapache serve` keeps one interpreter alive with the scripts already
+imported and runs commands sent to it as JSON lines, either over
+stdin/stdout or a Unix socket. Watchers and editor integrations can then
+run an operation without paying for interpreter start-up and imports each
+time.
+
+Usage:
+    python mapache.py sync --dry-run
+    python mapache.py validate --all --format json
+    python mapache.py serve --socket /tmp/mapache.sock
+    python mapache.py --connect /tmp/mapache.sock sync n8n-flow-builder
+
+Protocol (one JSON object per line each way):
+    -> {"id": 1, "argv": ["sync", "--dry-run"], "cwd": "/path/optional"}
+    <- {"id": 1, "exit_code": 0, "stdout": "...", "stderr": "...", "ms": 4.2}
+"""
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+
+# subcommand -> (module, help)
+COMMANDS = {
+    "create": ("create_skill", "Scaffold a new skill from templates"),
+    "validate": ("validate_skill", "Validate one skill or the whole tree"),
+    "deploy": ("deploy_skill", "Deploy skills to agent targets"),
+    "sync": ("sync_skills", "Sync changed skills to installed agents"),
+    "version": ("version_skill", "Bump a skill's version"),
+    "watch": ("watch_skills", "Watch skills/ and sync on change"),
+    "package": ("package_skill", "Build reproducible upload archives"),
+    "search": ("search_skills", "List and search skills"),
+    "upstream": ("check_upstream", "Check add-skill for upstream changes"),
+    "graph": ("skill_graph", "Check skill dependencies and deploy waves"),
+    "tokens": ("token_cost", "Report each skill's context cost in tokens"),
+    "scan": ("security_scan", "Scan skills for secrets and risky code"),
+    "sections": ("section_index", "Index SKILL.md sections and load them on demand"),
+}
+
+# Commands that never return, so a server cannot run them for a client
+LONG_RUNNING = {"watch", "serve"}
+
+
+def load_command(name: str):
+    """Import a subcommand's module on first use and return its main(argv)."""
+    return importlib.import_module(COMMANDS[name][0]).main
+
+
+def exit_code(code) -> int:
+    """Translate a SystemExit code the way the interpreter would."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def run_command(argv) -> int:
+    """Run `<command> [args...]` in this process and return its exit code."""
+    name, args = argv[0], list(argv[1:])
+    if name not in COMMANDS:
+        print(f"❌ Unknown command '{name}' (choose from {', '.join(COMMANDS)})", file=sys.stderr)
+        return 2
+    main = load_command(name)
+    saved_argv = sys.argv
+    sys.argv = [f"mapache {name}"] + args
+    try:
+        main(args)
+    except SystemExit as e:
+        return exit_code(e.code)
+    finally:
+        sys.argv = saved_argv
+    return 0
+
+
+class CommandServer:
+    """Runs client requests one at a time in this process, capturing their output."""
+
+    def __init__(self):
+        # Commands print to sys.stdout and may chdir, both process-wide, so requests are serialised
+        self.lock = threading.Lock()
+
+    def preload(self):
+        """Import every non-long-running command up front so the first request is fast too."""
+        for name in COMMANDS:
+            if name in LONG_RUNNING:
+                continue
+            try:
+                load_command(name)
+            except ImportError as e:
+                print(f"⚠️ Warning: '{name}' unavailable: {e}", file=sys.stderr)
+
+    def handle(self, request: dict) -> dict:
+        response = {"id": request.get("id")}
+        argv = request.get("argv")
+        if not isinstance(argv, list) or not argv or not all(isinstance(a, str) for a in argv):
+            return dict(response, exit_code=2, stdout="", stderr="'argv' must be a non-empty list of strings", ms=0.0)
+        if argv[0] in LONG_RUNNING:
+            return dict(response, exit_code=2, stdout="", stderr=f"'{argv[0]}' cannot run inside the server", ms=0.0)
+
+        out, err = io.StringIO(), io.StringIO()
+        with self.lock:
+            cwd = os.getcwd()
+            start = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                    if request.get("cwd"):
+                        os.chdir(request["cwd"])
+                    code = run_command(argv)
+            except Exception:
+                err.write(traceback.format_exc())
+                code = 1
+            finally:
+                os.chdir(cwd)
+            elapsed = time.perf_counter() - start
+        return dict(response, exit_code=code, stdout=out.getvalue(), stderr=err.getvalue(),
+                    ms=round(elapsed * 1000, 3))
+
+    def handle_line(self, line: str) -> str:
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            response = {"id": None, "exit_code": 2, "stdout": "", "stderr": f"Bad request: {e}", "ms": 0.0}
+        else:
+            response = self.handle(request)
+        return json.dumps(response) + "\n"
+
+    def serve_stdio(self, stdin=None, stdout=None):
+        """Answer requests from stdin until EOF."""
+        stdin = stdin or sys.stdin
+        stdout = stdout or sys.stdout
+        for line in stdin:
+            if line.strip():
+                stdout.write(self.handle_line(line))
+                stdout.flush()
+
+    def serve_socket(self, path: str):
+        """Answer requests on a Unix socket until interrupted."""
+        import socketserver
+
+        server_ref = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw in self.rfile:
+                    line = raw.decode("utf-8")
+                    if line.strip():
+                        self.wfile.write(server_ref.handle_line(line).encode("utf-8"))
+                        self.wfile.flush()
+
+        if os.path.exists(path):
+            os.unlink(path)
+        with socketserver.ThreadingUnixStreamServer(path, Handler) as server:
+            os.chmod(path, 0o600)
+            print(f"🛰️ mapache serving on {path} (Ctrl+C to stop)", file=sys.stderr)
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                os.unlink(path)
+
+
+def serve(argv) -> int:
+    parser = argparse.ArgumentParser(prog='mapache serve',
+                                     description='Run commands for clients from one long-lived process')
+    parser.add_argument('--socket', metavar='PATH',
+                        help='Listen on this Unix socket instead of stdin/stdout')
+    parser.add_argument('--no-preload', action='store_true',
+                        help='Import each command on its first request instead of at start-up')
+    args = parser.parse_args(argv)
+
+    server = CommandServer()
+    if not args.no_preload:
+        server.preload()
+    if args.socket:
+        import socketserver
+
+        if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+            print("❌ Unix sockets are not supported here; use stdin/stdout mode", file=sys.stderr)
+            return 1
+        server.serve_socket(args.socket)
+    else:
+        server.serve_stdio()
+    return 0
+
+
+def connect(path: str, argv) -> int:
+    """Send one command to a running server and replay its output."""
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        request = {"id": 1, "argv": list(argv), "cwd": os.getcwd()}
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        with sock.makefile("r", encoding="utf-8") as f:
+            response = json.loads(f.readline())
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["exit_code"]
+
+
+def main(argv=None):
+    commands = "\n".join(f"  {name:<10} {help_text}" for name, (_, help_text) in COMMANDS.items())
+    parser = argparse.ArgumentParser(
+        prog='mapache',
+        description='Mapache skill lifecycle CLI',
+        epilog=f"commands:\n{commands}\n  {'serve':<10} Run commands for clients from one long-lived process\n\n"
+               "Run 'mapache <command> --help' for a command's options.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument('--connect', metavar='SOCKET',
+                        help='Run the command in a `mapache serve --socket` process instead of locally')
+    parser.add_argument('command', choices=list(COMMANDS) + ['serve'], metavar='command')
+    parser.add_argument('args', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        sys.exit(serve(args.args))
+
+    if args.connect:
+        if args.command in LONG_RUNNING:
+            parser.error(f"'{args.command}' cannot run inside the server")
+        try:
+            sys.exit(connect(args.connect, [args.command] + args.args))
+        except OSError as e:
+            print(f"⚠️ Could not reach server at {args.connect} ({e}); running locally", file=sys.stderr)
+
+    sys.exit(run_command([args.command] + args.args))
+
+
+if __name__ == "__main__":
+    main()
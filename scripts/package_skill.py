@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Package Mapache Skills into reproducible upload archives.
+
+Archives have SKILL.md at the root, entries in sorted order, fixed
+timestamps and permissions, so the same skill content always produces a
+byte-identical zip. The skill's content hash is stored in the zip comment;
+a skill is only re-zipped when that hash no longer matches.
+
+Usage:
+    python package_skill.py n8n-flow-builder
+    python package_skill.py --all
+    python package_skill.py --all --versioned --output-dir dist/
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from skill_hash import HashCache, cache_dir, hash_skill, iter_skill_files
+import tracing
+
+# Earliest timestamp the zip format can represent
+FIXED_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+COMPRESS_LEVEL = 9
+COMMENT_PREFIX = "mapache-skill"
+EXECUTABLE_SUFFIXES = (".py", ".sh")
+
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+
+def archive_comment(skill_name: str, root: str) -> bytes:
+    return f"{COMMENT_PREFIX}:{skill_name}:{root}".encode("ascii")
+
+
+def read_archive_hash(zip_path: Path):
+    """Content hash recorded in an archive built by this script, or None."""
+    try:
+        with zipfile.ZipFile(zip_path) as zf:
+            parts = zf.comment.decode("ascii", "replace").split(":")
+    except (OSError, zipfile.BadZipFile):
+        return None
+    if len(parts) == 3 and parts[0] == COMMENT_PREFIX:
+        return parts[2]
+    return None
+
+
+def archive_name(skill_dir: Path, versioned: bool = False) -> str:
+    """skill-name.zip, or skill-name-vX.Y.Z.zip when a versioned release is requested."""
+    if versioned:
+        meta_path = skill_dir / ".skillmeta"
+        if meta_path.exists():
+            version = json.loads(meta_path.read_text(encoding="utf-8")).get("version")
+            if version:
+                return f"{skill_dir.name}-v{version}.zip"
+    return f"{skill_dir.name}.zip"
+
+
+@tracing.traced("package.build_archive")
+def build_archive(skill_dir: Path, zip_path: Path, root: str):
+    """Write a deterministic archive of skill_dir to zip_path (atomically)."""
+    tmp_path = zip_path.with_name(f".{zip_path.name}.{os.getpid()}.tmp")
+    # SKILL.md first so it sits at the root of the listing, then everything else sorted
+    files = sorted(iter_skill_files(skill_dir), key=lambda item: (item[0] != "SKILL.md", item[0]))
+
+    try:
+        with zipfile.ZipFile(tmp_path, "w") as zf:
+            for rel_path, abs_path in files:
+                info = zipfile.ZipInfo(rel_path, date_time=FIXED_DATE_TIME)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.create_system = 3  # Unix, so external_attr means the same everywhere
+                # Derived from the path, not the filesystem, so Windows and POSIX agree
+                mode = 0o755 if rel_path.endswith(EXECUTABLE_SUFFIXES) else 0o644
+                info.external_attr = (0o100000 | mode) << 16
+                zf.writestr(info, abs_path.read_bytes(), compresslevel=COMPRESS_LEVEL)
+            zf.comment = archive_comment(skill_dir.name, root)
+        os.replace(tmp_path, zip_path)
+    except BaseException:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+
+
+def package_skill(skill_dir: Path, output_dir: Path, hash_cache: HashCache = None,
+                  force: bool = False, versioned: bool = False):
+    """
+    Package one skill if its content changed since the archive was built.
+
+    Returns:
+        (zip_path, status) where status is "built" or "unchanged"
+    """
+    root, _ = hash_skill(skill_dir, hash_cache)
+    zip_path = output_dir / archive_name(skill_dir, versioned)
+
+    if not force and zip_path.exists() and read_archive_hash(zip_path) == root:
+        return zip_path, "unchanged"
+
+    build_archive(skill_dir, zip_path, root)
+    return zip_path, "built"
+
+
+def package_skills(skill_dirs, output_dir: Path, workers: int = DEFAULT_WORKERS,
+                   force: bool = False, versioned: bool = False, repo_root: Path = None):
+    """
+    Package many skills in parallel.
+
+    Returns:
+        List of (skill, zip_path, status, seconds, error)
+    """
+    repo_root = repo_root or Path(__file__).parent.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+    hash_cache = HashCache(cache_dir(repo_root) / "hash-cache.json")
+
+    def run(skill_dir):
+        start = time.perf_counter()
+        try:
+            zip_path, status = package_skill(skill_dir, output_dir, hash_cache, force, versioned)
+            return skill_dir.name, zip_path, status, time.perf_counter() - start, None
+        except Exception as e:
+            return skill_dir.name, None, "failed", time.perf_counter() - start, e
+
+    # zlib releases the GIL while compressing, so threads scale fine here
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        results = list(pool.map(run, skill_dirs))
+
+    hash_cache.save()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Package skills into reproducible zip archives')
+    parser.add_argument('skills', nargs='*', help='Skill names to package')
+    parser.add_argument('--all', action='store_true', help='Package every skill under skills/')
+    parser.add_argument('--output-dir', default=None,
+                        help='Where to write archives (default: repository root)')
+    parser.add_argument('--versioned', action='store_true',
+                        help='Name archives skill-name-vX.Y.Z.zip using .skillmeta')
+    parser.add_argument('--force', action='store_true', help='Rebuild even if content is unchanged')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Parallel packaging jobs (default: {DEFAULT_WORKERS})')
+
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        repo_root = Path(__file__).parent.parent
+        skills_dir = repo_root / "skills"
+
+        if args.all:
+            skill_dirs = sorted(p for p in skills_dir.iterdir() if (p / "SKILL.md").exists())
+        elif args.skills:
+            skill_dirs = [skills_dir / name for name in args.skills]
+            missing = [p.name for p in skill_dirs if not (p / "SKILL.md").exists()]
+            if missing:
+                print(f"❌ Error: Skill(s) not found: {', '.join(missing)}")
+                sys.exit(1)
+        else:
+            parser.error('give skill names or --all')
+
+        output_dir = Path(args.output_dir) if args.output_dir else repo_root
+
+        start = time.perf_counter()
+        results = package_skills(skill_dirs, output_dir, args.workers, args.force, args.versioned, repo_root)
+
+        for skill, zip_path, status, seconds, error in results:
+            if error:
+                print(f"❌ {skill}: {error}")
+            elif status == "built":
+                print(f"📦 {skill} -> {zip_path.name} ({zip_path.stat().st_size} bytes, {seconds * 1000:.1f} ms)")
+            else:
+                print(f"✔️ {skill} unchanged ({zip_path.name})")
+
+        counts = {status: sum(1 for r in results if r[2] == status) for status in ("built", "unchanged", "failed")}
+        print(f"\n✅ {counts['built']} built, {counts['unchanged']} up to date, {counts['failed']} failed "
+              f"in {(time.perf_counter() - start) * 1000:.1f} ms")
+        sys.exit(0 if all(r[4] is None for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+List and search Mapache Skills using the persistent catalog index.
+
+Usage:
+    python search_skills.py github
+    python search_skills.py workflow automation --limit 5 --json
+    python search_skills.py --list --tag n8n
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from catalog import SkillCatalog
+import tracing
+
+
+def print_skills(skills):
+    if not skills:
+        print("ℹ️ No matching skills.")
+        return
+    for skill in skills:
+        version = f" (v{skill['version']})" if skill["version"] else ""
+        flags = " [nosync]" if skill["nosync"] else ""
+        modified = datetime.fromtimestamp(skill["modified_ns"] / 1e9).strftime("%Y-%m-%d")
+        print(f"- **{skill['name']}**{version}{flags} - {skill['description']}")
+        details = [f"Last updated: {modified}"]
+        if skill["tags"]:
+            details.append(f"Tags: {', '.join(skill['tags'])}")
+        if skill["dependencies"]:
+            details.append(f"Depends on: {', '.join(skill['dependencies'])}")
+        print(f"  {' | '.join(details)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='List and search Mapache Skills')
+    parser.add_argument('query', nargs='*', help='Search terms')
+    parser.add_argument('--list', action='store_true', help='List all skills')
+    parser.add_argument('--tag', help='Only list skills with this tag')
+    parser.add_argument('--limit', type=int, default=10, help='Maximum search results (default: 10)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--rebuild', action='store_true', help='Drop and rebuild the catalog index')
+
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        args.query = " ".join(args.query)
+        if not args.query and not args.list and not args.tag:
+            parser.error('give a search query, --list or --tag')
+
+        skills_dir = Path(__file__).parent.parent / "skills"
+
+        start = time.perf_counter()
+        with SkillCatalog(skills_dir) as catalog:
+            if args.rebuild:
+                catalog.conn.executescript("DELETE FROM skills; DELETE FROM skills_fts;")
+            stats = catalog.refresh()
+
+            if args.query:
+                skills = catalog.search(args.query, limit=args.limit, tag=args.tag)
+            else:
+                skills = catalog.list(tag=args.tag)
+        elapsed = time.perf_counter() - start
+
+        if args.json:
+            print(json.dumps(skills, indent=2))
+        else:
+            print_skills(skills)
+            reindexed = stats["added"] + stats["updated"] + stats["removed"]
+            print(f"\n⏱️ {len(skills)} result(s) in {elapsed * 1000:.1f} ms ({reindexed} skill(s) reindexed)")
+
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+"""
+Section index and on-demand loader for large SKILL.md files.
+
+`build` parses a SKILL.md into its heading tree (headings inside fenced
+code blocks are ignored) and records each section's byte offsets, token
+count and term frequencies in a compact sidecar under
+.mapache/sections/, named by the SKILL.md content hash so any identical
+copy (in the repo or deployed into an agent) shares it.
+
+The loader reads the sidecar, then seeks straight to the requested
+sections, so an agent that needs "Retry with Exponential Backoff" pays for
+that section instead of the whole file. Sections can be requested by
+title (or a "Parent > Child" path), or ranked against a query with BM25
+and cut to a token budget. Missing or stale sidecars are rebuilt on the
+fly.
+
+Usage:
+    python section_index.py build
+    python section_index.py toc n8n-flow-builder
+    python section_index.py get n8n-flow-builder "Retry with Exponential Backoff"
+    python section_index.py query mcp-directory "github pull requests" -k 2 --max-tokens 1500
+"""
+
+import argparse
+import difflib
+import json
+import math
+import re
+import sys
+from pathlib import Path
+
+from skill_hash import HashCache, cache_dir, file_digest
+from token_cost import load_tokenizer
+import tracing
+
+INDEX_VERSION = 1
+
+SECTIONS_DIR = "sections"
+
+HEADING_RE = re.compile(rb"^(#{1,6})[ \t]+(.+?)[ \t#]*$")
+FENCE_RE = re.compile(rb"^[ \t]{0,3}(```|~~~)")
+TERM_RE = re.compile(r"\w{2,}")
+
+# Title terms count this many times over body terms when ranking
+TITLE_WEIGHT = 3
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by can do for from has have if in into is it its not of on or so than that the "
+    "their them then there these this to use used using was we when which will with you your".split()
+)
+
+
+def terms(text: str):
+    return [t for t in TERM_RE.findall(text.lower()) if t not in STOP_WORDS]
+
+
+class Section:
+    """One heading: [start, body_end) is its own text, [start, end) includes its subsections."""
+
+    __slots__ = ("index", "level", "title", "start", "body_end", "end", "tokens", "parent", "children")
+
+    def __init__(self, index, level, title, start, body_end, end, tokens, parent):
+        self.index = index
+        self.level = level
+        self.title = title
+        self.start = start
+        self.body_end = body_end
+        self.end = end
+        self.tokens = tokens
+        self.parent = parent
+        self.children = []
+
+    def __repr__(self):
+        return f"Section({self.title!r}, level={self.level}, bytes={self.start}-{self.end})"
+
+
+def parse_headings(data: bytes):
+    """(level, title, byte offset) for every markdown heading outside fenced code."""
+    headings = []
+    offset = 0
+    fence = None
+    for line in data.splitlines(keepends=True):
+        stripped = line.rstrip(b"\r\n")
+        fence_match = FENCE_RE.match(stripped)
+        if fence_match:
+            marker = fence_match.group(1)
+            if fence is None:
+                fence = marker
+            elif marker == fence:
+                fence = None
+        elif fence is None:
+            match = HEADING_RE.match(stripped)
+            if match:
+                title = match.group(2).decode("utf-8", errors="replace").strip()
+                headings.append((len(match.group(1)), title, offset))
+        offset += len(line)
+    return headings
+
+
+@tracing.traced("sections.build")
+def build_index(skill_md: Path, digest: str = None, tokenizer=None):
+    """Parse a SKILL.md into its compact sidecar index (a JSON-ready dict)."""
+    data = skill_md.read_bytes()
+    tokenizer = tokenizer or load_tokenizer()
+    headings = parse_headings(data)
+    size = len(data)
+
+    rows = []
+    term_rows = []
+    stack = []  # indexes of open ancestors
+    for i, (level, title, start) in enumerate(headings):
+        body_end = headings[i + 1][2] if i + 1 < len(headings) else size
+        end = next((h[2] for h in headings[i + 1:] if h[0] <= level), size)
+        while stack and headings[stack[-1]][0] >= level:
+            stack.pop()
+        parent = stack[-1] if stack else -1
+        stack.append(i)
+
+        text = data[start:body_end].decode("utf-8", errors="replace")
+        counts = {}
+        for term in terms(text):
+            counts[term] = counts.get(term, 0) + 1
+        for term in terms(title):
+            counts[term] = counts.get(term, 0) + TITLE_WEIGHT - 1
+        rows.append([level, title, start, body_end, end, tokenizer.count(text), parent])
+        term_rows.append(counts)
+
+    preamble = data[:headings[0][2] if headings else size].decode("utf-8", errors="replace")
+    return {
+        "version": INDEX_VERSION,
+        "digest": digest or file_digest(skill_md),
+        "tokenizer": tokenizer.name,
+        "size": size,
+        "preamble_tokens": tokenizer.count(preamble),
+        "total_tokens": tokenizer.count(data.decode("utf-8", errors="replace")),
+        # [level, title, start, body_end, end, tokens, parent]
+        "sections": rows,
+        "terms": term_rows,
+    }
+
+
+class SectionIndex:
+    """A SKILL.md's heading tree, read from its sidecar, with seek-based section reads."""
+
+    def __init__(self, path: Path, data: dict):
+        self.path = path
+        self.digest = data["digest"]
+        self.size = data["size"]
+        self.tokenizer = data["tokenizer"]
+        self.preamble_tokens = data["preamble_tokens"]
+        self.total_tokens = data["total_tokens"]
+        self.sections = [Section(i, *row) for i, row in enumerate(data["sections"])]
+        self.terms = data["terms"]
+        for section in self.sections:
+            if section.parent >= 0:
+                self.sections[section.parent].children.append(section)
+
+    @property
+    def roots(self):
+        return [s for s in self.sections if s.parent < 0]
+
+    def path_of(self, section: Section) -> str:
+        parts = [section.title]
+        while section.parent >= 0:
+            section = self.sections[section.parent]
+            parts.append(section.title)
+        return " > ".join(reversed(parts))
+
+    def subtree_tokens(self, section: Section) -> int:
+        return section.tokens + sum(self.subtree_tokens(c) for c in section.children)
+
+    def find(self, selector: str) -> Section:
+        """
+        Look a section up by title or "Parent > Child" path (case-insensitive),
+        falling back to a unique substring match.
+
+        Raises:
+            KeyError: If nothing or more than one section matches
+        """
+        wanted = selector.strip().lower()
+        if ">" in wanted:
+            parts = [p.strip() for p in wanted.split(">")]
+            exact = [s for s in self.sections
+                     if [p.lower() for p in self.path_of(s).split(" > ")][-len(parts):] == parts]
+        else:
+            exact = [s for s in self.sections if s.title.lower() == wanted]
+        if len(exact) == 1:
+            return exact[0]
+        if not exact:
+            exact = [s for s in self.sections if wanted in s.title.lower()]
+            if len(exact) == 1:
+                return exact[0]
+        if exact:
+            raise KeyError(f"'{selector}' is ambiguous: {', '.join(self.path_of(s) for s in exact)}")
+        close = difflib.get_close_matches(selector, [s.title for s in self.sections], n=3)
+        hint = f" (did you mean: {', '.join(close)}?)" if close else ""
+        raise KeyError(f"No section '{selector}' in {self.path}{hint}")
+
+    def search(self, query: str, k: int = 3, max_tokens: int = None):
+        """
+        Top sections for a query by BM25 over each section's own text
+        (titles weighted up), optionally cut to a token budget.
+
+        Returns:
+            List of (section, score), best first
+        """
+        query_terms = set(terms(query))
+        if not query_terms or not self.sections:
+            return []
+        lengths = [sum(t.values()) for t in self.terms]
+        avg = sum(lengths) / len(lengths) or 1.0
+        n = len(self.sections)
+        idf = {}
+        for term in query_terms:
+            df = sum(1 for t in self.terms if term in t)
+            idf[term] = math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+        scored = []
+        for section, counts, length in zip(self.sections, self.terms, lengths):
+            score = 0.0
+            for term in query_terms:
+                tf = counts.get(term, 0)
+                if tf:
+                    score += idf[term] * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg))
+            if score > 0:
+                scored.append((section, score))
+        scored.sort(key=lambda item: (-item[1], item[0].index))
+
+        picked = []
+        spent = 0
+        for section, score in scored:
+            if len(picked) == k:
+                break
+            if max_tokens is not None and spent + section.tokens > max_tokens:
+                continue
+            picked.append((section, score))
+            spent += section.tokens
+        return picked
+
+    @tracing.traced("sections.read")
+    def read(self, sections, include_children: bool = True) -> str:
+        """Seek to each section and return their text, in the order given."""
+        parts = []
+        with open(self.path, "rb") as f:
+            for section in sections:
+                end = section.end if include_children else section.body_end
+                f.seek(section.start)
+                parts.append(f.read(end - section.start).decode("utf-8", errors="replace"))
+                tracing.count("sections.bytes_read", end - section.start)
+        return "".join(part if part.endswith("\n") else part + "\n" for part in parts)
+
+
+def sidecar_path(repo_root: Path, digest: str) -> Path:
+    return cache_dir(repo_root) / SECTIONS_DIR / f"{digest}.json"
+
+
+def load_index(skill_md: Path, repo_root: Path = None, hash_cache: HashCache = None, rebuild: bool = False):
+    """
+    The SectionIndex for a SKILL.md, from its sidecar or freshly built.
+
+    The content hash comes from the stat cache, so an unchanged file is not
+    re-read just to find its sidecar.
+    """
+    repo_root = repo_root or Path(__file__).parent.parent
+    own_cache = hash_cache is None
+    hash_cache = hash_cache or HashCache(cache_dir(repo_root) / "hash-cache.json")
+    digest = hash_cache.digest(skill_md)
+    if own_cache:
+        hash_cache.save()
+
+    path = sidecar_path(repo_root, digest)
+    data = None
+    if path.exists() and not rebuild:
+        with tracing.span("sections.load"):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = None
+        if data is not None and data.get("version") != INDEX_VERSION:
+            data = None
+    if data is None:
+        data = build_index(skill_md, digest)
+        write_sidecar(path, data)
+    return SectionIndex(skill_md, data)
+
+
+def write_sidecar(path: Path, data: dict):
+    """Write the sidecar as compact JSON (write_json_atomic pretty-prints, which doubles its size)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False), encoding="utf-8")
+    tmp.replace(path)
+
+
+def build_all(skills_dir: Path, repo_root: Path = None, skills=None, force: bool = False):
+    """
+    Build sidecars for every skill (or the named ones) and drop sidecars no
+    SKILL.md points at any more.
+
+    Returns:
+        {skill: SectionIndex}
+    """
+    repo_root = repo_root or skills_dir.parent
+    hash_cache = HashCache(cache_dir(repo_root) / "hash-cache.json")
+    skill_mds = sorted(p / "SKILL.md" for p in skills_dir.iterdir() if (p / "SKILL.md").exists())
+    if skills is not None:
+        skill_mds = [p for p in skill_mds if p.parent.name in set(skills)]
+
+    indexes = {p.parent.name: load_index(p, repo_root, hash_cache, rebuild=force) for p in skill_mds}
+    hash_cache.save()
+
+    if skills is None:
+        live = {f"{index.digest}.json" for index in indexes.values()}
+        for sidecar in (cache_dir(repo_root) / SECTIONS_DIR).glob("*.json"):
+            if sidecar.name not in live:
+                sidecar.unlink()
+    return indexes
+
+
+def print_toc(index: SectionIndex):
+    print(f"{index.path} ({index.total_tokens} tokens, {index.tokenizer})")
+    if index.preamble_tokens:
+        print(f"   {'(frontmatter and intro)':<56} {index.preamble_tokens:>6}")
+    for section in index.sections:
+        label = "  " * (section.level - 1) + section.title
+        print(f"   {label[:56]:<56} {index.subtree_tokens(section):>6}")
+
+
+def resolve_skill_md(skill: str, skills_dir: Path) -> Path:
+    """A skill name, a skill directory or a SKILL.md path."""
+    path = Path(skill)
+    if path.is_dir():
+        path = path / "SKILL.md"
+    elif not path.exists():
+        path = skills_dir / skill / "SKILL.md"
+    if not path.is_file():
+        raise FileNotFoundError(f"SKILL.md not found for '{skill}'")
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Index SKILL.md sections and load them on demand')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='Build section sidecars for every skill (or the named ones)')
+    build.add_argument('skills', nargs='*')
+    build.add_argument('--force', action='store_true', help='Rebuild sidecars even if they are current')
+
+    toc = commands.add_parser('toc', help="Print a skill's heading tree with token counts")
+    toc.add_argument('skill')
+
+    get = commands.add_parser('get', help='Print the named sections')
+    get.add_argument('skill')
+    get.add_argument('sections', nargs='+', help='Section titles or "Parent > Child" paths')
+    get.add_argument('--no-children', action='store_true', help='Leave out subsections')
+
+    query = commands.add_parser('query', help='Print the sections most relevant to a query')
+    query.add_argument('skill')
+    query.add_argument('query')
+    query.add_argument('-k', type=int, default=3, help='Number of sections (default: 3)')
+    query.add_argument('--max-tokens', type=int, help='Token budget for the returned sections')
+
+    for sub in (build, toc, get, query):
+        tracing.add_arguments(sub)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        repo_root = Path(__file__).parent.parent
+        skills_dir = repo_root / "skills"
+
+        if args.command == 'build':
+            indexes = build_all(skills_dir, repo_root, args.skills or None, args.force)
+            for name, index in indexes.items():
+                print(f"📑 {name:<28} {len(index.sections):>4} sections {index.total_tokens:>7} tokens")
+            print(f"\n✅ Indexed {len(indexes)} skill(s)")
+            return
+
+        try:
+            index = load_index(resolve_skill_md(args.skill, skills_dir), repo_root)
+        except FileNotFoundError as e:
+            print(f"❌ Error: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        if args.command == 'toc':
+            print_toc(index)
+            return
+
+        if args.command == 'get':
+            try:
+                sections = [index.find(s) for s in args.sections]
+            except KeyError as e:
+                print(f"❌ Error: {e.args[0]}", file=sys.stderr)
+                sys.exit(1)
+            sys.stdout.write(index.read(sections, include_children=not args.no_children))
+            return
+
+        results = index.search(args.query, args.k, args.max_tokens)
+        if not results:
+            print(f"ℹ️ No section of {args.skill} matches '{args.query}'", file=sys.stderr)
+            sys.exit(1)
+        for section, score in results:
+            print(f"<!-- {index.path_of(section)} (score {score:.2f}, {section.tokens} tokens) -->",
+                  file=sys.stderr)
+        # Ranked hits are returned without their subsections, which rank on their own
+        sys.stdout.write(index.read([s for s, _ in results], include_children=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Scan Mapache Skills for secrets, dangerous shell, network egress and
+shell-spawning code.
+
+Every rule is compiled into one matcher: fixed strings go into an
+Aho-Corasick automaton alongside literal triggers named by each pattern
+rule. A file is streamed line by line through the automaton once, and a
+pattern only runs on the few lines where one of its triggers fired. Patterns
+run separately so that overlapping matches are all reported; a known secret
+format wins over the generic hard-coded credential rule. Findings are
+cached under the repository's .mapache/ by file content hash, and uncached
+files are scanned in a process pool when there are enough of them to pay
+for one.
+
+Secret and destructive-shell rules apply to every text file. Code rules
+(`shell=True`, `os.system`, `eval`, network calls and URLs) apply to
+scripts only. URLs on hosts listed in the skill's .skillmeta
+"allowed_domains" are accepted, and declaring "allowed_domains" at all
+marks the skill's network access as reviewed. Add `nosec` to a line to
+silence it.
+
+Usage:
+    python security_scan.py
+    python security_scan.py exa-grounding --format json
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import deque
+from pathlib import Path
+
+from skill_hash import DigestCache, HashCache, cache_dir, hash_skill
+import tracing
+
+# Bump whenever rules change so cached findings from older rules are discarded
+SCANNER_VERSION = 2
+
+CODE_SUFFIXES = {".py", ".sh", ".bash", ".zsh", ".js", ".mjs", ".cjs", ".ts", ".ps1", ".rb", ".pl", ".php"}
+
+# Hosts that only ever appear as placeholders or local endpoints
+DEFAULT_ALLOWED_HOSTS = {"localhost", "127.0.0.1", "0.0.0.0", "example.com", "example.org", "example.net"}
+
+SUPPRESS_MARKER = "nosec"
+
+# Below this many bytes to scan, a process pool costs more than it saves
+PARALLEL_MIN_BYTES = 1024 * 1024
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+_IDENT = set("abcdefghijklmnopqrstuvwxyz0123456789_")
+
+
+class Rule:
+    """
+    One check: a fixed `literal` (matched case-insensitively) or a regex
+    `pattern`, which only runs on lines containing one of its lowercase
+    `triggers`.
+    """
+
+    __slots__ = ("id", "severity", "scope", "message", "literal", "pattern", "triggers")
+
+    def __init__(self, id: str, severity: str, scope: str, message: str, literal: str = None,
+                 pattern: str = None, triggers=()):
+        self.id = id
+        self.severity = severity  # "error" or "warning"
+        self.scope = scope        # "all" files or "code" only
+        self.message = message
+        self.literal = literal
+        self.pattern = pattern
+        self.triggers = triggers
+
+
+RULES = [
+    # Secrets
+    Rule("secret.aws-key", "error", "all", "AWS access key",
+         pattern=r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b", triggers=("akia", "asia")),
+    Rule("secret.github-token", "error", "all", "GitHub token",
+         pattern=r"\b(?:gh[pousr]_[A-Za-z0-9]{36,}|github_pat_[A-Za-z0-9_]{22,})",
+         triggers=("ghp_", "gho_", "ghu_", "ghs_", "ghr_", "github_pat_")),
+    Rule("secret.api-key", "error", "all", "API key (sk-...)",
+         pattern=r"\bsk-(?:ant-|proj-)?[A-Za-z0-9_-]{24,}", triggers=("sk-",)),
+    Rule("secret.slack-token", "error", "all", "Slack token",
+         pattern=r"\bxox[abposr]-[A-Za-z0-9-]{10,}", triggers=("xox",)),
+    Rule("secret.private-key", "error", "all", "Private key block",
+         pattern=r"-----BEGIN (?:[A-Z0-9]+ )*PRIVATE KEY-----", triggers=("private key-----",)),
+    Rule("secret.assignment", "warning", "all", "Hard-coded credential",
+         pattern=r"(?i:\b(?:api[_-]?key|secret[_-]?key|client[_-]?secret|password|passwd|access[_-]?token"
+                 r"|auth[_-]?token)\b[\"']?\s*[:=]\s*[\"'][^\"'\s]{12,}[\"'])",
+         triggers=("key", "secret", "passw", "token")),
+    # Destructive shell
+    Rule("shell.rm-root", "error", "all", "Recursive delete of /, ~ or $HOME",
+         pattern=r"\brm\s+-[A-Za-z]*(?:rf|fr)[A-Za-z]*\s+(?:--no-preserve-root\s+)?(?:/|~/?|\$HOME/?)(?=[\s\"'*]|$)",
+         triggers=("rm ", "rm\t")),
+    Rule("shell.pipe-to-shell", "error", "all", "Download piped into a shell",
+         pattern=r"\b(?:curl|wget)\b[^|\n]*\|\s*(?:sudo\s+)?(?:ba|z|da)?sh\b", triggers=("curl", "wget")),
+    Rule("shell.disk-write", "error", "all", "Raw write to a disk device",
+         pattern=r"\bdd\b[^\n]*\bof=/dev/(?:sd|hd|nvme|disk|mmcblk)", triggers=("of=/dev/",)),
+    Rule("shell.fork-bomb", "error", "all", "Fork bomb", literal=":(){ :|:& };:"),
+    Rule("shell.mkfs", "error", "all", "Filesystem format", literal="mkfs."),
+    Rule("shell.chmod-777", "warning", "all", "World-writable permissions", literal="chmod 777"),
+    Rule("shell.chmod-777", "warning", "all", "World-writable permissions", literal="chmod -r 777"),
+    # Code that spawns a shell or evaluates strings
+    Rule("code.shell-true", "warning", "code", "subprocess with shell=True",
+         pattern=r"\bshell\s*=\s*True\b", triggers=("shell",)),
+    Rule("code.os-system", "warning", "code", "os.system runs through the shell", literal="os.system("),
+    Rule("code.os-system", "warning", "code", "os.popen runs through the shell", literal="os.popen("),
+    Rule("code.child-process", "warning", "code", "Node child_process", literal="child_process"),
+    Rule("code.eval", "warning", "code", "eval() of dynamic code", literal="eval("),
+    Rule("code.eval", "warning", "code", "exec() of dynamic code", literal="exec("),
+    # Network egress
+    Rule("net.url", "warning", "code", "URL outside allowed_domains",
+         pattern=r"\b(?:https?|wss?|ftp)://[A-Za-z0-9.-]+", triggers=("://",)),
+] + [
+    Rule("net.call", "warning", "code", "Network call; declare allowed_domains in .skillmeta", literal=literal)
+    for literal in ("urllib.request", "http.client", "requests.get(", "requests.post(", "requests.put(",
+                    "requests.patch(", "requests.delete(", "requests.request(", "httpx.", "aiohttp.",
+                    "socket.socket(", "await fetch(", "curl ", "wget ", "invoke-webrequest", "invoke-restmethod")
+]
+
+_PLACEHOLDER_RE = re.compile(r"your|xxx|example|changeme|placeholder|<|\$\{|\{\{|\*\*\*", re.IGNORECASE)
+_HOST_RE = re.compile(r"://([A-Za-z0-9.-]+)")
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over lowercase keywords.
+
+    Failure links are folded into a complete transition table when it is
+    built, so matching costs one dict lookup per character.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        goto = [{}]
+        out = [[]]
+        for index, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(index)
+
+        fail = [0] * len(goto)
+        delta = [dict(g) for g in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # fail[state] is shallower, so its row and outputs are already complete
+            for ch, target in delta[fail[state]].items():
+                delta[state].setdefault(ch, target)
+            out[state] = out[state] + out[fail[state]]
+            for ch, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(ch, 0) if state else 0
+                queue.append(child)
+        self.delta = delta
+        self.out = out
+
+    def finditer(self, text: str):
+        """Yield (keyword index, start offset) for every keyword occurrence in text."""
+        delta, out, keywords = self.delta, self.out, self.keywords
+        state = 0
+        for i, ch in enumerate(text):
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                for index in out[state]:
+                    yield index, i - len(keywords[index]) + 1
+
+
+class Matcher:
+    """All rules compiled for one scope: one automaton plus a regex per pattern rule."""
+
+    def __init__(self, rules):
+        self.pattern_rules = [r for r in rules if r.pattern]
+        self.patterns = [re.compile(r.pattern) for r in self.pattern_rules]
+        # Automaton keyword i reports literal_rules[i], or arms the pattern rules in armed_by[i] when that is None
+        keywords = [r.literal.lower() for r in rules if r.literal]
+        self.literal_rules = [r for r in rules if r.literal]
+        self.armed_by = [()] * len(keywords)
+        triggers = sorted({t for r in self.pattern_rules for t in r.triggers})
+        keywords += triggers
+        self.literal_rules += [None] * len(triggers)
+        self.armed_by += [tuple(i for i, r in enumerate(self.pattern_rules) if t in r.triggers) for t in triggers]
+        self.automaton = KeywordAutomaton(keywords)
+
+    def scan_line(self, line: str, lineno: int):
+        """Findings on one line as (rule id, severity, line, column, message, excerpt)."""
+        lowered = line.lower()
+        if SUPPRESS_MARKER in lowered:
+            return []
+        found = []
+        armed = set()
+        for index, start in self.automaton.finditer(lowered):
+            rule = self.literal_rules[index]
+            if rule is None:
+                armed.update(self.armed_by[index])
+                continue
+            # Keywords that start like an identifier must not match mid-identifier, e.g. literal_eval(
+            if rule.literal[0].lower() in _IDENT and start and lowered[start - 1] in _IDENT:
+                continue
+            found.append((rule.id, rule.severity, lineno, start + 1, rule.message, rule.literal.strip()))
+        if not armed:
+            return found
+        secrets, assignments = [], []
+        for i in sorted(armed):
+            rule = self.pattern_rules[i]
+            for match in self.patterns[i].finditer(line):
+                if rule.id == "secret.assignment":
+                    if not _PLACEHOLDER_RE.search(match.group()):
+                        assignments.append((rule, match))
+                    continue
+                if rule.id.startswith("secret."):
+                    secrets.append(match.span())
+                found.append(_pattern_finding(rule, match, lineno))
+        # A recognised secret format is reported instead of the generic assignment that contains it
+        for rule, match in assignments:
+            if not any(start < match.end() and match.start() < end for start, end in secrets):
+                found.append(_pattern_finding(rule, match, lineno))
+        found.sort(key=lambda f: f[3])
+        return found
+
+
+def _pattern_finding(rule: Rule, match, lineno: int):
+    text = match.group()
+    if rule.id.startswith("secret."):
+        excerpt = f"{text[:4]}…"  # never copy the secret itself into reports or caches
+    elif rule.id == "net.url":
+        excerpt = _HOST_RE.search(text).group(1).lower()
+    else:
+        excerpt = text[:80]
+    return (rule.id, rule.severity, lineno, match.start() + 1, rule.message, excerpt)
+
+
+MATCHERS = {
+    "code": Matcher(RULES),
+    "text": Matcher([r for r in RULES if r.scope == "all"]),
+}
+
+
+def file_scope(path: Path) -> str:
+    return "code" if path.suffix.lower() in CODE_SUFFIXES else "text"
+
+
+def scan_file(path, scope: str = None):
+    """
+    Stream one file through its scope's matcher.
+
+    Returns:
+        List of (rule id, severity, line, column, message, excerpt); binary
+        files yield nothing
+    """
+    path = Path(path)
+    matcher = MATCHERS[scope or file_scope(path)]
+    findings = []
+    with open(path, "rb") as f:
+        if b"\0" in f.read(8192):
+            return findings
+        f.seek(0)
+        for lineno, raw in enumerate(f, start=1):
+            findings.extend(matcher.scan_line(raw.decode("utf-8", errors="replace"), lineno))
+    return findings
+
+
+def _scan_job(args):
+    """scan_file for a worker process."""
+    path, scope = args
+    return scan_file(path, scope)
+
+
+def load_policy(skill_dir: Path):
+    """The skill's declared network allowlist, or None if it declares none."""
+    meta_path = skill_dir / ".skillmeta"
+    if not meta_path.exists():
+        return None
+    try:
+        domains = json.loads(meta_path.read_text(encoding="utf-8")).get("allowed_domains")
+    except (OSError, ValueError):
+        return None
+    return [str(d).lower() for d in domains] if isinstance(domains, list) else None
+
+
+def _host_allowed(host: str, allowed) -> bool:
+    return any(host == d or host.endswith(f".{d}") for d in allowed)
+
+
+def apply_policy(findings, allowed_domains):
+    """Drop network findings the skill's allowed_domains cover."""
+    allowed = DEFAULT_ALLOWED_HOSTS | set(allowed_domains or ())
+    kept = []
+    for finding in findings:
+        rule_id, excerpt = finding[0], finding[5]
+        if rule_id == "net.url" and _host_allowed(excerpt, allowed):
+            continue
+        if rule_id == "net.call" and allowed_domains is not None:
+            continue
+        kept.append(finding)
+    return kept
+
+
+def scan_skills(skill_dirs, workers: int = DEFAULT_WORKERS, use_cache: bool = True, repo_root: Path = None):
+    """
+    Scan every file of the given skills.
+
+    Findings are cached under repo_root's .mapache/; without a repo_root
+    nothing is cached, so scanning a skill never writes next to it.
+
+    Returns:
+        {skill: [(relpath, rule id, severity, line, column, message, excerpt), ...]}
+    """
+    skill_dirs = list(skill_dirs)
+    if not skill_dirs:
+        return {}
+    hash_cache = HashCache(cache_dir(repo_root) / "hash-cache.json" if repo_root is not None else None)
+    cache = DigestCache(cache_dir(repo_root) / "scan-cache.json" if use_cache and repo_root is not None else None)
+
+    with tracing.span("scan.hash", skills=len(skill_dirs)):
+        digests = {p: hash_skill(p, hash_cache)[1] for p in skill_dirs}
+        hash_cache.save()
+
+    namespace = lambda scope: f"scan{SCANNER_VERSION}-{scope}"
+    missing = {}
+    for skill_dir, files in digests.items():
+        for rel_path, digest in files.items():
+            scope = file_scope(Path(rel_path))
+            if cache.get(namespace(scope), digest) is None:
+                missing.setdefault((scope, digest), skill_dir / rel_path)
+
+    with tracing.span("scan.files", files=len(missing)):
+        jobs = [(str(path), scope) for (scope, _), path in missing.items()]
+        miss_bytes = sum(path.stat().st_size for path in missing.values())
+        if workers > 1 and len(jobs) > 1 and miss_bytes >= PARALLEL_MIN_BYTES:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                scanned = list(pool.map(_scan_job, jobs, chunksize=8))
+        else:
+            scanned = [_scan_job(job) for job in jobs]
+        for (scope, digest), findings in zip(missing, scanned):
+            cache.put(namespace(scope), digest, [list(f) for f in findings])
+        tracing.count("scan.files_scanned", len(jobs))
+        tracing.count("scan.bytes_scanned", miss_bytes)
+
+    results = {}
+    for skill_dir, files in digests.items():
+        policy = load_policy(skill_dir)
+        findings = []
+        for rel_path, digest in files.items():
+            cached = cache.get(namespace(file_scope(Path(rel_path))), digest)
+            findings.extend((rel_path, *f) for f in apply_policy(map(tuple, cached), policy))
+        results[skill_dir.name] = findings
+
+    cache.save()
+    return results
+
+
+def format_finding(finding) -> str:
+    rel_path, rule_id, _, line, column, message, excerpt = finding
+    return f"{rel_path}:{line}:{column}: {message} [{rule_id}] {excerpt}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Scan skills for secrets, dangerous shell and network egress')
+    parser.add_argument('skills', nargs='*', help='Only scan these skills (default: all)')
+    parser.add_argument('--format', choices=['text', 'json'], default='text', help='Report format')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Worker processes for large uncached trees (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--no-cache', action='store_true', help='Re-scan every file')
+
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        skills_dir = Path(__file__).parent.parent / "skills"
+        skill_dirs = sorted(p for p in skills_dir.iterdir() if p.is_dir() and (p / "SKILL.md").exists())
+        if args.skills:
+            missing = [s for s in args.skills if not (skills_dir / s / "SKILL.md").exists()]
+            if missing:
+                print(f"❌ Error: Skill not found: {', '.join(missing)}")
+                sys.exit(1)
+            skill_dirs = [p for p in skill_dirs if p.name in args.skills]
+
+        results = scan_skills(skill_dirs, workers=args.workers, use_cache=not args.no_cache,
+                              repo_root=skills_dir.parent)
+        errors = sum(1 for findings in results.values() for f in findings if f[2] == "error")
+
+        if args.format == 'json':
+            keys = ("file", "rule", "severity", "line", "column", "message", "excerpt")
+            print(json.dumps({
+                "scanner_version": SCANNER_VERSION,
+                "skills": {skill: [dict(zip(keys, f)) for f in findings] for skill, findings in results.items()},
+            }, indent=2))
+        else:
+            for skill, findings in results.items():
+                if not findings:
+                    continue
+                print(f"🔍 {skill}")
+                for finding in findings:
+                    icon = "❌" if finding[2] == "error" else "⚠️"
+                    print(f"   {icon} {format_finding(finding)}")
+            total = sum(map(len, results.values()))
+            print(f"\n{'❌' if errors else '✅'} {len(results)} skill(s) scanned: "
+                  f"{errors} error(s), {total - errors} warning(s)")
+
+        sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
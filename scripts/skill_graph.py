@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Dependency graph of Mapache Skills, read from each skill's `.skillmeta`.
+
+    "dependencies": ["skill-manager", {"name": "n8n-flow-builder"}]
+
+The graph reports dependency cycles and dependencies on skills that do not
+exist. `affected()` gives the skills to redeploy when some change (the
+skills themselves plus everything that transitively depends on them), and
+`waves()` groups skills into topological waves: every skill's dependencies
+sit in an earlier wave, so each wave can be deployed in parallel.
+
+Usage:
+    python skill_graph.py --check
+    python skill_graph.py --waves
+    python skill_graph.py --affected skill-manager
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+import tracing
+
+
+class GraphError(ValueError):
+    """The dependency graph cannot be ordered (it has a cycle)."""
+
+
+def _dependency_name(entry):
+    if isinstance(entry, dict):
+        return entry.get("name")
+    return entry if isinstance(entry, str) else None
+
+
+class SkillGraph:
+    def __init__(self, deps: dict):
+        """
+        Args:
+            deps: {skill: [dependency names]}
+        """
+        self.deps = {skill: list(dict.fromkeys(names)) for skill, names in deps.items()}
+        self.missing = {}
+        self.dependents = {skill: set() for skill in self.deps}
+        for skill, names in self.deps.items():
+            for dep in names:
+                if dep in self.dependents:
+                    self.dependents[dep].add(skill)
+                else:
+                    self.missing.setdefault(skill, []).append(dep)
+
+    @classmethod
+    def load(cls, skills_dir: Path):
+        """Build the graph from every skill (directory with a SKILL.md) under skills_dir."""
+        deps = {}
+        with tracing.span("graph.load"):
+            for skill_dir in sorted(p for p in skills_dir.iterdir() if (p / "SKILL.md").exists()):
+                names = []
+                meta_path = skill_dir / ".skillmeta"
+                if meta_path.exists():
+                    try:
+                        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                    except (OSError, ValueError) as e:
+                        print(f"⚠️ Warning: Ignoring unreadable {meta_path}: {e}")
+                        meta = {}
+                    names = [n for n in map(_dependency_name, meta.get("dependencies") or []) if n]
+                deps[skill_dir.name] = names
+        return cls(deps)
+
+    def cycles(self):
+        """Strongly connected components that form cycles (Tarjan), each as a sorted list."""
+        index = {}
+        low = {}
+        stack, on_stack = [], set()
+        found = []
+        counter = 0
+
+        for root in sorted(self.deps):
+            if root in index:
+                continue
+            # Iterative DFS so deep chains do not hit the recursion limit
+            work = [(root, iter(self.deps[root]))]
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in self.deps:
+                        continue
+                    if child not in index:
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(self.deps[child])))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        low[node] = min(low[node], index[child])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in self.deps[node]:
+                        found.append(sorted(component))
+        return sorted(found)
+
+    def problems(self):
+        """Human-readable cycle and missing-dependency errors (empty when the graph is sound)."""
+        errors = [f"Dependency cycle: {' -> '.join(cycle + cycle[:1])}" for cycle in self.cycles()]
+        for skill, names in sorted(self.missing.items()):
+            errors.append(f"{skill} depends on missing skill(s): {', '.join(names)}")
+        return errors
+
+    def affected(self, changed):
+        """The changed skills plus every skill that depends on them, directly or not."""
+        seen = set()
+        todo = [s for s in changed if s in self.deps]
+        while todo:
+            skill = todo.pop()
+            if skill in seen:
+                continue
+            seen.add(skill)
+            todo.extend(self.dependents[skill] - seen)
+        return seen
+
+    def waves(self, skills=None):
+        """
+        Topological waves (Kahn's algorithm), each a sorted list.
+
+        Only `skills` are placed (default: all); dependencies outside that set
+        are treated as already satisfied, and names the graph does not know
+        land in the first wave so callers never silently drop work.
+
+        Raises:
+            GraphError: If the skills to place contain a cycle
+        """
+        selected = set(self.deps if skills is None else skills)
+        remaining = {s: {d for d in self.deps.get(s, ()) if d in selected and d != s} for s in selected}
+        self_loops = sorted(s for s in selected if s in self.deps.get(s, ()))
+        if self_loops:
+            raise GraphError(f"Dependency cycle: {', '.join(f'{s} -> {s}' for s in self_loops)}")
+
+        waves = []
+        while remaining:
+            ready = sorted(s for s, pending in remaining.items() if not pending)
+            if not ready:
+                blocked = sorted(remaining)
+                raise GraphError(f"Dependency cycle among: {', '.join(blocked)}")
+            waves.append(ready)
+            for skill in ready:
+                del remaining[skill]
+            for pending in remaining.values():
+                pending.difference_update(ready)
+        return waves
+
+    def blocked_by(self, skill, failed):
+        """The direct dependencies of `skill` that are in the `failed` set."""
+        return sorted(d for d in self.deps.get(skill, ()) if d in failed)
+
+
+def plan_waves(graph, skills):
+    """
+    Deploy waves for `skills`, or a single wave when there is no graph or it
+    has a cycle (with a warning), so a bad .skillmeta never blocks a deploy.
+    """
+    skills = list(skills)
+    if graph is None:
+        return [skills] if skills else []
+    try:
+        return graph.waves(skills)
+    except GraphError as e:
+        print(f"⚠️ Warning: {e}; ignoring dependency order")
+        return [sorted(skills)] if skills else []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Inspect the skill dependency graph')
+    parser.add_argument('--check', action='store_true', help='Fail on cycles or missing dependencies')
+    parser.add_argument('--waves', action='store_true', help='Print the topological deploy waves')
+    parser.add_argument('--affected', nargs='+', metavar='SKILL',
+                        help='Print the skills to redeploy when these change, in waves')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        skills_dir = Path(__file__).parent.parent / "skills"
+        graph = SkillGraph.load(skills_dir)
+        problems = graph.problems()
+
+        waves = None
+        if args.affected or args.waves or not args.check:
+            scope = graph.affected(args.affected) if args.affected else None
+            try:
+                waves = graph.waves(scope)
+            except GraphError as e:
+                problems.append(str(e))
+
+        if args.json:
+            print(json.dumps({"problems": problems, "waves": waves}, indent=2))
+        else:
+            for problem in problems:
+                print(f"❌ {problem}")
+            for i, wave in enumerate(waves or [], start=1):
+                print(f"🌊 Wave {i}: {', '.join(wave)}")
+            if not problems:
+                print(f"✅ {len(graph.deps)} skill(s), no cycles or missing dependencies")
+
+        sys.exit(1 if problems and (args.check or waves is None) else 0)
+
+
+if __name__ == "__main__":
+    main()
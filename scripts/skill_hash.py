@@ -0,0 +1,160 @@
+"""
+Content hashing for Mapache Skills.
+
+Every file in a skill is hashed with SHA-256 and the sorted (path, hash)
+leaves are folded into a single Merkle root per skill. A stat cache
+(size + mtime) under .mapache/ lets repeated runs skip re-reading files
+that have not been touched.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+
+from tracing import count, span
+
+CACHE_DIR_NAME = ".mapache"
+
+# Files that never belong in an installed/deployed skill.
+IGNORED_NAMES = {"__pycache__", ".DS_Store"}
+IGNORED_SUFFIXES = (".pyc", ".pyo")
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def cache_dir(repo_root: Path) -> Path:
+    """Return (and create) the repo-local cache directory."""
+    path = repo_root / CACHE_DIR_NAME
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file, streamed so large resources stay out of memory."""
+    h = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(block)
+            size += len(block)
+    count("hash.files_read")
+    count("hash.bytes_read", size)
+    return h.hexdigest()
+
+
+def iter_skill_files(skill_dir: Path):
+    """Yield (relative posix path, absolute path) for every file in a skill, sorted."""
+    found = []
+    for root, dirs, files in os.walk(skill_dir):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORED_NAMES)
+        for name in files:
+            if name in IGNORED_NAMES or name.endswith(IGNORED_SUFFIXES):
+                continue
+            abs_path = Path(root) / name
+            found.append((abs_path.relative_to(skill_dir).as_posix(), abs_path))
+    found.sort()
+    return found
+
+
+def merkle_root(files: dict) -> str:
+    """Fold {relpath: digest} leaves into one root hash (order independent of walk order)."""
+    h = hashlib.sha256()
+    for rel_path in sorted(files):
+        h.update(rel_path.encode("utf-8"))
+        h.update(b"\0")
+        h.update(files[rel_path].encode("ascii"))
+        h.update(b"\n")
+    return h.hexdigest()
+
+
+class HashCache:
+    """Persistent {path: (size, mtime_ns, digest)} cache so unchanged files are not re-read."""
+
+    def __init__(self, path: Path = None):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        if path is not None and path.exists():
+            try:
+                self.entries = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def digest(self, path: Path) -> str:
+        st = path.stat()
+        key = str(path)
+        cached = self.entries.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            count("hash.stat_hits")
+            return cached[2]
+
+        digest = file_digest(path)
+        with self._lock:
+            self.entries[key] = [st.st_size, st.st_mtime_ns, digest]
+            self.dirty = True
+        return digest
+
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+        write_json_atomic(self.path, self.entries)
+        self.dirty = False
+
+
+class DigestCache:
+    """Persistent {"<namespace>:<sha256>": result} store for results derived from file contents."""
+
+    def __init__(self, path: Path = None):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        if path is not None and path.exists():
+            try:
+                self.entries = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, namespace: str, digest: str):
+        return self.entries.get(f"{namespace}:{digest}")
+
+    def put(self, namespace: str, digest: str, result):
+        self.entries[f"{namespace}:{digest}"] = result
+        self.dirty = True
+
+    def prune(self, namespace: str, live_digests: set):
+        """Drop a namespace's results for content that no longer exists anywhere in the tree."""
+        prefix = f"{namespace}:"
+        stale = [k for k in self.entries if k.startswith(prefix) and k[len(prefix):] not in live_digests]
+        for key in stale:
+            del self.entries[key]
+        self.dirty = self.dirty or bool(stale)
+
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+        write_json_atomic(self.path, self.entries)
+        self.dirty = False
+
+
+def hash_skill(skill_dir: Path, cache: HashCache = None):
+    """
+    Hash every file in a skill.
+
+    Returns:
+        (root, files) where files is {relpath: sha256}
+    """
+    cache = cache or HashCache()
+    with span("hash.skill", skill=skill_dir.name):
+        files = {rel: cache.digest(abs_path) for rel, abs_path in iter_skill_files(skill_dir)}
+        return merkle_root(files), files
+
+
+def write_json_atomic(path: Path, data):
+    """Write JSON next to path and rename over it so readers never see half a file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
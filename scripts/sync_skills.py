@@ -2,66 +2,447 @@
 """
 Sync local Mapache Skills to all detected coding agents globally.
 Respects 'nosync: true' in SKILL.md YAML frontmatter.
+
+Skills are copied straight into each agent's global skills directory (see
+targets.py for the registry of agents and configured directories) using a
+bounded worker pool. Each target keeps a manifest of per-file hashes and a
+per-skill Merkle root, so only skills that changed since the last sync are
+installed, updated or removed. `npx add-skill` is still available via --npx
+for agents we do not know how to install into natively.
+
+Changes are applied in topological waves of the `.skillmeta` dependency
+graph (see skill_graph.py), and skills that depend on a changed skill are
+re-synced with it, so changing a base skill also refreshes its dependents,
+after it, on every target.
+
+Usage:
+    python sync_skills.py
+    python sync_skills.py n8n-flow-builder skill-manager --workers 4
+    python sync_skills.py --target /tmp/agent-skills
+    python sync_skills.py --dry-run
+    python sync_skills.py --npx
 """
 
+import argparse
+import json
 import os
 import sys
+import shutil
 import subprocess
-import yaml
-import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from frontmatter import read_frontmatter
+from skill_graph import SkillGraph, plan_waves
+from skill_hash import HashCache, cache_dir, hash_skill, write_json_atomic
+from targets import installed_targets
+import tracing
+
+# Written into each target directory; records what the last sync installed there.
+MANIFEST_NAME = ".mapache-manifest.json"
+MANIFEST_VERSION = 1
+
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+IGNORE_PATTERNS = shutil.ignore_patterns("__pycache__", "*.pyc", ".DS_Store")
+
+
 def get_nosync_skills(skills_dir: Path):
     """Scan skills for 'nosync: true' in frontmatter."""
     nosync_skills = []
-    
+
     for skill_path in skills_dir.iterdir():
         if not skill_path.is_dir():
             continue
-            
+
         skill_md = skill_path / "SKILL.md"
         if not skill_md.exists():
             continue
-            
+
         try:
-            content = skill_md.read_text(encoding='utf-8')
-            if content.startswith('---'):
-                parts = content.split('---', 2)
-                if len(parts) >= 3:
-                    frontmatter = yaml.safe_load(parts[1])
-                    if frontmatter and frontmatter.get('nosync') is True:
-                        nosync_skills.append(skill_path.name)
+            frontmatter = read_frontmatter(skill_md)
+            if frontmatter is not None and frontmatter.nosync:
+                nosync_skills.append(skill_path.name)
         except Exception as e:
             print(f"⚠️ Warning: Could not parse frontmatter for {skill_path.name}: {e}")
-            
+
     return nosync_skills
 
-def sync_skills():
-    repo_root = Path(__file__).parent.parent
+
+def detect_agent_targets(repo_root: Path = None):
+    """Return {agent: skills_dir} for every registered target installed on this machine."""
+    return {name: target.path for name, target in installed_targets(repo_root).items()}
+
+
+def install_skill(skill_dir: Path, target_dir: Path):
+    """Copy one skill into an agent's skills directory, replacing any old copy."""
+    target_dir.mkdir(parents=True, exist_ok=True)
+    dest = target_dir / skill_dir.name
+
+    remove_skill(skill_dir.name, target_dir)
+    shutil.copytree(skill_dir, dest, ignore=IGNORE_PATTERNS)
+
+
+def update_skill(skill_dir: Path, target_dir: Path, old_files: dict, new_files: dict):
+    """Copy only the files whose hash changed and drop files that no longer exist."""
+    dest = target_dir / skill_dir.name
+    if dest.is_symlink() or not dest.is_dir():
+        install_skill(skill_dir, target_dir)
+        return
+
+    for rel_path, digest in new_files.items():
+        if old_files.get(rel_path) != digest or not (dest / rel_path).exists():
+            out = dest / rel_path
+            out.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(skill_dir / rel_path, out)
+
+    for rel_path in old_files.keys() - new_files.keys():
+        stale = dest / rel_path
+        if stale.exists():
+            stale.unlink()
+        # Prune directories emptied by the removal, stopping at the skill root
+        parent = stale.parent
+        while parent != dest and parent.exists() and not any(parent.iterdir()):
+            parent.rmdir()
+            parent = parent.parent
+
+
+def remove_skill(skill_name: str, target_dir: Path):
+    """Remove a previously synced skill from an agent's skills directory."""
+    dest = target_dir / skill_name
+    if dest.is_symlink() or dest.is_file():
+        dest.unlink()
+    elif dest.exists():
+        shutil.rmtree(dest)
+
+
+def install_skill_npx(skill_name: str, repo_root: Path):
+    """Legacy path: let `npx add-skill` install the skill into every agent."""
+    result = subprocess.run(
+        ["npx", "-y", "add-skill", ".", "-g", "-y", "-s", skill_name],
+        cwd=repo_root,
+        shell=(os.name == "nt"),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or f"npx exited with {result.returncode}")
+
+
+def load_manifest(path: Path):
+    """Load {skill: {"root": ..., "files": {...}}} recorded by the last sync."""
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Warning: Ignoring unreadable manifest {path}: {e}")
+        return {}
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("skills", {})
+
+
+def save_manifest(path: Path, skills: dict):
+    write_json_atomic(path, {"version": MANIFEST_VERSION, "skills": skills})
+
+
+class SyncPlan:
+    """Install/update/remove decisions for one target, derived from its manifest."""
+
+    def __init__(self, label: str, skills_dir: Path, manifest_path: Path):
+        self.label = label
+        self.skills_dir = skills_dir
+        self.manifest_path = manifest_path
+        self.manifest = load_manifest(manifest_path)
+        self.install = []
+        self.update = []
+        self.remove = []
+        self.unchanged = []
+        self.dependents = []  # unchanged, but re-synced because a dependency changed
+
+    def compute(self, digests: dict, scope=None, force: bool = False, check_dest: bool = True):
+        """
+        Diff source digests against the manifest.
+
+        Args:
+            digests: {skill: (root, files)} for every syncable source skill
+            scope: Optional set of skill names; others are left untouched
+            force: Reinstall everything in scope regardless of the manifest
+            check_dest: Reinstall skills whose destination directory has vanished
+        """
+        for skill, (root, _) in sorted(digests.items()):
+            recorded = self.manifest.get(skill)
+            if recorded is None or force:
+                self.install.append(skill)
+            elif check_dest and not (self.skills_dir / skill).exists():
+                self.install.append(skill)
+            elif recorded.get("root") != root:
+                self.update.append(skill)
+            else:
+                self.unchanged.append(skill)
+
+        for skill in sorted(self.manifest):
+            if skill not in digests and (scope is None or skill in scope):
+                self.remove.append(skill)
+        return self
+
+    def add_dependents(self, graph):
+        """Move unchanged skills that depend on an installed or updated skill into `dependents`."""
+        affected = graph.affected(self.install + self.update)
+        self.dependents = [s for s in self.unchanged if s in affected]
+        self.unchanged = [s for s in self.unchanged if s not in affected]
+        return self
+
+    @property
+    def changes(self):
+        return len(self.install) + len(self.update) + len(self.remove) + len(self.dependents)
+
+    def describe(self):
+        print(f"🎯 {self.label}: {len(self.install)} install, {len(self.update)} update, "
+              f"{len(self.dependents)} dependent, {len(self.remove)} remove, {len(self.unchanged)} unchanged")
+        for action, names in (("+", self.install), ("~", self.update), ("^", self.dependents), ("-", self.remove)):
+            for name in names:
+                print(f"   {action} {name}")
+
+
+def _timed(fn, *args, **span_args):
+    """Run fn(*args) and return (ok, seconds, error)."""
+    start = time.perf_counter()
+    try:
+        with tracing.span(f"sync.{fn.__name__}", **span_args):
+            fn(*args)
+        return True, time.perf_counter() - start, None
+    except Exception as e:
+        return False, time.perf_counter() - start, e
+
+
+def print_timing_report(results, elapsed: float):
+    """Summarise per-skill and per-target wall time for a sync run."""
+    per_skill = {}
+    per_target = {}
+    for skill, target, ok, seconds, _ in results:
+        per_skill[skill] = per_skill.get(skill, 0.0) + seconds
+        per_target[target] = per_target.get(target, 0.0) + seconds
+
+    print("\n⏱️ Timing by skill:")
+    for skill, seconds in sorted(per_skill.items(), key=lambda kv: -kv[1]):
+        print(f"   {skill:<32} {seconds * 1000:8.1f} ms")
+
+    print("⏱️ Timing by target:")
+    for target, seconds in sorted(per_target.items(), key=lambda kv: -kv[1]):
+        print(f"   {target:<32} {seconds * 1000:8.1f} ms")
+
+    print(f"⏱️ Wall time: {elapsed * 1000:.1f} ms")
+
+
+def build_plans(skills=None, targets=None, use_npx: bool = False, force: bool = False,
+                repo_root: Path = None, pool: ThreadPoolExecutor = None, graph=None):
+    """
+    Hash the source tree and diff it against every target's manifest.
+
+    Args:
+        graph: Optional SkillGraph; named skills then bring their dependents into scope
+
+    Returns:
+        (plans, digests) where digests is {skill: (root, files)}
+    """
+    repo_root = repo_root or Path(__file__).parent.parent
     skills_dir = repo_root / "skills"
-    
-    print("🔄 Starting Mapache Skill Sync...")
-    
-    nosync = get_nosync_skills(skills_dir)
+
+    with tracing.span("sync.nosync"):
+        nosync = get_nosync_skills(skills_dir)
     if nosync:
         print(f"⏭️ Skipping exempted skills: {', '.join(nosync)}")
-    
-    # Base command
-    cmd = ["npx", "-y", "add-skill", ".", "-g", "-y"]
-    
-    # If we have specific skills to sync (excluding nosync ones)
+
     all_skills = [p.name for p in skills_dir.iterdir() if p.is_dir() and (p / "SKILL.md").exists()]
     to_sync = [s for s in all_skills if s not in nosync]
-    
-    if not to_sync:
-        print("ℹ️ No syncable skills found.")
-        return
-        
-    for skill in to_sync:
-        print(f"📦 Syncing {skill}...")
-        subprocess.run(["npx", "-y", "add-skill", ".", "-g", "-y", "-s", skill], cwd=repo_root, shell=True)
+    scope = set(skills) if skills is not None else None
+    if scope is not None and graph is not None:
+        scope |= graph.affected(scope)
+    if scope is not None:
+        to_sync = [s for s in to_sync if s in scope]
+
+    with tracing.span("sync.hash", skills=len(to_sync)):
+        hash_cache = HashCache(cache_dir(repo_root) / "hash-cache.json")
+        hash_one = lambda name: (name, hash_skill(skills_dir / name, hash_cache))
+        hashed = pool.map(hash_one, to_sync) if pool else map(hash_one, to_sync)
+        digests = dict(hashed)
+        hash_cache.save()
+
+    # npx installs into every agent at once, so it is tracked as a single
+    # pseudo-target whose manifest lives in the repo cache.
+    with tracing.span("sync.plan"):
+        if use_npx:
+            manifest = cache_dir(repo_root) / "manifests" / "npx.json"
+            plans = [SyncPlan("npx", repo_root, manifest)
+                     .compute(digests, scope, force, check_dest=False)]
+        else:
+            if targets is None:
+                targets = detect_agent_targets(repo_root)
+            plans = [SyncPlan(label, target_dir, target_dir / MANIFEST_NAME).compute(digests, scope, force)
+                     for label, target_dir in targets.items()]
+
+    return plans, digests
+
+
+def sync_skills(skills=None, targets=None, workers: int = DEFAULT_WORKERS,
+                use_npx: bool = False, dry_run: bool = False, force: bool = False,
+                repo_root: Path = None, dependents: bool = True):
+    """
+    Sync skills to agent skills directories, touching only skills that changed.
+
+    Args:
+        skills: Optional list of skill names to sync (default: all syncable skills)
+        targets: Optional {label: skills_dir} mapping (default: detected agents)
+        workers: Maximum number of concurrent installs
+        use_npx: Install through `npx add-skill` instead of copying natively
+        dry_run: Print the plan without changing anything
+        force: Ignore manifests and reinstall every skill
+        repo_root: Repository root (default: parent of scripts/)
+        dependents: Also re-sync skills that depend on a changed (or named) skill
+
+    Returns:
+        True if every operation succeeded
+    """
+    repo_root = repo_root or Path(__file__).parent.parent
+    skills_dir = repo_root / "skills"
+
+    print("🔄 Starting Mapache Skill Sync...")
+    start = time.perf_counter()
+
+    # The graph is only needed to widen a named scope up front; a full sync
+    # loads it lazily, once something actually changed.
+    graph = SkillGraph.load(skills_dir) if dependents and skills is not None else None
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        plans, digests = build_plans(skills, targets, use_npx, force, repo_root, pool, graph)
+
+        if not plans:
+            print("ℹ️ No coding agents detected. Use --target to sync into a directory.")
+            return True
+
+        if any(plan.install or plan.update or plan.remove for plan in plans):
+            graph = graph or SkillGraph.load(skills_dir)
+            if dependents:
+                for plan in plans:
+                    plan.add_dependents(graph)
+
+        for plan in plans:
+            plan.describe()
+
+        if dry_run:
+            print(f"\n📝 Dry run: no changes made ({(time.perf_counter() - start) * 1000:.1f} ms)")
+            return True
+
+        if not any(plan.changes for plan in plans):
+            print(f"\n✅ Everything up to date ({(time.perf_counter() - start) * 1000:.1f} ms)")
+            return True
+
+        jobs = {}
+        removals = []
+        for plan in plans:
+            for skill in plan.install + plan.update + plan.dependents:
+                if use_npx:
+                    fn, fn_args = install_skill_npx, (skill, repo_root)
+                elif skill in plan.install:
+                    fn, fn_args = install_skill, (skills_dir / skill, plan.skills_dir)
+                else:
+                    old_files = plan.manifest[skill].get("files", {})
+                    fn, fn_args = update_skill, (skills_dir / skill, plan.skills_dir, old_files, digests[skill][1])
+                jobs.setdefault(skill, []).append((plan, fn, fn_args))
+            for skill in plan.remove:
+                if use_npx:
+                    print(f"⚠️ npx cannot uninstall {skill}; remove it from your agents manually")
+                    continue
+                removals.append((plan, skill, remove_skill, (skill, plan.skills_dir)))
+
+        waves = plan_waves(graph, jobs) or [[]]
+        print(f"\n📦 Applying {sum(map(len, jobs.values())) + len(removals)} change(s) "
+              f"in {len(waves)} wave(s) with {workers} worker(s)...")
+
+        results = []
+        failed = {plan.label: set() for plan in plans}
+        for i, wave in enumerate(waves):
+            with tracing.span("sync.wave", wave=i, skills=len(wave)):
+                # Removed skills have nothing left to wait for, so they go with the first wave
+                wave_jobs = removals if i == 0 else []
+                wave_jobs = wave_jobs + [(plan, skill, fn, fn_args) for skill in wave
+                                         for plan, fn, fn_args in jobs[skill]]
+                futures = []
+                for plan, skill, fn, fn_args in wave_jobs:
+                    blocked = graph.blocked_by(skill, failed[plan.label]) if graph else []
+                    if blocked:
+                        futures.append((plan, skill, None, f"skipped: dependency {', '.join(blocked)} failed"))
+                    else:
+                        futures.append((plan, skill, pool.submit(_timed, fn, *fn_args, skill=skill,
+                                                                 target=plan.label), None))
+
+                for plan, skill, future, skipped in futures:
+                    ok, seconds, error = future.result() if future else (False, 0.0, skipped)
+                    results.append((skill, plan.label, ok, seconds, error))
+                    if not ok:
+                        failed[plan.label].add(skill)
+                        print(f"❌ {skill} -> {plan.label}: {error}")
+                        continue
+                    if skill in digests:
+                        root, files = digests[skill]
+                        plan.manifest[skill] = {"root": root, "files": files}
+                    else:
+                        plan.manifest.pop(skill, None)
+
+    with tracing.span("sync.save_manifests"):
+        for plan in plans:
+            if plan.changes:
+                save_manifest(plan.manifest_path, plan.manifest)
+
+    print_timing_report(results, time.perf_counter() - start)
+
+    failures = [r for r in results if not r[2]]
+    if failures:
+        print(f"\n⚠️ Sync finished with {len(failures)} failure(s)")
+        return False
 
     print("\n✅ Sync complete!")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sync skills to installed coding agents')
+    parser.add_argument('skills', nargs='*', help='Only sync these skills (default: all)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Maximum concurrent installs (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--target', action='append', default=None, metavar='DIR',
+                        help='Sync into this skills directory instead of detected agents (repeatable)')
+    parser.add_argument('--npx', action='store_true',
+                        help='Fall back to `npx add-skill` for installation')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print the install/update/remove plan without applying it')
+    parser.add_argument('--force', action='store_true',
+                        help='Ignore sync manifests and reinstall every skill')
+    parser.add_argument('--no-dependents', action='store_true',
+                        help='Do not re-sync skills that depend on a changed or named skill')
+
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        targets = None
+        if args.target:
+            targets = {str(Path(t)): Path(t) for t in args.target}
+
+        success = sync_skills(
+            skills=args.skills or None,
+            targets=targets,
+            workers=args.workers,
+            use_npx=args.npx,
+            dry_run=args.dry_run,
+            force=args.force,
+            dependents=not args.no_dependents,
+        )
+        sys.exit(0 if success else 1)
+
 
 if __name__ == "__main__":
-    sync_skills()
+    main()
@@ -0,0 +1,103 @@
+"""
+Registry of skill deploy/sync targets.
+
+Built-in targets cover the agents `npx add-skill -g` knows about. Extra
+directory targets, or overrides of the built-ins, come from a JSON config
+file (deploy_targets.json in the repo root, or $MAPACHE_TARGETS_FILE):
+
+    {
+      "targets": {
+        "claude-code": {"mode": "copy", "max_concurrency": 2},
+        "team-share": {"path": "//nas/skills", "mode": "copy"},
+        "cursor": {"enabled": false}
+      }
+    }
+"""
+
+import json
+import os
+from pathlib import Path
+
+CONFIG_NAME = "deploy_targets.json"
+
+DEFAULT_MAX_CONCURRENCY = 4
+
+# path: global skills directory; detect: directory whose presence means the
+# agent is installed (defaults to the parent of path)
+BUILTIN_TARGETS = {
+    "claude-code": {"path": "~/.claude/skills", "label": "Claude Code"},
+    "gemini-cli": {"path": "~/.gemini/skills", "label": "Gemini CLI"},
+    "antigravity": {"path": "~/.gemini/antigravity/skills", "label": "Antigravity"},
+    "codex": {"path": "~/.codex/skills", "label": "Codex"},
+    "cursor": {"path": "~/.cursor/skills", "label": "Cursor"},
+}
+
+
+class DeployTarget:
+    """A directory that skills are installed into."""
+
+    def __init__(self, name: str, path, label: str = None, detect=None, mode: str = "auto",
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, enabled: bool = True,
+                 builtin: bool = False):
+        self.name = name
+        self.path = Path(os.path.expandvars(str(path))).expanduser()
+        self.label = label or name
+        self.detect = Path(os.path.expandvars(str(detect))).expanduser() if detect else self.path.parent
+        # auto: symlink with atomic-copy fallback; symlink/copy force one;
+        # versioned: symlink to an immutable version in the deploy history store
+        self.mode = mode
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.enabled = enabled
+        self.builtin = builtin
+
+    def __repr__(self):
+        return f"DeployTarget({self.name!r}, {str(self.path)!r})"
+
+    def is_installed(self) -> bool:
+        """Built-in agents count only when detected; configured directories always do."""
+        if not self.enabled:
+            return False
+        return self.detect.is_dir() if self.builtin else True
+
+
+def load_config(repo_root: Path, section: str = "targets"):
+    """Read one section of the optional targets config file, returning {} when there is none."""
+    config_path = os.environ.get("MAPACHE_TARGETS_FILE")
+    path = Path(config_path) if config_path else repo_root / CONFIG_NAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get(section, {})
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Warning: Ignoring unreadable targets config {path}: {e}")
+        return {}
+
+
+def load_targets(repo_root: Path = None):
+    """
+    Build the target registry.
+
+    Returns:
+        {name: DeployTarget} for built-in and configured targets
+    """
+    repo_root = repo_root or Path(__file__).parent.parent
+    config = load_config(repo_root)
+
+    targets = {}
+    for name in list(BUILTIN_TARGETS) + [n for n in config if n not in BUILTIN_TARGETS]:
+        spec = dict(BUILTIN_TARGETS.get(name, {}))
+        spec.update(config.get(name, {}))
+        if "path" not in spec:
+            print(f"⚠️ Warning: Target '{name}' has no path; skipping")
+            continue
+        spec.pop("type", None)
+        try:
+            targets[name] = DeployTarget(name, builtin=name in BUILTIN_TARGETS, **spec)
+        except TypeError as e:
+            print(f"⚠️ Warning: Invalid config for target '{name}': {e}")
+    return targets
+
+
+def installed_targets(repo_root: Path = None):
+    """{name: DeployTarget} for every enabled target that is present on this machine."""
+    return {name: t for name, t in load_targets(repo_root).items() if t.is_installed()}
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Measure how much agent context each Mapache Skill costs, in tokens.
+
+A skill is paid for in three tiers:
+    metadata   the SKILL.md frontmatter, loaded into every session
+    skill_md   the whole SKILL.md, loaded when the skill activates
+    resources  every other file, loaded only when the agent opens it
+
+Counts come from a pluggable local tokenizer. Resource counts are cached
+under .mapache/ by file content hash, so only resources that changed are
+re-tokenized; SKILL.md is split into its two tiers and counted on every run.
+A skill whose SKILL.md exceeds its token budget fails here and in
+validate_skill.py; the budget is DEFAULT_TOKEN_BUDGET unless the skill's
+.skillmeta sets "token_budget". Budgets are checked with the approx
+tokenizer unless --tokenizer says otherwise, so a skill passes or fails the
+same way whether or not tiktoken is installed.
+
+Tokenizers:
+    approx                  word/punctuation counter, no dependencies (default)
+    tiktoken[:ENCODING]     OpenAI BPE via tiktoken (default: cl100k_base)
+    module:attribute        any object or factory with a `name` and `count(text)`
+
+Usage:
+    python token_cost.py
+    python token_cost.py n8n-flow-builder --tokenizer tiktoken:o200k_base
+    python token_cost.py --budget 4000 --format json
+"""
+
+import argparse
+import functools
+import importlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+from frontmatter import FrontmatterError, read_frontmatter
+from skill_hash import DigestCache, HashCache, cache_dir, hash_skill
+import tracing
+
+# SKILL.md tokens a skill may cost on activation unless its .skillmeta says otherwise
+DEFAULT_TOKEN_BUDGET = 5000
+
+# Tokenizer spec budgets are checked with by default; pinned so results do not depend on what is installed
+BUDGET_TOKENIZER = "approx"
+
+# Warn once a SKILL.md reaches this share of its budget
+WARN_RATIO = 0.85
+
+# Below this many bytes to tokenize, a process pool costs more than it saves
+PARALLEL_MIN_BYTES = 1024 * 1024
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class ApproxTokenizer:
+    """Word/punctuation counter; a rough stand-in for BPE counts when tiktoken is missing."""
+
+    name = "approx"
+
+    def count(self, text: str) -> int:
+        return len(_WORD_RE.findall(text))
+
+
+class TiktokenTokenizer:
+    def __init__(self, encoding: str = "cl100k_base"):
+        import tiktoken
+
+        self._enc = tiktoken.get_encoding(encoding)
+        self.name = f"tiktoken:{encoding}"
+
+    def count(self, text: str) -> int:
+        return len(self._enc.encode(text, disallowed_special=()))
+
+
+@functools.lru_cache(maxsize=None)
+def load_tokenizer(spec: str = None):
+    """
+    Build (once per spec) a tokenizer from a spec (see the module docstring).
+
+    With no spec, tiktoken is used when installed and the approximate
+    counter otherwise.
+
+    Raises:
+        ValueError: If the spec names a tokenizer that cannot be loaded
+    """
+    if spec is None:
+        try:
+            return TiktokenTokenizer()
+        except Exception:
+            return ApproxTokenizer()
+
+    if spec == "approx":
+        return ApproxTokenizer()
+
+    if spec == "tiktoken" or spec.startswith("tiktoken:"):
+        encoding = spec.partition(":")[2] or "cl100k_base"
+        try:
+            return TiktokenTokenizer(encoding)
+        except ImportError:
+            raise ValueError("tiktoken is not installed (pip install tiktoken)") from None
+        except Exception as e:
+            raise ValueError(f"Unknown tiktoken encoding '{encoding}': {e}") from None
+
+    module_name, _, attr = spec.partition(":")
+    if not attr:
+        raise ValueError(f"Unknown tokenizer '{spec}' (use approx, tiktoken[:ENCODING] or module:attribute)")
+    try:
+        obj = getattr(importlib.import_module(module_name), attr)
+    except (ImportError, AttributeError) as e:
+        raise ValueError(f"Cannot load tokenizer '{spec}': {e}") from None
+    tokenizer = obj() if callable(obj) and not hasattr(obj, "count") else obj
+    if not hasattr(tokenizer, "count"):
+        raise ValueError(f"Tokenizer '{spec}' has no count(text) method")
+    if not getattr(tokenizer, "name", None):
+        tokenizer.name = spec
+    return tokenizer
+
+
+def skill_budget(skill_dir: Path, default: int = DEFAULT_TOKEN_BUDGET) -> int:
+    """The skill's "token_budget" from .skillmeta, or the default."""
+    meta_path = skill_dir / ".skillmeta"
+    if not meta_path.exists():
+        return default
+    try:
+        budget = json.loads(meta_path.read_text(encoding="utf-8")).get("token_budget")
+    except (OSError, ValueError):
+        return default
+    return budget if isinstance(budget, int) and budget > 0 else default
+
+
+def split_skill_md(path: Path):
+    """(frontmatter text, body text) of a SKILL.md; the frontmatter is empty if it has none."""
+    data = path.read_bytes()
+    try:
+        frontmatter = read_frontmatter(path)
+    except FrontmatterError:
+        frontmatter = None
+    offset = frontmatter.body_offset if frontmatter is not None else 0
+    return data[:offset].decode("utf-8", errors="replace"), data[offset:].decode("utf-8", errors="replace")
+
+
+def budget_check(tokens: int, budget: int, tokenizer_name: str):
+    """(errors, warnings) for a SKILL.md of `tokens` tokens against its budget."""
+    if tokens > budget:
+        return [f"SKILL.md is {tokens} tokens, over its {budget}-token budget ({tokenizer_name})"], []
+    if tokens >= budget * WARN_RATIO:
+        return [], [f"SKILL.md is {tokens} tokens, {tokens * 100 // budget}% of its {budget}-token budget "
+                    f"({tokenizer_name})"]
+    return [], []
+
+
+def _decode(data: bytes):
+    """File text, or None for binary files (which an agent never reads as tokens)."""
+    if b"\0" in data[:8192]:
+        return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+
+
+def _count_file(args):
+    """Token count of one file; module-level so it can run in a worker process."""
+    spec, path = args
+    text = _decode(Path(path).read_bytes())
+    return 0 if text is None else load_tokenizer(spec).count(text)
+
+
+def measure_skills(skills_dir: Path, skills=None, tokenizer=None, tokenizer_spec: str = None,
+                   budget: int = DEFAULT_TOKEN_BUDGET, workers: int = DEFAULT_WORKERS,
+                   use_cache: bool = True, repo_root: Path = None):
+    """
+    Token cost of every skill (or the named ones) under skills_dir.
+
+    Only files whose content hash has no cached count are tokenized; with
+    enough bytes to count, that happens in a process pool.
+
+    Returns:
+        List of per-skill dicts (skill, metadata, skill_md, resources, total,
+        files, budget, errors, warnings), sorted by skill name
+    """
+    repo_root = repo_root or skills_dir.parent
+    tokenizer = tokenizer or load_tokenizer(tokenizer_spec)
+    hash_cache = HashCache(cache_dir(repo_root) / "hash-cache.json")
+    cache = DigestCache(cache_dir(repo_root) / "token-cache.json" if use_cache else None)
+
+    skill_dirs = sorted(p for p in skills_dir.iterdir() if p.is_dir() and (p / "SKILL.md").exists())
+    if skills is not None:
+        skill_dirs = [p for p in skill_dirs if p.name in set(skills)]
+
+    with tracing.span("tokens.hash", skills=len(skill_dirs)):
+        digests = {p.name: hash_skill(p, hash_cache)[1] for p in skill_dirs}
+        hash_cache.save()
+
+    # SKILL.md is always split into frontmatter and body, so it is counted
+    # here; resources are looked up by digest and only missing ones are read.
+    missing = {}
+    for skill_dir in skill_dirs:
+        for rel_path, digest in digests[skill_dir.name].items():
+            if rel_path != "SKILL.md" and cache.get(tokenizer.name, digest) is None:
+                missing.setdefault(digest, skill_dir / rel_path)
+
+    with tracing.span("tokens.count", files=len(missing)):
+        # Workers rebuild the tokenizer from its spec, so an object passed in
+        # without one is only usable in this process
+        spec = tokenizer_spec
+        if spec is None and (tokenizer.name == "approx" or tokenizer.name.startswith("tiktoken:")):
+            spec = tokenizer.name
+        miss_bytes = sum(path.stat().st_size for path in missing.values())
+        if workers > 1 and len(missing) > 1 and miss_bytes >= PARALLEL_MIN_BYTES and spec:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=min(workers, len(missing))) as pool:
+                counts = pool.map(_count_file, [(spec, str(p)) for p in missing.values()], chunksize=16)
+                for digest, tokens in zip(missing, counts):
+                    cache.put(tokenizer.name, digest, tokens)
+        else:
+            for digest, path in missing.items():
+                text = _decode(path.read_bytes())
+                cache.put(tokenizer.name, digest, 0 if text is None else tokenizer.count(text))
+        tracing.count("tokens.files_counted", len(missing))
+
+    results = []
+    for skill_dir in skill_dirs:
+        files = digests[skill_dir.name]
+        header, body = split_skill_md(skill_dir / "SKILL.md")
+        metadata = tokenizer.count(header)
+        skill_md = metadata + tokenizer.count(body)
+        resources = sum(cache.get(tokenizer.name, d) for rel, d in files.items() if rel != "SKILL.md")
+        limit = skill_budget(skill_dir, budget)
+        errors, warnings = budget_check(skill_md, limit, tokenizer.name)
+        results.append({
+            "skill": skill_dir.name,
+            "metadata": metadata,
+            "skill_md": skill_md,
+            "resources": resources,
+            "total": skill_md + resources,
+            "files": len(files),
+            "budget": limit,
+            "errors": errors,
+            "warnings": warnings,
+        })
+
+    if skills is None:
+        cache.prune(tokenizer.name, {d for files in digests.values() for d in files.values()})
+    cache.save()
+    return results
+
+
+def totals(results):
+    """Summed tiers across skills; `metadata` is what every session pays up front."""
+    keys = ("metadata", "skill_md", "resources", "total", "files")
+    return {key: sum(r[key] for r in results) for key in keys}
+
+
+def format_json_report(results, tokenizer_name: str):
+    return json.dumps({
+        "tokenizer": tokenizer_name,
+        "skills": results,
+        "totals": totals(results),
+        "over_budget": [r["skill"] for r in results if r["errors"]],
+    }, indent=2)
+
+
+def print_text_report(results, tokenizer_name: str, sort: str = "total"):
+    if sort != "skill":
+        results = sorted(results, key=lambda r: -r[sort])
+    print(f"Token cost by skill ({tokenizer_name})")
+    print("=" * 78)
+    print(f"{'SKILL':<28} {'METADATA':>9} {'SKILL.MD':>9} {'RESOURCES':>10} {'TOTAL':>9}  {'BUDGET':>6}")
+    for r in results:
+        flag = "  ❌" if r["errors"] else ("  ⚠️" if r["warnings"] else "")
+        print(f"{r['skill']:<28} {r['metadata']:>9} {r['skill_md']:>9} {r['resources']:>10} "
+              f"{r['total']:>9}  {r['skill_md'] * 100 // r['budget']:>5}%{flag}")
+    print("-" * 78)
+    t = totals(results)
+    print(f"{'TOTAL':<28} {t['metadata']:>9} {t['skill_md']:>9} {t['resources']:>10} {t['total']:>9}")
+    print(f"\nEvery session pays {t['metadata']} token(s) of skill metadata; "
+          f"activating every skill adds {t['skill_md'] - t['metadata']} more.")
+    over = [r for r in results if r["errors"]]
+    for r in over:
+        print(f"❌ {r['skill']}: {r['errors'][0]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report the context cost of skills in tokens')
+    parser.add_argument('skills', nargs='*', help='Only measure these skills (default: all)')
+    parser.add_argument('--tokenizer', default=BUDGET_TOKENIZER,
+                        help=f'approx, tiktoken[:ENCODING] or module:attribute (default: {BUDGET_TOKENIZER})')
+    parser.add_argument('--budget', type=int, default=DEFAULT_TOKEN_BUDGET,
+                        help=f'SKILL.md token budget for skills without "token_budget" '
+                             f'in .skillmeta (default: {DEFAULT_TOKEN_BUDGET})')
+    parser.add_argument('--format', choices=['text', 'json'], default='text', help='Report format')
+    parser.add_argument('--sort', choices=['total', 'skill_md', 'resources', 'skill'], default='total',
+                        help='Sort the text report (default: total)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Worker processes for large uncached trees (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--no-cache', action='store_true', help='Re-tokenize every file')
+
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        try:
+            tokenizer = load_tokenizer(args.tokenizer)
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(2)
+
+        skills_dir = Path(__file__).parent.parent / "skills"
+        missing = [s for s in args.skills if not (skills_dir / s / "SKILL.md").exists()]
+        if missing:
+            print(f"❌ Error: Skill not found: {', '.join(missing)}")
+            sys.exit(1)
+
+        results = measure_skills(skills_dir, skills=args.skills or None, tokenizer=tokenizer,
+                                 tokenizer_spec=args.tokenizer, budget=args.budget,
+                                 workers=args.workers, use_cache=not args.no_cache)
+        if args.format == 'json':
+            print(format_json_report(results, tokenizer.name))
+        else:
+            print_text_report(results, tokenizer.name, args.sort)
+
+        sys.exit(1 if any(r["errors"] for r in results) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Lightweight span timing, counters and profiling for the Mapache scripts.
+
+Instrumented code calls `span(name, **args)` around a stage and `count(name)`
+for events. Both are no-ops until a script enables tracing with `--trace`,
+so leaving them in hot paths costs a flag check.
+
+    with span("sync.install", skill=name):
+        ...
+    count("hash.bytes", size)
+
+Every script adds the flags with `add_arguments(parser)` and wraps its run in
+`session(args)`:
+
+    --trace run.json     Chrome trace-event file (chrome://tracing, Perfetto)
+    --trace run.jsonl    one JSON object per span/counter
+    --profile [FILE]     cProfile the run; print the top functions or dump pstats to FILE
+
+A per-stage summary of span counts and total time goes to stderr at the end
+of a traced run. Spans opened in worker processes are not collected; the
+parent's span around the pool covers them.
+"""
+
+import contextlib
+import functools
+import io
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+FORMATS = ("chrome", "jsonl")
+
+PROFILE_TOP = 25
+
+_enabled = False
+_lock = threading.Lock()
+_events = []
+_counters = {}
+_origin = time.perf_counter()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name: str, args: dict):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        event = (self.name, self.start - _origin, end - self.start, threading.get_ident(), self.args)
+        with _lock:
+            _events.append(event)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def span(name: str, **args):
+    """Time a block (context manager) when tracing is enabled."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args)
+
+
+def traced(name: str = None):
+    """Decorator form of span(), named after the function by default."""
+    def decorate(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(label, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+    return decorate
+
+
+def count(name: str, value: int = 1):
+    """Add to a named counter when tracing is enabled."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def enable():
+    """Start collecting spans and counters (clears anything collected earlier)."""
+    global _enabled, _origin
+    with _lock:
+        _events.clear()
+        _counters.clear()
+        _origin = time.perf_counter()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def snapshot():
+    """(events, counters) collected so far; events are (name, start, seconds, tid, args)."""
+    with _lock:
+        return list(_events), dict(_counters)
+
+
+def write_trace(path: Path, fmt: str = None):
+    """Write collected spans and counters as Chrome trace events or JSON lines."""
+    path = Path(path)
+    fmt = fmt or ("jsonl" if path.suffix == ".jsonl" else "chrome")
+    events, counters = snapshot()
+    pid = os.getpid()
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if fmt == "jsonl":
+        with open(path, "w", encoding="utf-8") as f:
+            for name, start, seconds, tid, args in events:
+                f.write(json.dumps({"type": "span", "name": name, "start_ms": round(start * 1000, 3),
+                                    "ms": round(seconds * 1000, 3), "tid": tid, "args": args},
+                                   default=str) + "\n")
+            for name, value in sorted(counters.items()):
+                f.write(json.dumps({"type": "counter", "name": name, "value": value}) + "\n")
+        return
+
+    # Chrome trace-event format: complete ("X") events in microseconds
+    trace_events = [{"name": name, "cat": name.split(".")[0], "ph": "X", "ts": round(start * 1e6, 1),
+                     "dur": round(seconds * 1e6, 1), "pid": pid, "tid": tid, "args": args}
+                    for name, start, seconds, tid, args in events]
+    end = max((start + seconds for _, start, seconds, _, _ in events), default=0.0)
+    trace_events.extend({"name": name, "ph": "C", "ts": round(end * 1e6, 1), "pid": pid, "tid": 0,
+                         "args": {"value": value}} for name, value in sorted(counters.items()))
+    path.write_text(json.dumps({"traceEvents": trace_events, "displayTimeUnit": "ms"}, default=str),
+                    encoding="utf-8")
+
+
+def print_summary(file=sys.stderr):
+    """Per-span-name call count and total/max time, slowest first, then counters."""
+    events, counters = snapshot()
+    totals = {}
+    for name, _, seconds, _, _ in events:
+        calls, total, worst = totals.get(name, (0, 0.0, 0.0))
+        totals[name] = (calls + 1, total + seconds, max(worst, seconds))
+
+    print(f"\n⏱️ {'SPAN':<32} {'CALLS':>7} {'TOTAL':>11} {'MAX':>11}", file=file)
+    for name, (calls, total, worst) in sorted(totals.items(), key=lambda kv: -kv[1][1]):
+        print(f"   {name:<32} {calls:>7} {total * 1000:>8.1f} ms {worst * 1000:>8.1f} ms", file=file)
+    for name, value in sorted(counters.items()):
+        print(f"   {name:<32} {value:>7}", file=file)
+
+
+def add_arguments(parser):
+    """Add --trace, --trace-format and --profile to a script's argument parser."""
+    group = parser.add_argument_group('instrumentation')
+    group.add_argument('--trace', metavar='FILE',
+                       help='Record timing spans to FILE (.json: Chrome trace, .jsonl: JSON lines)')
+    group.add_argument('--trace-format', choices=FORMATS,
+                       help='Override the trace format implied by the file extension')
+    group.add_argument('--profile', nargs='?', const='-', metavar='FILE',
+                       help='Run under cProfile; print the top functions, or save pstats to FILE')
+    return parser
+
+
+@contextlib.contextmanager
+def session(args):
+    """
+    Trace and/or profile the enclosed run according to parsed --trace/--profile args.
+
+    Output is written even when the run ends in sys.exit() or an exception.
+    """
+    trace_path = getattr(args, "trace", None)
+    profile_path = getattr(args, "profile", None)
+    if trace_path:
+        enable()
+    profiler = None
+    if profile_path:
+        # Imported here: cProfile/pstats cost more than everything else at startup
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        with span("run", argv=" ".join(sys.argv[1:])):
+            yield
+    finally:
+        if profiler:
+            profiler.disable()
+            if profile_path == "-":
+                import pstats
+
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+                print(out.getvalue(), file=sys.stderr)
+            else:
+                profiler.dump_stats(profile_path)
+                print(f"📈 Profile written to {profile_path}", file=sys.stderr)
+        if trace_path:
+            disable()
+            write_trace(trace_path, getattr(args, "trace_format", None))
+            print_summary()
+            print(f"📈 Trace written to {trace_path}", file=sys.stderr)
@@ -1,36 +1,70 @@
 #!/usr/bin/env python3
 """
-Validate Mapache Skill structure, YAML frontmatter, and security.
+Validate Mapache Skill structure, YAML frontmatter, security, and token budget.
 
 Usage:
     python validate_skill.py skill-name/
+    python validate_skill.py --all
+    python validate_skill.py --all --token-budget 4000
+    python validate_skill.py --all --tokenizer tiktoken
+    python validate_skill.py --all --format junit --output validation.xml
+
+Security checks come from security_scan.py: secrets and destructive shell
+are errors, shell-spawning code and undeclared network access are warnings.
 """
 
 import argparse
+import json
+import os
 import sys
+import time
 from pathlib import Path
 import re
 
+from frontmatter import FrontmatterError, read_frontmatter
+from security_scan import SCANNER_VERSION, format_finding, scan_skills
+from skill_hash import HashCache, cache_dir, hash_skill, write_json_atomic
+from token_cost import BUDGET_TOKENIZER, DEFAULT_TOKEN_BUDGET, budget_check, load_tokenizer, skill_budget
+import tracing
+
+# Bump whenever checks change so cached results from older rules are discarded
+VALIDATOR_VERSION = 4
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+
 
 class SkillValidator:
-    def __init__(self, skill_path: Path):
+    def __init__(self, skill_path: Path, quiet: bool = False, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 findings=None, tokenizer: str = BUDGET_TOKENIZER):
         self.skill_path = skill_path
+        self.quiet = quiet
+        self.token_budget = token_budget
+        self.tokenizer = tokenizer
+        # Security findings already scanned by validate_all; None scans here
+        self.findings = findings
         self.errors = []
         self.warnings = []
         
     def validate(self):
         """Run all validation checks."""
-        print(f"Validating skill: {self.skill_path.name}")
-        print()
+        if not self.quiet:
+            print(f"Validating skill: {self.skill_path.name}")
+            print()
         
+        self.run_checks()
+        
+        return self.report()
+    
+    def run_checks(self):
+        """Collect errors and warnings without printing anything."""
         if not self.skill_path.exists():
             self.errors.append(f"Skill directory not found: {self.skill_path}")
-            return self.report()
+            return
         
         self.check_skill_md_exists()
         self.check_yaml_frontmatter()
-        
-        return self.report()
+        self.check_token_budget()
+        self.check_security()
     
     def check_skill_md_exists(self):
         """Check that SKILL.md file exists."""
@@ -45,36 +79,63 @@ class SkillValidator:
         skill_md = self.skill_path / "SKILL.md"
         if not skill_md.exists():
             return
-
         
-        content = skill_md.read_text(encoding='utf-8')
+        try:
+            frontmatter = read_frontmatter(skill_md)
+        except FrontmatterError as e:
+            self.errors.append(f"{e.message} (line {e.line})")
+            return
         
-        if not content.startswith('---\n'):
+        if frontmatter is None:
             self.errors.append("SKILL.md must start with YAML frontmatter (---)")
             return
         
-        parts = content.split('---\n', 2)
-        if len(parts) < 3:
-            self.errors.append("YAML frontmatter not properly closed with ---")
+        try:
+            frontmatter.data
+        except FrontmatterError as e:
+            self.errors.append(f"{e.message} (line {e.line})" if e.line else e.message)
             return
         
-        frontmatter = parts[1]
-        
-        if 'name:' not in frontmatter:
+        if 'name' not in frontmatter:
             self.errors.append("YAML frontmatter missing 'name' field")
-        if 'description:' not in frontmatter:
+        if 'description' not in frontmatter:
             self.errors.append("YAML frontmatter missing 'description' field")
         
-        name_match = re.search(r'name:\s*(.+)', frontmatter)
-        if name_match:
-            name = name_match.group(1).strip()
-            if not re.match(r'^[a-z0-9-]+$', name):
+        name = frontmatter.name
+        if name:
+            if not re.match(r'^[a-z0-9-]+$', str(name)):
                 self.warnings.append(
-                    f"Skill name '{name}' should be kebab-case"
+                    f"Skill name '{name}' should be kebab-case "
+                    f"(line {frontmatter.field_lines['name']})"
                 )
     
+    def check_token_budget(self):
+        """Check that SKILL.md fits the skill's token budget (see token_cost.py)."""
+        skill_md = self.skill_path / "SKILL.md"
+        if not skill_md.exists():
+            return
+
+        tokenizer = load_tokenizer(self.tokenizer)
+        tokens = tokenizer.count(skill_md.read_text(encoding="utf-8", errors="replace"))
+        errors, warnings = budget_check(tokens, skill_budget(self.skill_path, self.token_budget), tokenizer.name)
+        self.errors.extend(errors)
+        self.warnings.extend(warnings)
+
+    def check_security(self):
+        """Scan every file in the skill for secrets, dangerous shell and network egress."""
+        findings = self.findings
+        if findings is None:
+            findings = scan_skills([self.skill_path], workers=1,
+                                   repo_root=Path(__file__).parent.parent).get(self.skill_path.name, [])
+        for finding in findings:
+            target = self.errors if finding[2] == "error" else self.warnings
+            target.append(f"Security: {format_finding(finding)}")
+
     def report(self):
         """Print validation report and return success status."""
+        if self.quiet:
+            return len(self.errors) == 0
+        
         print("=" * 60)
         
         if self.errors:
@@ -104,22 +165,230 @@ class SkillValidator:
         return len(self.errors) == 0
 
 
-def main():
+@tracing.traced("validate.skill")
+def validate_skill_dir(skill_path: str, token_budget: int = DEFAULT_TOKEN_BUDGET, findings=None,
+                       tokenizer: str = BUDGET_TOKENIZER):
+    """Validate one skill quietly; module-level so it can run in a worker process."""
+    start = time.perf_counter()
+    validator = SkillValidator(Path(skill_path), quiet=True, token_budget=token_budget, findings=findings,
+                               tokenizer=tokenizer)
+    validator.run_checks()
+    return {
+        "skill": Path(skill_path).name,
+        "passed": not validator.errors,
+        "errors": validator.errors,
+        "warnings": validator.warnings,
+        "seconds": round(time.perf_counter() - start, 6),
+        "cached": False,
+    }
+
+
+def validate_all(skills_dir: Path, workers: int = DEFAULT_WORKERS, use_cache: bool = True,
+                 repo_root: Path = None, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 tokenizer: str = BUDGET_TOKENIZER):
+    """
+    Validate every skill under skills_dir in a process pool.
+
+    Results are cached against each skill's content hash, so skills that have
+    not changed since their last validation are not re-checked.
+
+    Returns:
+        List of result dicts, sorted by skill name
+    """
+    repo_root = repo_root or skills_dir.parent
+    cache_file = cache_dir(repo_root) / "validate-cache.json"
+    cache = {}
+    if use_cache and cache_file.exists():
+        try:
+            cache = json.loads(cache_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            cache = {}
+
+    hash_cache = HashCache(cache_dir(repo_root) / "hash-cache.json")
+    skill_dirs = sorted(p for p in skills_dir.iterdir() if p.is_dir() and not p.name.startswith("."))
+
+    # Results depend on the budget and tokenizer as well as the skill's content
+    rules = f"{VALIDATOR_VERSION}:{SCANNER_VERSION}:{token_budget}:{load_tokenizer(tokenizer).name}"
+    results = []
+    keys = {}
+    to_run = []
+    with tracing.span("validate.hash", skills=len(skill_dirs)):
+        for skill_dir in skill_dirs:
+            root, _ = hash_skill(skill_dir, hash_cache)
+            key = f"{rules}:{root}"
+            keys[skill_dir.name] = key
+            entry = cache.get(skill_dir.name)
+            if use_cache and entry and entry.get("key") == key:
+                results.append(dict(entry["result"], cached=True))
+            else:
+                to_run.append(str(skill_dir))
+        hash_cache.save()
+
+    # Scanned up front against the per-file cache, so a changed skill only rescans its changed files
+    with tracing.span("validate.scan", skills=len(to_run)):
+        scans = scan_skills([Path(p) for p in to_run], workers=workers, use_cache=use_cache, repo_root=repo_root)
+        findings = [scans.get(Path(p).name, []) for p in to_run]
+
+    with tracing.span("validate.run", skills=len(to_run)):
+        if len(to_run) > 1 and workers > 1:
+            # multiprocessing is slow to import; only pay for it when there is work to fan out
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=min(workers, len(to_run))) as pool:
+                fresh = list(pool.map(validate_skill_dir, to_run, [token_budget] * len(to_run), findings,
+                                      [tokenizer] * len(to_run)))
+        else:
+            fresh = [validate_skill_dir(path, token_budget, f, tokenizer) for path, f in zip(to_run, findings)]
+
+    for result in fresh:
+        cache[result["skill"]] = {"key": keys[result["skill"]], "result": result}
+    results.extend(fresh)
+
+    if fresh:
+        # Drop entries for skills that no longer exist
+        write_json_atomic(cache_file, {name: cache[name] for name in keys if name in cache})
+
+    return sorted(results, key=lambda r: r["skill"])
+
+
+def format_json_report(results):
+    return json.dumps({
+        "validator_version": VALIDATOR_VERSION,
+        "total": len(results),
+        "failed": sum(1 for r in results if not r["passed"]),
+        "results": results,
+    }, indent=2)
+
+
+def format_junit_report(results):
+    """Render results as a JUnit XML testsuite (one testcase per skill)."""
+    from xml.etree import ElementTree as ET
+
+    suite = ET.Element("testsuite", {
+        "name": "skill-validation",
+        "tests": str(len(results)),
+        "failures": str(sum(1 for r in results if not r["passed"])),
+        "time": f"{sum(r['seconds'] for r in results):.6f}",
+    })
+    for r in results:
+        case = ET.SubElement(suite, "testcase", {
+            "classname": "skills",
+            "name": r["skill"],
+            "time": f"{r['seconds']:.6f}",
+        })
+        if r["errors"]:
+            failure = ET.SubElement(case, "failure", {"message": r["errors"][0]})
+            failure.text = "\n".join(r["errors"])
+        if r["warnings"]:
+            ET.SubElement(case, "system-out").text = "\n".join(f"WARNING: {w}" for w in r["warnings"])
+    return ET.tostring(suite, encoding="unicode")
+
+
+def format_text_report(results):
+    lines = ["=" * 60]
+    for r in results:
+        status = "PASS" if r["passed"] else "FAIL"
+        suffix = " (cached)" if r["cached"] else ""
+        lines.append(f"{status}  {r['skill']}{suffix}")
+        for error in r["errors"]:
+            lines.append(f"   * ERROR: {error}")
+        for warning in r["warnings"]:
+            lines.append(f"   * WARNING: {warning}")
+    failed = sum(1 for r in results if not r["passed"])
+    lines.append("=" * 60)
+    lines.append(f"{len(results) - failed}/{len(results)} skills passed")
+    return "\n".join(lines)
+
+
+REPORT_FORMATTERS = {
+    'text': format_text_report,
+    'json': format_json_report,
+    'junit': format_junit_report,
+}
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description='Validate Mapache Skill structure and security'
     )
     parser.add_argument(
         'skill_path',
+        nargs='?',
         help='Path to skill directory'
     )
+    parser.add_argument(
+        '--all',
+        action='store_true',
+        help='Validate every skill under skills/ in parallel'
+    )
+    parser.add_argument(
+        '--format',
+        choices=list(REPORT_FORMATTERS),
+        default='text',
+        help='Report format for --all (default: text)'
+    )
+    parser.add_argument(
+        '--output',
+        help='Write the --all report to this file instead of stdout'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f'Worker processes for --all (default: {DEFAULT_WORKERS})'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Ignore cached results and re-validate everything'
+    )
+    parser.add_argument(
+        '--token-budget',
+        type=int,
+        default=DEFAULT_TOKEN_BUDGET,
+        help=f'SKILL.md token budget for skills without "token_budget" in .skillmeta '
+             f'(default: {DEFAULT_TOKEN_BUDGET})'
+    )
+    parser.add_argument(
+        '--tokenizer',
+        default=BUDGET_TOKENIZER,
+        help=f'Tokenizer for the budget check: approx, tiktoken[:ENCODING] or module:attribute '
+             f'(default: {BUDGET_TOKENIZER})'
+    )
     
-    args = parser.parse_args()
-    skill_path = Path(args.skill_path)
-    
-    validator = SkillValidator(skill_path)
-    success = validator.validate()
-    
-    sys.exit(0 if success else 1)
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        try:
+            load_tokenizer(args.tokenizer)
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            sys.exit(2)
+
+        if args.all:
+            skills_dir = Path(__file__).parent.parent / "skills"
+            results = validate_all(skills_dir, workers=args.workers, use_cache=not args.no_cache,
+                                   token_budget=args.token_budget, tokenizer=args.tokenizer)
+
+            report = REPORT_FORMATTERS[args.format](results)
+            if args.output:
+                Path(args.output).write_text(report + "\n", encoding='utf-8')
+                print(f"Report written to {args.output}")
+            else:
+                print(report)
+
+            sys.exit(0 if all(r["passed"] for r in results) else 1)
+
+        if not args.skill_path:
+            parser.error('skill_path is required unless --all is given')
+
+        skill_path = Path(args.skill_path)
+
+        validator = SkillValidator(skill_path, token_budget=args.token_budget, tokenizer=args.tokenizer)
+        success = validator.validate()
+
+        sys.exit(0 if success else 1)
 
 
 if __name__ == '__main__':
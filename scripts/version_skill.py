@@ -1,14 +1,53 @@
 #!/usr/bin/env python3
 """
 Automatically bump version in .skillmeta and SKILL.md.
+
+The SKILL.md `version:` frontmatter field (if present) and the
+`- Version: X.Y.Z` line in the body notes are both updated.
+
+Bumps are transactional: every edit is computed first (in parallel, without
+touching disk), then all new files are written to temp files beside their
+targets and renamed into place. If any step fails, files already replaced
+are restored, so a release never leaves .skillmeta and SKILL.md (or one
+skill and another) out of step.
+
+Usage:
+    python version_skill.py n8n-flow-builder --bump minor
+    python version_skill.py --since v1.2.0
+    python version_skill.py --tag automation --bump minor --dry-run
+    python version_skill.py --all --bump major
 """
 
 import sys
 import json
+import os
 import re
 import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from frontmatter import read_frontmatter
+import tracing
+
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+BODY_VERSION_RE = re.compile(r'(- Version:\s*)\d+\.\d+\.\d+')
+
+
+class VersionEdit:
+    """The new contents a bump writes for one skill, plus what it replaces."""
+
+    __slots__ = ("skill", "old_version", "new_version", "writes", "originals")
+
+    def __init__(self, skill: str, old_version: str, new_version: str):
+        self.skill = skill
+        self.old_version = old_version
+        self.new_version = new_version
+        self.writes = {}     # path -> new bytes
+        self.originals = {}  # path -> bytes read when the edit was planned
+
+
 def bump_version(current: str, type: str):
     major, minor, patch = map(int, current.split('.'))
     if type == 'major':
@@ -18,50 +57,246 @@ def bump_version(current: str, type: str):
     else:
         return f"{major}.{minor}.{patch + 1}"
 
-def update_skill(skill_dir: Path, bump_type: str):
+
+def plan_bump(skill_dir: Path, bump_type: str) -> VersionEdit:
+    """
+    Compute a skill's version bump without writing anything.
+
+    Raises:
+        ValueError: If .skillmeta is missing or holds an unreadable version
+    """
     skillmeta_path = skill_dir / ".skillmeta"
     skill_md_path = skill_dir / "SKILL.md"
-    
+
     if not skillmeta_path.exists():
-        print(f"❌ Error: .skillmeta not found in {skill_dir}")
-        return False
-        
-    # Update .skillmeta
-    with open(skillmeta_path, 'r') as f:
-        meta = json.load(f)
-    
-    old_version = meta.get('version', '1.0.0')
-    new_version = bump_version(old_version, bump_type)
+        raise ValueError(f".skillmeta not found in {skill_dir}")
+
+    meta_data = skillmeta_path.read_bytes()
+    try:
+        meta = json.loads(meta_data)
+        old_version = meta.get('version', '1.0.0')
+        new_version = bump_version(old_version, bump_type)
+    except ValueError as e:
+        raise ValueError(f"Cannot bump {skill_dir.name}: {e}") from None
+
+    edit = VersionEdit(skill_dir.name, old_version, new_version)
     meta['version'] = new_version
-    
-    with open(skillmeta_path, 'w') as f:
-        json.dump(meta, f, indent=2)
-        
+    edit.originals[skillmeta_path] = meta_data
+    edit.writes[skillmeta_path] = json.dumps(meta, indent=2).encode('utf-8')
+
     # Update SKILL.md if version is present there
     if skill_md_path.exists():
-        content = skill_md_path.read_text(encoding='utf-8')
-        # Look for - Version: X.Y.Z
-        new_content = re.sub(r'(- Version:\s*)\d+\.\d+\.\d+', rf'\g<1>{new_version}', content)
-        if new_content != content:
-            skill_md_path.write_text(new_content, encoding='utf-8')
-            
-    print(f"✅ Bumped {skill_dir.name}: {old_version} -> {new_version}")
+        frontmatter = read_frontmatter(skill_md_path)
+        data = skill_md_path.read_bytes()
+        header, body = b"", data
+        if frontmatter is not None:
+            header, body = data[:frontmatter.body_offset], data[frontmatter.body_offset:]
+            if 'version' in frontmatter:
+                header = frontmatter.with_field('version', new_version).encode('utf-8')
+
+        # Look for - Version: X.Y.Z in the body notes
+        new_content = BODY_VERSION_RE.sub(rf'\g<1>{new_version}', body.decode('utf-8'))
+        new_data = header + new_content.encode('utf-8')
+        if new_data != data:
+            edit.originals[skill_md_path] = data
+            edit.writes[skill_md_path] = new_data
+
+    return edit
+
+
+def _tmp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.bump-{os.getpid()}.tmp")
+
+
+def _write_tmp(path: Path, data: bytes):
+    tmp = _tmp_path(path)
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def apply_edits(edits, workers: int = DEFAULT_WORKERS):
+    """
+    Write every edit or none of them.
+
+    Temp files are written (in parallel) next to each target, then renamed
+    over the targets. A file changed on disk since it was planned aborts the
+    whole transaction before anything is replaced.
+
+    Raises:
+        RuntimeError: If a target changed since planning
+        OSError: If writing or renaming fails (after rolling back)
+    """
+    writes = {}
+    originals = {}
+    for edit in edits:
+        writes.update(edit.writes)
+        originals.update(edit.originals)
+
+    stale = [str(p) for p, data in originals.items() if not p.exists() or p.read_bytes() != data]
+    if stale:
+        raise RuntimeError(f"Changed on disk since the bump was planned: {', '.join(stale)}")
+
+    replaced = []
+    try:
+        with tracing.span("version.write_tmp", files=len(writes)):
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                list(pool.map(lambda item: _write_tmp(*item), writes.items()))
+        with tracing.span("version.commit", files=len(writes)):
+            for path in writes:
+                os.replace(_tmp_path(path), path)
+                replaced.append(path)
+    except BaseException:
+        for path in replaced:
+            _write_tmp(path, originals[path])
+            os.replace(_tmp_path(path), path)
+        for path in writes:
+            _tmp_path(path).unlink(missing_ok=True)
+        raise
+
+
+@tracing.traced("version.update_skill")
+def update_skill(skill_dir: Path, bump_type: str):
+    try:
+        edit = plan_bump(skill_dir, bump_type)
+        apply_edits([edit], workers=1)
+    except (ValueError, RuntimeError, OSError) as e:
+        print(f"❌ Error: {e}")
+        return False
+
+    print(f"✅ Bumped {skill_dir.name}: {edit.old_version} -> {edit.new_version}")
     return True
 
-def main():
+
+def bump_skills(skill_dirs, bump_type: str, workers: int = DEFAULT_WORKERS, dry_run: bool = False):
+    """
+    Bump many skills as one all-or-nothing transaction.
+
+    Returns:
+        True if every skill was bumped (or, with dry_run, could be)
+    """
+    with tracing.span("version.plan", skills=len(skill_dirs)):
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = [(d, pool.submit(plan_bump, d, bump_type)) for d in skill_dirs]
+        edits, errors = [], []
+        for skill_dir, future in futures:
+            try:
+                edits.append(future.result())
+            except (ValueError, OSError) as e:
+                errors.append(f"{skill_dir.name}: {e}")
+
+    if errors:
+        for error in errors:
+            print(f"❌ {error}")
+        print(f"\n⚠️ Nothing was changed: {len(errors)} skill(s) cannot be bumped")
+        return False
+
+    if dry_run:
+        for edit in edits:
+            print(f"📝 {edit.skill}: {edit.old_version} -> {edit.new_version}")
+        print(f"\n📝 Dry run: {len(edits)} skill(s) would be bumped")
+        return True
+
+    try:
+        apply_edits(edits, workers)
+    except (RuntimeError, OSError) as e:
+        print(f"❌ Bump aborted, no files changed: {e}")
+        return False
+
+    for edit in edits:
+        print(f"✅ {edit.skill}: {edit.old_version} -> {edit.new_version}")
+    print(f"\n✅ Bumped {len(edits)} skill(s)")
+    return True
+
+
+def skills_changed_since(ref: str, repo_root: Path):
+    """Names of skills with committed, staged, unstaged or untracked changes since a git ref."""
+    commands = [
+        ["git", "diff", "--name-only", ref, "--", "skills"],
+        ["git", "ls-files", "--others", "--exclude-standard", "--", "skills"],
+    ]
+    changed = set()
+    for cmd in commands:
+        result = subprocess.run(cmd, cwd=repo_root, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f"{' '.join(cmd)} exited with {result.returncode}")
+        for line in result.stdout.splitlines():
+            parts = Path(line).parts
+            if len(parts) > 2 and parts[0] == "skills":
+                changed.add(parts[1])
+    return changed
+
+
+def skills_with_tag(tag: str, skills_dir: Path):
+    names = set()
+    for meta_path in skills_dir.glob("*/.skillmeta"):
+        try:
+            tags = json.loads(meta_path.read_text(encoding="utf-8")).get("tags", [])
+        except (OSError, ValueError):
+            continue
+        if tag in tags:
+            names.add(meta_path.parent.name)
+    return names
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description='Bump skill version')
-    parser.add_argument('skill_name', help='Name of the skill directory')
+    parser.add_argument('skill_name', nargs='*', help='Name of the skill directory')
     parser.add_argument('--bump', choices=['patch', 'minor', 'major'], default='patch')
-    
-    args = parser.parse_args()
-    repo_root = Path(__file__).parent.parent
-    skill_dir = repo_root / "skills" / args.skill_name
-    
-    if not skill_dir.exists():
-        print(f"❌ Error: Skill directory not found: {skill_dir}")
-        sys.exit(1)
-        
-    update_skill(skill_dir, args.bump)
+    parser.add_argument('--since', metavar='REF', help='Bump every skill changed since this git ref')
+    parser.add_argument('--tag', help='Bump every skill with this .skillmeta tag')
+    parser.add_argument('--all', action='store_true', help='Bump every skill')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Parallel workers for planning and writing (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--dry-run', action='store_true', help='Show the bumps without writing them')
+
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        repo_root = Path(__file__).parent.parent
+        skills_dir = repo_root / "skills"
+
+        if not (args.skill_name or args.since or args.tag or args.all):
+            parser.error('give skill names, --since, --tag or --all')
+
+        # A single named skill keeps the original one-skill behaviour and output
+        if len(args.skill_name) == 1 and not (args.since or args.tag or args.all or args.dry_run):
+            skill_dir = skills_dir / args.skill_name[0]
+            if not skill_dir.exists():
+                print(f"❌ Error: Skill directory not found: {skill_dir}")
+                sys.exit(1)
+            sys.exit(0 if update_skill(skill_dir, args.bump) else 1)
+
+        names = set(args.skill_name)
+        missing = [n for n in names if not (skills_dir / n).is_dir()]
+        if missing:
+            print(f"❌ Error: Skill directory not found: {', '.join(sorted(missing))}")
+            sys.exit(1)
+        if args.all:
+            names.update(p.parent.name for p in skills_dir.glob("*/.skillmeta"))
+        if args.since:
+            try:
+                names.update(n for n in skills_changed_since(args.since, repo_root) if (skills_dir / n).is_dir())
+            except (OSError, RuntimeError) as e:
+                print(f"❌ Error: Cannot list changes since {args.since}: {e}")
+                sys.exit(1)
+        if args.tag:
+            names.update(skills_with_tag(args.tag, skills_dir))
+
+        # Changed or named skills without a .skillmeta have no version to bump; --all never selects them
+        unversioned = sorted(n for n in names if not (skills_dir / n / ".skillmeta").is_file())
+        if unversioned:
+            print(f"ℹ️ Skipping skills without a .skillmeta: {', '.join(unversioned)}")
+            names.difference_update(unversioned)
+
+        if not names:
+            print("ℹ️ No matching skills to bump")
+            sys.exit(0)
+
+        success = bump_skills([skills_dir / n for n in sorted(names)], args.bump, args.workers, args.dry_run)
+        sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
     main()
@@ -2,65 +2,150 @@
 """
 Monitor the skills/ directory and trigger sync on changes.
 Requires: pip install watchdog
+
+Events are coalesced per skill with a trailing-edge debounce: every event
+restarts the timer, and when the tree has been quiet for `--debounce`
+seconds only the skills that changed are re-synced, in-process, on a single
+background worker.
 """
 
+import argparse
+import threading
 import time
 import sys
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
+from sync_skills import sync_skills
+import tracing
+
+HANDLED_EVENTS = {"created", "modified", "deleted", "moved"}
+
+# Editor swap/backup files that should never trigger a sync on their own
+IGNORED_SUFFIXES = (".swp", ".swx", ".tmp", "~", ".pyc")
+IGNORED_PARTS = {"__pycache__", ".git"}
+
+
 class SkillChangeHandler(FileSystemEventHandler):
-    def __init__(self, repo_root: Path):
+    def __init__(self, repo_root: Path, debounce_seconds: float = 2, max_wait_seconds: float = 10,
+                 sync_fn=None):
         self.repo_root = repo_root
-        self.last_sync = 0
-        self.debounce_seconds = 2
+        self.skills_dir = (repo_root / "skills").resolve()
+        self.debounce_seconds = debounce_seconds
+        # Upper bound on how long a continuous stream of events can defer a sync
+        self.max_wait_seconds = max_wait_seconds
+        self.sync_fn = sync_fn or (lambda skills: sync_skills(skills=skills, repo_root=self.repo_root))
+
+        self.pending = set()
+        self.first_event = None
+        self.timer = None
+        self.lock = threading.Lock()
+        # A single worker serialises syncs; batches queue up behind a running one
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="skill-sync")
 
-    def on_modified(self, event):
-        if event.is_directory:
+    def on_any_event(self, event):
+        if event.event_type not in HANDLED_EVENTS:
             return
-        
-        # We only care about changes within skills/
-        if "skills" in Path(event.src_path).parts:
-            self.trigger_sync(event.src_path)
-
-    def trigger_sync(self, changed_file):
-        now = time.time()
-        if now - self.last_sync < self.debounce_seconds:
+        # Directory mtime bumps just mirror changes to their children
+        if event.is_directory and event.event_type == "modified":
             return
-            
-        print(f"\n🔔 Change detected in: {changed_file}")
-        
-        # Run sync script
-        sync_script = self.repo_root / "scripts" / "sync_skills.py"
+
+        paths = [event.src_path]
+        if event.event_type == "moved":
+            paths.append(event.dest_path)
+
+        skills = {s for s in map(self.skill_for_path, paths) if s}
+        if skills:
+            self.queue(skills)
+
+    def skill_for_path(self, path):
+        """Map a changed path to the name of the skill directory that contains it."""
+        p = Path(path)
+        if p.name.endswith(IGNORED_SUFFIXES) or IGNORED_PARTS.intersection(p.parts):
+            return None
+        try:
+            rel = p.resolve().relative_to(self.skills_dir)
+        except ValueError:
+            return None
+        return rel.parts[0] if rel.parts else None
+
+    def queue(self, skills):
+        """Add skills to the pending batch and push the flush out to the trailing edge."""
+        with self.lock:
+            now = time.monotonic()
+            if not self.pending:
+                self.first_event = now
+            self.pending.update(skills)
+
+            if self.timer is not None:
+                self.timer.cancel()
+            deadline = self.first_event + self.max_wait_seconds
+            delay = max(0.0, min(self.debounce_seconds, deadline - now))
+            self.timer = threading.Timer(delay, self.flush)
+            self.timer.daemon = True
+            self.timer.start()
+
+    def flush(self):
+        """Hand the pending batch to the background worker."""
+        with self.lock:
+            batch = sorted(self.pending)
+            self.pending.clear()
+            self.first_event = None
+            self.timer = None
+        if batch:
+            self.worker.submit(self.run_sync, batch)
+
+    def run_sync(self, skills):
+        print(f"\n🔔 Change detected in: {', '.join(skills)}")
         print("🚀 Triggering sync...")
-        subprocess.run([sys.executable, str(sync_script)], cwd=self.repo_root, shell=True)
-        
-        self.last_sync = now
-
-def main():
-    repo_root = Path(__file__).parent.parent
-    path_to_watch = repo_root / "skills"
-    
-    if not path_to_watch.exists():
-        print(f"❌ Error: Skills directory not found: {path_to_watch}")
-        sys.exit(1)
-
-    print(f"👀 Monitoring skills directory: {path_to_watch}")
-    print("💡 (Press Ctrl+C to stop manually)")
-    
-    event_handler = SkillChangeHandler(repo_root)
-    observer = Observer()
-    observer.schedule(event_handler, str(path_to_watch), recursive=True)
-    observer.start()
-    
-    try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        observer.stop()
-    observer.join()
+        try:
+            with tracing.span("watch.sync", skills=len(skills)):
+                self.sync_fn(skills)
+        except Exception as e:
+            print(f"❌ Sync failed: {e}")
+
+    def stop(self):
+        """Flush anything still pending and wait for the worker to drain."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+        self.flush()
+        self.worker.shutdown(wait=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Watch skills/ and sync changed skills')
+    parser.add_argument('--debounce', type=float, default=2,
+                        help='Seconds of quiet before a batch is synced (default: 2)')
+    tracing.add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    with tracing.session(args):
+        repo_root = Path(__file__).parent.parent
+        path_to_watch = repo_root / "skills"
+
+        if not path_to_watch.exists():
+            print(f"❌ Error: Skills directory not found: {path_to_watch}")
+            sys.exit(1)
+
+        print(f"👀 Monitoring skills directory: {path_to_watch}")
+        print("💡 (Press Ctrl+C to stop manually)")
+
+        event_handler = SkillChangeHandler(repo_root, debounce_seconds=args.debounce)
+        observer = Observer()
+        observer.schedule(event_handler, str(path_to_watch), recursive=True)
+        observer.start()
+
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            observer.stop()
+        observer.join()
+        event_handler.stop()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,147 @@
+"""
+Token-aware recursive chunking for knowledge cores.
+
+Text is split on the coarsest separator that works (headings, paragraphs,
+lines, sentences, words) and the pieces are merged back into chunks of at
+most `chunk_tokens` tokens, with `overlap_tokens` carried between
+neighbours. Files are streamed one markdown section at a time, so memory
+stays bounded by the largest section rather than the whole core.
+"""
+
+import hashlib
+import re
+from typing import Iterator, List
+
+SEPARATORS = ["\n## ", "\n### ", "\n\n", "\n", ". ", " "]
+
+# Sections longer than this many tokens are flushed at the next blank line
+MAX_SECTION_TOKENS = 4000
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+
+class ApproxTokenizer:
+    """Word/punctuation counter; close enough to BPE counts for sizing chunks."""
+
+    name = "approx"
+
+    def count(self, text: str) -> int:
+        return len(_WORD_RE.findall(text))
+
+
+class TiktokenTokenizer:
+    name = "tiktoken"
+
+    def __init__(self, encoding: str = "cl100k_base"):
+        import tiktoken
+
+        self._enc = tiktoken.get_encoding(encoding)
+
+    def count(self, text: str) -> int:
+        return len(self._enc.encode(text, disallowed_special=()))
+
+
+def default_tokenizer():
+    """tiktoken when installed, otherwise the approximate counter."""
+    try:
+        return TiktokenTokenizer()
+    except Exception:
+        return ApproxTokenizer()
+
+
+def chunk_id(text: str) -> str:
+    """Content-addressed chunk key, so unchanged chunks map to the same record."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class Chunk:
+    __slots__ = ("id", "text", "heading", "position", "tokens")
+
+    def __init__(self, text: str, heading: str, position: int, tokens: int):
+        self.id = chunk_id(text)
+        self.text = text
+        self.heading = heading
+        self.position = position
+        self.tokens = tokens
+
+    def metadata(self, source: str) -> dict:
+        return {"text": self.text, "heading": self.heading, "position": self.position, "source": source}
+
+
+class RecursiveChunker:
+    def __init__(self, chunk_tokens: int = 400, overlap_tokens: int = 50, tokenizer=None):
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.tokenizer = tokenizer or default_tokenizer()
+
+    def _split(self, text: str, separators: List[str]) -> List[str]:
+        """Break text into pieces that each fit in a chunk."""
+        if self.tokenizer.count(text) <= self.chunk_tokens:
+            return [text]
+        for i, sep in enumerate(separators):
+            if sep not in text:
+                continue
+            parts = text.split(sep)
+            # Keep the separator attached to the following piece so joins are lossless
+            pieces = [parts[0]] + [sep + p for p in parts[1:]]
+            out = []
+            for piece in pieces:
+                if piece.strip():
+                    out.extend(self._split(piece, separators[i + 1:]))
+            return out
+        # No separator left: hard-split on characters, proportional to token density
+        ratio = max(1, len(text) * self.chunk_tokens // max(1, self.tokenizer.count(text)))
+        return [text[i:i + ratio] for i in range(0, len(text), ratio)]
+
+    def _overlap_tail(self, pieces: List[str]) -> List[str]:
+        tail, total = [], 0
+        for piece in reversed(pieces):
+            n = self.tokenizer.count(piece)
+            if total + n > self.overlap_tokens:
+                break
+            tail.insert(0, piece)
+            total += n
+        return tail
+
+    def split_text(self, text: str) -> List[str]:
+        """Merge split pieces greedily into overlapping chunks."""
+        chunks, current, current_tokens = [], [], 0
+        for piece in self._split(text, SEPARATORS):
+            n = self.tokenizer.count(piece)
+            if current and current_tokens + n > self.chunk_tokens:
+                chunks.append("".join(current).strip())
+                current = self._overlap_tail(current)
+                current_tokens = sum(self.tokenizer.count(p) for p in current)
+            current.append(piece)
+            current_tokens += n
+        if current:
+            chunks.append("".join(current).strip())
+        return [c for c in chunks if c]
+
+    def iter_file(self, path) -> Iterator[Chunk]:
+        """Stream a markdown file section by section and yield its chunks."""
+        position = 0
+        for heading, section in iter_sections(path, self.tokenizer):
+            for text in self.split_text(section):
+                yield Chunk(text, heading, position, self.tokenizer.count(text))
+                position += 1
+
+
+def iter_sections(path, tokenizer, max_tokens: int = MAX_SECTION_TOKENS):
+    """Yield (heading, text) blocks, breaking at headings or at blank lines past max_tokens."""
+    heading, lines, tokens = "", [], 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            is_heading = line.startswith("#")
+            oversized = tokens >= max_tokens and not line.strip()
+            if (is_heading or oversized) and lines:
+                yield heading, "".join(lines)
+                lines, tokens = [], 0
+            if is_heading:
+                heading = line.strip("# \n")
+            lines.append(line)
+            tokens += tokenizer.count(line)
+    if lines:
+        yield heading, "".join(lines)
@@ -0,0 +1,171 @@
+"""
+Content-addressed embedding cache shared across grounding runs.
+
+Vectors are keyed by (model, chunk hash), so the same text embedded by the
+same model is only ever paid for once, whichever knowledge core or
+collection it came from. A small in-memory LRU sits in front of a SQLite
+store; the store is bounded in bytes and evicts least recently used
+vectors once it grows past the limit.
+"""
+
+import sqlite3
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+from chunking import chunk_id
+from exa_search import default_cache_dir
+from instrument import count, span
+
+CACHE_FILE_NAME = "embeddings.db"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MEMORY_ITEMS = 4096
+
+# Evict down to this fraction of the limit so eviction is not run on every write
+EVICT_TO = 0.9
+
+# SQLite caps bound parameters per statement; stay well below it
+_SQL_BATCH = 500
+
+
+class EmbeddingCache:
+    """In-memory LRU over a size-bounded SQLite store of float32 vectors."""
+
+    def __init__(self, path: Path = None, max_bytes: int = DEFAULT_MAX_BYTES,
+                 memory_items: int = DEFAULT_MEMORY_ITEMS):
+        # Defaults to the Exa cache directory, resolved now rather than at import
+        self.path = Path(path) if path else default_cache_dir() / CACHE_FILE_NAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evicted": 0}
+        self._memory = OrderedDict()
+
+        self._db = sqlite3.connect(str(self.path))
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, model TEXT NOT NULL, vector BLOB NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_lru ON embeddings(last_used)")
+        self._db.commit()
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        return f"{model}:{chunk_id(text)}"
+
+    def _remember(self, key: str, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """Return {key: vector} for the keys that are cached."""
+        found, missing = {}, []
+        for key in keys:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                found[key] = vector
+                self.stats["memory_hits"] += 1
+            else:
+                missing.append(key)
+
+        now = time.time()
+        for start in range(0, len(missing), _SQL_BATCH):
+            batch = missing[start:start + _SQL_BATCH]
+            marks = ",".join("?" * len(batch))
+            rows = self._db.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", batch).fetchall()
+            for key, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                vector = vector.tolist()
+                found[key] = vector
+                self._remember(key, vector)
+            if rows:
+                self._db.executemany("UPDATE embeddings SET last_used = ? WHERE key = ?",
+                                     [(now, key) for key, _ in rows])
+            self.stats["disk_hits"] += len(rows)
+            self.stats["misses"] += len(batch) - len(rows)
+        if missing:
+            self._db.commit()
+        return found
+
+    def put_many(self, model: str, items):
+        """Store (key, vector) pairs, then evict if the store is over its limit."""
+        now = time.time()
+        rows = []
+        for key, vector in items:
+            vector = [float(v) for v in vector]
+            blob = array("f", vector).tobytes()
+            rows.append((key, model, blob, len(blob), now))
+            self._remember(key, vector)
+        self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?, ?)", rows)
+        self._db.commit()
+        self._evict()
+
+    def size(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    def _evict(self):
+        total = self.size()
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * EVICT_TO)
+        victims = []
+        for key, size in self._db.execute("SELECT key, size FROM embeddings ORDER BY last_used"):
+            if total <= target:
+                break
+            victims.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+        self._db.commit()
+        for (key,) in victims:
+            self._memory.pop(key, None)
+        self.stats["evicted"] += len(victims)
+
+    def close(self):
+        self._db.close()
+
+    def report(self):
+        s = self.stats
+        lookups = s["memory_hits"] + s["disk_hits"] + s["misses"]
+        rate = (s["memory_hits"] + s["disk_hits"]) / lookups * 100 if lookups else 0.0
+        print(f"📊 Embedding cache: {s['memory_hits']} memory hit(s), {s['disk_hits']} disk hit(s), "
+              f"{s['misses']} miss(es) ({rate:.0f}% hit rate), {s['evicted']} evicted, "
+              f"{self.size() / (1024 * 1024):.1f} MB on disk")
+
+
+class CachedEmbedder:
+    """Embedding adapter wrapper that only sends cache misses to the wrapped adapter."""
+
+    def __init__(self, embedder, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.cache = cache
+        self.model = embedder.model
+        self.dimension = embedder.dimension
+        self.calls = 0
+
+    def embed(self, texts):
+        keys = [EmbeddingCache.key(self.model, t) for t in texts]
+        with span("embed.cache_lookup", texts=len(keys)):
+            found = self.cache.get_many(list(dict.fromkeys(keys)))
+
+        # Texts repeated within the batch are embedded once
+        todo = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in todo:
+                todo[key] = text
+        if todo:
+            with span("embed.request", model=self.model, texts=len(todo)):
+                vectors = self.embedder.embed(list(todo.values()))
+            self.calls += 1
+            count("embed.texts", len(todo))
+            fresh = list(zip(todo, vectors))
+            self.cache.put_many(self.model, fresh)
+            found.update(fresh)
+        return [found[key] for key in keys]
@@ -0,0 +1,68 @@
+"""
+Pluggable embedding adapters.
+
+Every adapter exposes `model`, `dimension` and `embed(texts) -> list of
+vectors`, and is called with whole batches. `HashingEmbedder` is a
+deterministic, dependency-free adapter (signed feature hashing of word
+unigrams and bigrams) for tests and offline runs.
+"""
+
+import hashlib
+import math
+import os
+import re
+from typing import List
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    def __init__(self, dimension: int = 1536):
+        self.dimension = dimension
+        self.model = f"hashing-{dimension}"
+
+    def _vector(self, text: str) -> List[float]:
+        vec = [0.0] * self.dimension
+        words = _TOKEN_RE.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for feature in features:
+            h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dimension] += 1.0 if (h >> 63) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._vector(t) for t in texts]
+
+
+class OpenAIEmbedder:
+    DIMENSIONS = {
+        "text-embedding-3-small": 1536,
+        "text-embedding-3-large": 3072,
+        "text-embedding-ada-002": 1536,
+    }
+
+    def __init__(self, model: str = "text-embedding-3-small", api_key: str = None):
+        try:
+            from openai import OpenAI
+        except ImportError as e:
+            raise RuntimeError(f"Missing dependency: {e}. Run: uv pip install openai") from None
+        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.model = model
+        self.dimension = self.DIMENSIONS.get(model, 1536)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        response = self.client.embeddings.create(model=self.model, input=texts)
+        return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+EMBEDDERS = {
+    "openai": OpenAIEmbedder,
+    "hash": HashingEmbedder,
+}
+
+
+def get_embedder(name: str, **kwargs):
+    if name not in EMBEDDERS:
+        raise ValueError(f"Unknown embedder '{name}' (choose from {', '.join(EMBEDDERS)})")
+    return EMBEDDERS[name](**kwargs)
@@ -0,0 +1,200 @@
+"""
+Concurrent, cached Exa retrieval.
+
+Wraps any object with an Exa-compatible `search_and_contents(query, **params)`
+method, so a local stub can stand in for the real client. Responses are
+stored on disk keyed by (query, params) with a TTL, which lets repeated and
+overlapping grounding runs be answered locally.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from instrument import count, span
+
+DEFAULT_TTL = 7 * 24 * 3600  # a week: research sources do not change by the hour
+DEFAULT_WORKERS = 4
+
+DEFAULT_PARAMS = {
+    "type": "neural",
+    "use_autoprompt": True,
+    "num_results": 5,
+    "text": True,
+}
+
+# Responses worth retrying; anything else (bad key, invalid request) fails the same way again
+RETRY_STATUSES = {408, 429}
+_STATUS_RE = re.compile(r"status code:? (\d{3})", re.IGNORECASE)
+
+
+def default_cache_dir() -> Path:
+    """$EXA_CACHE_DIR, read when a cache is opened so a value loaded from .env is honoured."""
+    return Path(os.getenv("EXA_CACHE_DIR") or Path.home() / ".cache" / "exa-grounding")
+
+
+def error_status(error):
+    """The HTTP status behind a client error, if it carries or mentions one."""
+    for obj in (error, getattr(error, "response", None)):
+        status = getattr(obj, "status_code", None)
+        if isinstance(status, int):
+            return status
+    match = _STATUS_RE.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+def is_transient(error) -> bool:
+    """Network failures, rate limiting and server errors."""
+    status = error_status(error)
+    if status is not None:
+        return status in RETRY_STATUSES or status >= 500
+    # Connection and timeout errors, including requests' exceptions, are OSErrors
+    return isinstance(error, OSError)
+
+
+class SearchResult:
+    """The subset of an Exa result that grounding needs, in a JSON-friendly form."""
+
+    __slots__ = ("title", "url", "text", "id", "published_date", "author", "score")
+
+    def __init__(self, title=None, url=None, text=None, id=None, published_date=None, author=None, score=None):
+        self.title = title
+        self.url = url
+        self.text = text or ""
+        self.id = id
+        self.published_date = published_date
+        self.author = author
+        self.score = score
+
+    @classmethod
+    def from_exa(cls, res):
+        return cls(**{name: getattr(res, name, None) for name in cls.__slots__})
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data.get(name) for name in cls.__slots__})
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ResponseCache:
+    """One JSON file per (query, params), expired after ttl seconds."""
+
+    def __init__(self, cache_dir: Path = None, ttl: float = DEFAULT_TTL):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.ttl = ttl
+
+    @staticmethod
+    def key(query: str, params: dict) -> str:
+        payload = json.dumps({"query": query, "params": params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str):
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl:
+            return None
+        return [SearchResult.from_dict(r) for r in entry["results"]]
+
+    def put(self, key: str, query: str, results):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps({
+            "created": time.time(),
+            "query": query,
+            "results": [r.to_dict() for r in results],
+        }), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+class ExaRetriever:
+    """Bounded-parallel Exa search with retry/backoff on transient errors and an optional response cache."""
+
+    def __init__(self, client, cache: ResponseCache = None, max_workers: int = DEFAULT_WORKERS,
+                 retries: int = 3, backoff: float = 1.0, params: dict = None):
+        self.client = client
+        self.cache = cache
+        self.max_workers = max(1, max_workers)
+        self.retries = retries
+        self.backoff = backoff
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        self.stats = {"hits": 0, "misses": 0, "retries": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+        count(f"exa.{stat}")
+
+    def _call(self, query: str, params: dict):
+        for attempt in range(self.retries + 1):
+            try:
+                with span("exa.request", query=query, attempt=attempt):
+                    response = self.client.search_and_contents(query, **params)
+                return [SearchResult.from_exa(r) for r in response.results]
+            except Exception as e:
+                if attempt == self.retries or not is_transient(e):
+                    raise
+                self._count("retries")
+                # Exponential backoff with jitter so parallel workers do not retry in lockstep
+                time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    def search(self, query: str, **overrides):
+        """Search one query, serving it from cache when possible."""
+        params = dict(self.params, **overrides)
+        key = None
+        if self.cache is not None:
+            key = ResponseCache.key(query, params)
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("hits")
+                return cached
+
+        self._count("misses")
+        results = self._call(query, params)
+        if self.cache is not None:
+            self.cache.put(key, query, results)
+        return results
+
+    def iter_search_many(self, queries, **overrides):
+        """
+        Run queries concurrently, yielding (query, results, error) as each completes.
+
+        Duplicate queries are searched once.
+        """
+        unique = list(dict.fromkeys(queries))
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique) or 1)) as pool:
+            futures = {pool.submit(self.search, q, **overrides): q for q in unique}
+            for future in as_completed(futures):
+                query = futures[future]
+                try:
+                    yield query, future.result(), None
+                except Exception as e:
+                    yield query, [], e
+
+    def search_many(self, queries, **overrides):
+        """Run queries concurrently; returns {query: results} in input order (errors re-raised)."""
+        collected = {}
+        for query, results, error in self.iter_search_many(queries, **overrides):
+            if error is not None:
+                raise error
+            collected[query] = results
+        return {q: collected[q] for q in dict.fromkeys(queries)}
+
+    def report(self):
+        s = self.stats
+        print(f"📊 Exa cache: {s['hits']} hit(s), {s['misses']} miss(es), {s['retries']} retry(ies)")
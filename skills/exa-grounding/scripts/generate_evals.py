@@ -1,67 +1,168 @@
 import os
 import argparse
 import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from exa_search import DEFAULT_TTL, DEFAULT_WORKERS, ExaRetriever
+from ground_agent import make_retriever
+from instrument import add_arguments, session
 # Requires exa_py, python-dotenv, openai (or other LLM client)
+# In a real scenario, import your LLM client here
 
 try:
-    from exa_py import Exa
     from dotenv import load_dotenv
-    # In a real scenario, import your LLM client here
+    load_dotenv()
 except ImportError:
-    print("Missing dependencies: uv pip install exa-py python-dotenv")
-    sys.exit(1)
+    pass
+
+
+def eval_query(topic: str) -> str:
+    # Search for "exams", "interview questions", "edge cases"
+    return f"difficult interview questions and edge case scenarios for {topic} experts"
+
+
+def suite_filename(topic: str) -> str:
+    return f"verification_suite_{topic.replace(' ', '_').replace('/', '_').lower()}.md"
 
-load_dotenv()
 
-def generate_evals(topic: str, exa_key: str):
+def render_suite(topic: str, results, shared: Dict[str, str] = None) -> str:
     """
-    1. Searches Exa for "difficult interview questions" or "scenarios" for the topic.
-    2. Synthesizes them into a Markdown test plan.
+    Render a verification suite.
+
+    Args:
+        shared: url -> suite file for sources already written to another suite;
+            those are referenced instead of repeated
     """
-    print(f"🕵️‍♀️ Searching for 'Tough Scenarios' regarding: {topic}...")
-    exa = Exa(exa_key)
-    
-    # Search for "exams", "interview questions", "edge cases"
-    query = f"difficult interview questions and edge case scenarios for {topic} experts"
-    result = exa.search_and_contents(
-        query,
-        type="neural",
-        use_autoprompt=True,
-        num_results=5,
-        text=True
-    )
-    
-    # Synthesis (Simulated here, would be LLM call in production)
-    print("🧠 Synthesizing Verification Suite...")
-    
+    shared = shared or {}
     output = f"# Verification Suite: {topic}\n\n"
     output += "## Goal\nFail the agent if it relies on generic knowledge. Pass only if it cites specific, expert-level constraints found in these sources.\n\n"
-    
-    for res in result.results:
+
+    for res in results:
+        if res.url in shared:
+            output += f"### Shared Source: {res.title}\n"
+            output += f"**URL**: {res.url} (scenarios in `{shared[res.url]}`)\n\n"
+            continue
         output += f"### Scenario Source: {res.title}\n"
         output += f"**URL**: {res.url}\n"
         output += f"> Context: {res.text[:300]}...\n\n"
         output += "**Test Case**:\n- [ ] Ask Agent: <Insert Question Based on Context>\n"
         output += "- [ ] Expected: <Specific Constraint/Fact>\n"
         output += "- [ ] Anti-Pattern: <Generic Answer>\n\n"
-        
-    filename = f"verification_suite_{topic.replace(' ', '_').lower()}.md"
+    return output
+
+
+def generate_evals(topic: str, exa_key: str = None, retriever: ExaRetriever = None, output_dir: str = "."):
+    """
+    1. Searches Exa for "difficult interview questions" or "scenarios" for the topic.
+    2. Synthesizes them into a Markdown test plan.
+    """
+    print(f"🕵️‍♀️ Searching for 'Tough Scenarios' regarding: {topic}...")
+    retriever = retriever or make_retriever(exa_key)
+    results = retriever.search(eval_query(topic))
+
+    # Synthesis (Simulated here, would be LLM call in production)
+    print("🧠 Synthesizing Verification Suite...")
+    output = render_suite(topic, results)
+
+    filename = Path(output_dir) / suite_filename(topic)
     with open(filename, "w", encoding="utf-8") as f:
         f.write(output)
-        
+
     print(f"✅ Generated {filename}. Review this BEFORE creating the agent.")
 
+
+def generate_evals_many(topics: List[str], retriever: ExaRetriever, output_dir: str = ".") -> Dict[str, str]:
+    """
+    Generate suites for many topics with concurrent, cached searches.
+
+    Each suite is written as soon as its search completes. A source that
+    several topics share gets its scenario block in the first suite written
+    and a reference in the others.
+
+    Returns:
+        topic -> suite path, for topics whose search succeeded
+    """
+    topics = list(dict.fromkeys(topics))
+    by_query = {eval_query(t): t for t in topics}
+    print(f"🕵️‍♀️ Searching for 'Tough Scenarios' across {len(topics)} topic(s) "
+          f"with {retriever.max_workers} worker(s)...")
+
+    start = time.perf_counter()
+    shared = {}
+    written = {}
+    failed = []
+    for query, results, error in retriever.iter_search_many(list(by_query)):
+        topic = by_query[query]
+        if error is not None:
+            print(f"  ❌ {topic}: {error}")
+            failed.append(topic)
+            continue
+
+        filename = suite_filename(topic)
+        path = Path(output_dir) / filename
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_suite(topic, results, shared))
+        reused = sum(1 for res in results if res.url in shared)
+        for res in results:
+            shared.setdefault(res.url, filename)
+        written[topic] = str(path)
+        print(f"  ✅ {path} ({len(results) - reused} source(s), {reused} shared)")
+
+    elapsed = time.perf_counter() - start
+    print(f"\n🧠 Generated {len(written)}/{len(topics)} suite(s) from {len(shared)} unique source(s) "
+          f"in {elapsed:.1f}s. Review these BEFORE creating the agents.")
+    if failed:
+        print(f"⚠️  Failed topic(s): {', '.join(failed)}")
+    return written
+
+
+def read_topics(args) -> List[str]:
+    """Collect topics from --topic, --topics and --topics-file."""
+    topics = [args.topic] if args.topic else []
+    topics.extend(args.topics or [])
+    if args.topics_file:
+        lines = Path(args.topics_file).read_text(encoding="utf-8").splitlines()
+        topics.extend(line.strip() for line in lines if line.strip() and not line.startswith("#"))
+    return topics
+
+
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument("--topic", required=True)
+    parser.add_argument("--topic")
+    parser.add_argument("--topics", nargs="+", help="Several topics, searched concurrently")
+    parser.add_argument("--topics-file", help="File with one topic per line")
+    parser.add_argument("--output-dir", default=".", help="Directory for the generated suites")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent Exa requests")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL, help="Response cache TTL in seconds")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk response cache")
+    add_arguments(parser)
     args = parser.parse_args()
-    
+    with session(args):
+        run(parser, args)
+
+
+def run(parser, args):
+    topics = read_topics(args)
+    if not topics:
+        parser.error("--topic, --topics or --topics-file is required")
+
     key = os.getenv("EXA_API_KEY")
     if not key:
         print("❌ EXA_API_KEY required for eval generation.")
         sys.exit(1)
-        
-    generate_evals(args.topic, key)
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    retriever = make_retriever(key, use_cache=not args.no_cache, ttl=args.cache_ttl, workers=args.workers)
+    if len(topics) == 1:
+        generate_evals(topics[0], retriever=retriever, output_dir=args.output_dir)
+    else:
+        written = generate_evals_many(topics, retriever, output_dir=args.output_dir)
+        if len(written) < len(set(topics)):
+            retriever.report()
+            sys.exit(1)
+    retriever.report()
 
 if __name__ == "__main__":
     main()
@@ -1,55 +1,149 @@
 import os
 import argparse
 import sys
+from pathlib import Path
 from typing import List, Dict
 
-# Try to import required libraries, guide user if missing
+from chunking import RecursiveChunker
+from embedding_cache import DEFAULT_MAX_BYTES, CachedEmbedder, EmbeddingCache
+from embeddings import EMBEDDERS, get_embedder
+from exa_search import DEFAULT_TTL, DEFAULT_WORKERS, ExaRetriever, ResponseCache
+from ingest import ingest_file
+from instrument import add_arguments, session
+from knowledge_core import DEFAULT_MAX_TOKENS, KnowledgeCoreWriter
+
 try:
-    from exa_py import Exa
-    import vecs
     from dotenv import load_dotenv
-    # Assuming standard OpenAI for embeddings unless otherwise specified
-    # In a real scenario, we might use a lighter model or Antigravity's internal tools if available via bridge
-    # For now, we'll assume the user has OPENAI_API_KEY or we skip embedding generation in this script
-    # and just output text for the agent to embed properly.
-    # Actually, standardizing on sentence-transformers for local embedding would be better/cheaper
-    # but `vecs` often integrates with OpenAI or other providers.
-    # Let's assume standard OpenAI for simplicity of this script, or fall back to just text output.
-except ImportError as e:
-    print(f"Missing dependency: {e}")
-    print("Please run: uv pip install exa-py vecs python-dotenv openai")
-    sys.exit(1)
-
-load_dotenv()
-
-def search_exa(topic: str, api_key: str) -> str:
-    """Performs a deep neural search on Exa."""
+    load_dotenv()
+except ImportError:
+    pass
+
+# --collection values with this prefix name a directory for the local vector store
+LOCAL_PREFIX = "local:"
+
+DEFAULT_OUTPUT = "knowledge_core.md"
+
+
+def is_local(collection_name: str) -> bool:
+    return collection_name.startswith(LOCAL_PREFIX)
+
+
+# exa_py and vecs are imported where they are used, so the search helpers can
+# be driven by a local stub client without either package installed.
+def make_exa_client(api_key: str):
+    """Create the real Exa client."""
+    try:
+        from exa_py import Exa
+    except ImportError as e:
+        print(f"Missing dependency: {e}")
+        print("Please run: uv pip install exa-py vecs python-dotenv openai")
+        sys.exit(1)
+    return Exa(api_key)
+
+
+def make_retriever(api_key: str = None, client=None, use_cache: bool = True, ttl: float = DEFAULT_TTL,
+                   workers: int = DEFAULT_WORKERS) -> ExaRetriever:
+    """Build a cached, concurrent retriever around a real or stub Exa client."""
+    client = client or make_exa_client(api_key)
+    cache = ResponseCache(ttl=ttl) if use_cache else None
+    return ExaRetriever(client, cache=cache, max_workers=workers)
+
+
+def search_exa(topic: str, api_key: str = None, retriever: ExaRetriever = None,
+               output_file: str = DEFAULT_OUTPUT, max_tokens: int = DEFAULT_MAX_TOKENS) -> dict:
+    """Performs a deep neural search on Exa and streams the results to a knowledge core."""
     print(f"🔍 Searching Exa for: '{topic}'...")
-    exa = Exa(api_key)
+    retriever = retriever or make_retriever(api_key)
     
     # "Neural" search with autoprompt is best for broad concept grounding
-    result = exa.search_and_contents(
-        topic,
-        type="neural",
-        use_autoprompt=True,
-        num_results=5,
-        text=True
-    )
-    
-    knowledge_core = f"# Knowledge Core: {topic}\n\n"
+    results = retriever.search(topic)
     
-    for res in result.results:
-        print(f"  - Found: {res.title}")
-        knowledge_core += f"## Source: {res.title}\n"
-        knowledge_core += f"**URL**: {res.url}\n\n"
-        knowledge_core += f"{res.text[:5000]}... [truncated]\n\n" # Truncate to avoid massive context overhead
-        
-    return knowledge_core
+    with KnowledgeCoreWriter(output_file, topic, max_tokens, expected_sources=len(results)) as core:
+        for res in results:
+            print(f"  - Found: {res.title}")
+            core.add_source(res)
+    core.report()
+    if failed:
+        print(f"⚠️  Failed quer(ies): {', '.join(failed)}")
+    return dict(core.stats, failed_queries=failed)
+
+
+def search_exa_batch(topic: str, queries: List[str], api_key: str = None, retriever: ExaRetriever = None,
+                     output_file: str = DEFAULT_OUTPUT, max_tokens: int = DEFAULT_MAX_TOKENS) -> dict:
+    """
+    Run several sub-queries concurrently and stream them into one knowledge core.
 
-def upsert_vectors(file_path: str, collection_name: str, supabase_url: str, supabase_key: str):
-    """Chunks and upserts knowledge to Supabase."""
-    print(f"💾 Upserting {file_path} to Supabase collection '{collection_name}'...")
+    Each query's sources are written as soon as it completes. Sources returned
+    by more than one query are only included once, and passages repeated
+    across sources are dropped. A query that still fails after its retries is
+    reported and skipped, and listed under "failed_queries" in the result.
+    """
+    print(f"🔍 Searching Exa for {len(queries)} quer(ies) on '{topic}'...")
+    retriever = retriever or make_retriever(api_key)
+    per_query = retriever.params.get("num_results", 1)
+    pending = len(dict.fromkeys(queries))
     
+    seen_urls = set()
+    failed = []
+    with KnowledgeCoreWriter(output_file, topic, max_tokens, expected_sources=pending * per_query) as core:
+        for query, results, error in retriever.iter_search_many(queries):
+            pending -= 1
+            if error is not None:
+                print(f"  ❌ {query}: {error}")
+                failed.append(query)
+                continue
+            core.add_heading(f"Query: {query}")
+            fresh = [res for res in results if res.url not in seen_urls]
+            # This query's sources share the budget with the results still expected from the others
+            core.expect(len(fresh) + pending * per_query)
+            for res in fresh:
+                seen_urls.add(res.url)
+                print(f"  - Found: {res.title}")
+                core.add_source(res)
+    core.report()
+    if failed:
+        print(f"⚠️  Failed quer(ies): {', '.join(failed)}")
+    return dict(core.stats, failed_queries=failed)
+
+
+def read_queries(args) -> List[str]:
+    """Collect sub-queries from --queries and --queries-file."""
+    queries = list(args.queries or [])
+    if args.queries_file:
+        lines = Path(args.queries_file).read_text(encoding="utf-8").splitlines()
+        queries.extend(line.strip() for line in lines if line.strip() and not line.startswith("#"))
+    return queries
+
+def make_embedder(name: str, use_cache: bool = True, max_bytes: int = DEFAULT_MAX_BYTES):
+    """Build an embedding adapter, wrapped in the shared embedding cache unless disabled."""
+    embedder = get_embedder(name)
+    if not use_cache:
+        return embedder
+    return CachedEmbedder(embedder, EmbeddingCache(max_bytes=max_bytes))
+
+
+def report_embedder(embedder):
+    if isinstance(embedder, CachedEmbedder):
+        embedder.cache.report()
+        embedder.cache.close()
+
+
+def open_collection(collection_name: str, dimension: int):
+    """
+    Open a vector collection with the vecs interface.
+
+    'local:<dir>' selects the embedded on-disk store; anything else is a
+    Supabase (vecs) collection name.
+    """
+    if is_local(collection_name):
+        try:
+            from local_index import LocalCollection
+        except ImportError as e:
+            print(f"Missing dependency: {e}")
+            print("Please run: uv pip install numpy")
+            sys.exit(1)
+        return LocalCollection(Path(collection_name[len(LOCAL_PREFIX):]).expanduser(), dimension)
+
     # Connect to Supabase Vector
     # Note: vecs connects via Postgres connection string, not URL/Key directly usually.
     # We construct the connection string from standard Supabase params if possible
@@ -59,64 +153,140 @@ def upsert_vectors(file_path: str, collection_name: str, supabase_url: str, supa
          print("❌ Error: DB_CONNECTION environment variable required for Supabase Vector.")
          sys.exit(1)
 
+    try:
+        import vecs
+    except ImportError as e:
+        print(f"Missing dependency: {e}")
+        print("Please run: uv pip install exa-py vecs python-dotenv openai")
+        sys.exit(1)
+
     vx = vecs.create_client(db_connection)
-    docs = vx.get_or_create_collection(name=collection_name, dimension=1536) # Standard OpenAI dimension
+    return vx.get_or_create_collection(name=collection_name, dimension=dimension)
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    # Naive chunking by double newline (paragraphs)
-    # In production, use a proper text splitter (RecursiveCharacterTextSplitter)
-    chunks = content.split("\n\n")
-    
-    vectors = []
-    # NOTE: This script assumes you have a way to generate embeddings. 
-    # For this simplified version, we will placeholder the embedding generation
-    # or rely on the `vecs` adapter if configured (vecs handles orchestration if you pass an adapter).
-    # Since we didn't set up an adapter, we'll just warn the user.
-    
-    print("⚠️  Warning: Embedding generation requires a configured adapter in this script.")
-    print("⚠️  For now, just verifying connection and content read.")
-    print(f"ℹ️  Read {len(chunks)} chunks from knowledge core.")
-    
-    # Real implementation would loop chunks, call OpenAI/Gemini embedding API, and upsert.
-    # docs.upsert(records=[(id, vec, meta), ...])
+
+def upsert_vectors(file_path: str, collection_name: str, supabase_url: str, supabase_key: str,
+                   embedder_name: str = "openai", chunk_tokens: int = 400, overlap_tokens: int = 50,
+                   batch_size: int = 64, upsert_batch_size: int = 256, create_index: bool = False,
+                   embedder=None):
+    """Chunks, embeds and upserts knowledge to Supabase or a local collection."""
+    store = "local store" if is_local(collection_name) else "Supabase collection"
+    print(f"💾 Upserting {file_path} to {store} '{collection_name}'...")
+
+    embedder = embedder or get_embedder(embedder_name)
+    chunker = RecursiveChunker(chunk_tokens=chunk_tokens, overlap_tokens=overlap_tokens)
+    docs = open_collection(collection_name, embedder.dimension)
+
+    stats = ingest_file(file_path, docs, embedder, chunker,
+                        embed_batch_size=batch_size, upsert_batch_size=upsert_batch_size)
     
-    print("✅ Connection relevant. Knowledge Core ready for embedding.")
+    embed_calls = embedder.calls if isinstance(embedder, CachedEmbedder) else stats["embed_calls"]
+    print(f"ℹ️  {stats['chunks']} chunks: {stats['embedded']} embedded in {embed_calls} call(s), "
+          f"{stats['skipped']} unchanged, {stats['upserted']} upserted in {stats['upsert_calls']} batch(es)")
+
+    if create_index:
+        print("🗂️  Building vector index...")
+        docs.create_index()
+
+    print(f"✅ Knowledge Core grounded in '{collection_name}' ({embedder.model}).")
+
+
+def query_vectors(query: str, collection_name: str, embedder_name: str = "openai", limit: int = 5,
+                  embedder=None):
+    """Embed a query and print the closest chunks from either store."""
+    embedder = embedder or get_embedder(embedder_name)
+    docs = open_collection(collection_name, embedder.dimension)
+    vector = embedder.embed([query])[0]
+
+    results = docs.query(data=vector, limit=limit, include_value=True, include_metadata=True)
+    for rank, (record_id, distance, metadata) in enumerate(results, start=1):
+        print(f"{rank}. [{1 - distance:.3f}] {metadata.get('heading', '')} ({record_id})")
+        print(f"   {metadata.get('text', '')[:200]}")
+    return results
 
 def main():
     parser = argparse.ArgumentParser(description="Exa Grounding Agent Script")
-    parser.add_argument("--action", choices=["search", "vector"], required=True)
+    parser.add_argument("--action", choices=["search", "vector", "query"], required=True)
     parser.add_argument("--topic", help="Topic to research")
     parser.add_argument("--file", help="File to upsert")
-    parser.add_argument("--collection", default="agent_knowledge", help="Vector collection name")
+    parser.add_argument("--collection", default="agent_knowledge",
+                        help="Vector collection name, or local:<dir> for the embedded local store")
+    parser.add_argument("--queries", nargs="+", help="Sub-queries to search concurrently (batch mode)")
+    parser.add_argument("--queries-file", help="File with one sub-query per line (batch mode)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent Exa requests")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_TTL, help="Response cache TTL in seconds")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the on-disk response cache")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Knowledge core file written by --action search")
+    parser.add_argument("--max-tokens", type=int, default=DEFAULT_MAX_TOKENS,
+                        help="Token budget for the whole knowledge core, shared across sources")
+    parser.add_argument("--embedder", choices=list(EMBEDDERS), default="openai",
+                        help="Embedding adapter ('hash' is a deterministic local adapter)")
+    parser.add_argument("--chunk-tokens", type=int, default=400, help="Maximum tokens per chunk")
+    parser.add_argument("--overlap-tokens", type=int, default=50, help="Tokens shared by neighbouring chunks")
+    parser.add_argument("--batch-size", type=int, default=64, help="Chunks per embedding call")
+    parser.add_argument("--no-embedding-cache", action="store_true",
+                        help="Bypass the shared on-disk embedding cache")
+    parser.add_argument("--embedding-cache-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        help="Size limit of the embedding cache before LRU eviction")
+    parser.add_argument("--create-index", action="store_true", help="Build a vector index after upserting")
+    parser.add_argument("--query", help="Text to retrieve matching chunks for (--action query)")
+    parser.add_argument("--limit", type=int, default=5, help="Number of chunks to return (--action query)")
     
+    add_arguments(parser)
     args = parser.parse_args()
-    
+    with session(args):
+        run(args)
+
+
+def run(args):
     exa_key = os.getenv("EXA_API_KEY")
     
     if args.action == "search":
-        if not args.topic:
+        queries = read_queries(args)
+        if not args.topic and not queries:
             print("Error: --topic required for search")
             sys.exit(1)
         if not exa_key:
             print("Error: EXA_API_KEY not set")
             sys.exit(1)
-            
-        content = search_exa(args.topic, exa_key)
-        
-        output_file = "knowledge_core.md"
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(content)
         
-        print(f"✅ Knowledge synthesis saved to {output_file}")
+        retriever = make_retriever(exa_key, use_cache=not args.no_cache, ttl=args.cache_ttl,
+                                   workers=args.workers)
+        failed = []
+        if queries:
+            stats = search_exa_batch(args.topic or queries[0], queries, retriever=retriever,
+                                     output_file=args.output, max_tokens=args.max_tokens)
+            failed = stats["failed_queries"]
+        else:
+            search_exa(args.topic, retriever=retriever, output_file=args.output, max_tokens=args.max_tokens)
+        retriever.report()
+
+        if failed:
+            print(f"⚠️  Partial knowledge synthesis saved to {args.output}")
+            sys.exit(1)
+        print(f"✅ Knowledge synthesis saved to {args.output}")
         
     elif args.action == "vector":
         if not args.file:
              print("Error: --file required for vector upsert")
              sys.exit(1)
         
-        upsert_vectors(args.file, args.collection, "", "")
+        embedder = make_embedder(args.embedder, use_cache=not args.no_embedding_cache,
+                                 max_bytes=args.embedding_cache_mb * 1024 * 1024)
+        upsert_vectors(args.file, args.collection, "", "", embedder_name=args.embedder,
+                       chunk_tokens=args.chunk_tokens, overlap_tokens=args.overlap_tokens,
+                       batch_size=args.batch_size, create_index=args.create_index, embedder=embedder)
+        report_embedder(embedder)
+    
+    elif args.action == "query":
+        if not args.query:
+            print("Error: --query required for retrieval")
+            sys.exit(1)
+        
+        embedder = make_embedder(args.embedder, use_cache=not args.no_embedding_cache,
+                                 max_bytes=args.embedding_cache_mb * 1024 * 1024)
+        query_vectors(args.query, args.collection, embedder_name=args.embedder, limit=args.limit,
+                      embedder=embedder)
+        report_embedder(embedder)
 
 if __name__ == "__main__":
     main()
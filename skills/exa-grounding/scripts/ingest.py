@@ -0,0 +1,86 @@
+"""
+Streaming chunk -> embed -> upsert pipeline.
+
+Chunks are keyed by content hash. Before each embedding batch the collection
+is asked which of those ids it already holds, and only the missing chunks
+are embedded, so re-ingesting a mostly unchanged knowledge core costs
+almost nothing. Records are flushed with `upsert` in fixed-size batches,
+which keeps memory bounded regardless of the size of the input file.
+"""
+
+from itertools import islice
+
+from instrument import span
+
+
+def iter_batches(iterable, size: int):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def existing_ids(collection, ids):
+    """Ids from `ids` that the collection already stores (vecs-style fetch)."""
+    if not ids:
+        return set()
+    return {record[0] for record in collection.fetch(ids=ids)}
+
+
+def ingest_file(path, collection, embedder, chunker, source: str = None,
+                embed_batch_size: int = 64, upsert_batch_size: int = 256):
+    """
+    Chunk a file, embed new chunks in batches and bulk-upsert them.
+
+    Args:
+        collection: Object with vecs-style `fetch(ids=...)` and `upsert(records=...)`
+        embedder: Adapter with `embed(texts)` (see embeddings.py)
+        chunker: RecursiveChunker (see chunking.py)
+
+    Returns:
+        Stats dict: chunks, skipped, embedded, upserted, embed_calls, upsert_calls
+    """
+    source = source or str(path)
+    stats = {"chunks": 0, "skipped": 0, "embedded": 0, "upserted": 0, "embed_calls": 0, "upsert_calls": 0}
+    seen = set()
+    pending = []
+
+    def flush():
+        with span("ingest.upsert", records=len(pending)):
+            collection.upsert(records=pending)
+        stats["upserted"] += len(pending)
+        stats["upsert_calls"] += 1
+        pending.clear()
+
+    for batch in iter_batches(chunker.iter_file(path), embed_batch_size):
+        stats["chunks"] += len(batch)
+
+        # Identical text inside the file (or already handled this run) is embedded once
+        fresh = {}
+        for chunk in batch:
+            if chunk.id not in seen and chunk.id not in fresh:
+                fresh[chunk.id] = chunk
+        with span("ingest.fetch_existing", ids=len(fresh)):
+            stored = existing_ids(collection, list(fresh))
+        todo = [chunk for chunk_id, chunk in fresh.items() if chunk_id not in stored]
+        seen.update(fresh)
+        stats["skipped"] += len(batch) - len(todo)
+
+        if todo:
+            with span("ingest.embed", texts=len(todo)):
+                vectors = embedder.embed([chunk.text for chunk in todo])
+            stats["embed_calls"] += 1
+            stats["embedded"] += len(todo)
+            pending.extend((chunk.id, vector, chunk.metadata(source)) for chunk, vector in zip(todo, vectors))
+
+        while len(pending) >= upsert_batch_size:
+            overflow = pending[upsert_batch_size:]
+            del pending[upsert_batch_size:]
+            flush()
+            pending.extend(overflow)
+
+    if pending:
+        flush()
+    return stats
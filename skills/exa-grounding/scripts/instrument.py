@@ -0,0 +1,41 @@
+"""
+Timing spans for the grounding scripts.
+
+Re-exports the repository's scripts/tracing.py when the skill runs from (or
+is symlinked into) a mapache-skills checkout. Installed on its own, the
+skill falls back to no-op spans and counters, and --trace/--profile are
+simply not offered.
+"""
+
+import contextlib
+import sys
+from pathlib import Path
+
+_REPO_SCRIPTS = Path(__file__).resolve().parents[3] / "scripts"
+
+try:
+    import tracing
+except ImportError:
+    if (_REPO_SCRIPTS / "tracing.py").exists():
+        sys.path.append(str(_REPO_SCRIPTS))
+        import tracing
+    else:
+        tracing = None
+
+if tracing is not None:
+    from tracing import add_arguments, count, session, span, traced
+else:
+    def span(name: str, **args):
+        return contextlib.nullcontext()
+
+    def traced(name: str = None):
+        return lambda fn: fn
+
+    def count(name: str, value: int = 1):
+        pass
+
+    def add_arguments(parser):
+        return parser
+
+    def session(args):
+        return contextlib.nullcontext()
@@ -0,0 +1,270 @@
+"""
+Streaming knowledge-core writer with near-duplicate elimination.
+
+Sources are written to disk as they arrive instead of being collected into
+one string. Each source is split into paragraphs (passages), and a passage
+is dropped when it nearly duplicates one already written. Near-duplicates
+are found with MinHash signatures over word shingles and banded LSH, so
+syndicated and mirrored pages, and boilerplate repeated across sites,
+appear only once. A source with nothing new left is written as a
+reference to the source it duplicates.
+
+The core has one token budget, shared across the sources expected in the
+run. Each source can use an even share of what is left, so budget unused by
+short or duplicate sources goes to the sources after them. Only kept
+passages are indexed, which keeps memory bounded by the budget rather than
+by the amount retrieved.
+"""
+
+import hashlib
+import re
+
+from chunking import default_tokenizer
+from instrument import count, span
+
+# Whole-core token budget; about what the old 5,000-character cut allowed for 25 sources
+DEFAULT_MAX_TOKENS = 30000
+
+# Words per shingle
+SHINGLE_WORDS = 5
+NUM_PERM = 64
+LSH_BANDS = 16
+# Estimated Jaccard similarity at which a passage counts as a duplicate
+DEFAULT_THRESHOLD = 0.8
+
+TRUNCATED = "... [truncated]"
+
+_MERSENNE = (1 << 61) - 1
+_WORD_RE = re.compile(r"\w+")
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+
+def _hash64(data: str) -> int:
+    return int.from_bytes(hashlib.blake2b(data.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, using universal hashes mod a Mersenne prime."""
+
+    def __init__(self, num_perm: int = NUM_PERM, shingle_words: int = SHINGLE_WORDS, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_words = shingle_words
+        # A small LCG keeps the permutations identical across runs and platforms
+        state = seed
+        self._perms = []
+        for _ in range(num_perm):
+            state = (state * 6364136223846793005 + 1442695040888963407) & 0xFFFFFFFFFFFFFFFF
+            a = state % _MERSENNE or 1
+            state = (state * 6364136223846793005 + 1442695040888963407) & 0xFFFFFFFFFFFFFFFF
+            self._perms.append((a, state % _MERSENNE))
+
+    def shingles(self, words):
+        n = self.shingle_words
+        if len(words) <= n:
+            return {_hash64(" ".join(words))}
+        return {_hash64(" ".join(words[i:i + n])) for i in range(len(words) - n + 1)}
+
+    def signature(self, words):
+        hashes = self.shingles(words)
+        return tuple(min((a * h + b) % _MERSENNE for h in hashes) for a, b in self._perms)
+
+
+def similarity(sig_a, sig_b) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class LSHIndex:
+    """Banded LSH: signatures sharing any whole band are candidate duplicates."""
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = LSH_BANDS):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets = [{} for _ in range(bands)]
+        self.signatures = []
+
+    def _band_keys(self, sig):
+        r = self.rows
+        return [hash(sig[i * r:(i + 1) * r]) for i in range(self.bands)]
+
+    def candidates(self, sig):
+        found = set()
+        for bucket, key in zip(self._buckets, self._band_keys(sig)):
+            found.update(bucket.get(key, ()))
+        return found
+
+    def add(self, sig, ref) -> int:
+        item = len(self.signatures)
+        self.signatures.append((sig, ref))
+        for bucket, key in zip(self._buckets, self._band_keys(sig)):
+            bucket.setdefault(key, []).append(item)
+        return item
+
+    def find(self, sig, threshold: float):
+        """The ref of the best indexed signature at or above threshold, or None."""
+        best, best_score = None, threshold
+        for item in self.candidates(sig):
+            other, ref = self.signatures[item]
+            score = similarity(sig, other)
+            if score >= best_score:
+                best, best_score = ref, score
+        return best
+
+
+def passages(text: str):
+    return [p.strip() for p in _PARAGRAPH_RE.split(text or "") if p.strip()]
+
+
+class KnowledgeCoreWriter:
+    """
+    Write a knowledge core source by source, dropping near-duplicate passages
+    and spreading one token budget over the expected sources.
+
+    Usage:
+        with KnowledgeCoreWriter(path, topic, expected_sources=10) as core:
+            for res in results:
+                core.add_source(res)
+        print(core.stats)
+    """
+
+    def __init__(self, path, topic: str, max_tokens: int = DEFAULT_MAX_TOKENS, expected_sources: int = 1,
+                 threshold: float = DEFAULT_THRESHOLD, tokenizer=None, hasher: MinHasher = None):
+        self.path = path
+        self.topic = topic
+        self.max_tokens = max_tokens
+        self.threshold = threshold
+        self.tokenizer = tokenizer or default_tokenizer()
+        self.hasher = hasher or MinHasher()
+        self.index = LSHIndex(self.hasher.num_perm)
+        self._expected = max(1, expected_sources)
+        self._exact = {}  # normalised passage hash -> url
+        self._file = None
+        self.stats = {"sources": 0, "duplicate_sources": 0, "passages": 0, "dropped_passages": 0,
+                      "truncated_sources": 0, "tokens": 0}
+
+    def __enter__(self):
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._write(f"# Knowledge Core: {self.topic}\n\n")
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, text: str, tokens: int = None):
+        self._file.write(text)
+        # Headings count against the budget too
+        self.stats["tokens"] += self.tokenizer.count(text) if tokens is None else tokens
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.max_tokens - self.stats["tokens"])
+
+    def add_heading(self, text: str):
+        self._write(f"# {text}\n\n")
+
+    def expect(self, sources: int):
+        """Tell the writer how many more sources are coming, so the budget is split over them."""
+        self._expected = max(1, sources)
+
+    def _duplicate_of(self, words):
+        """
+        (url of the kept passage these words duplicate, None), or
+        (None, key to record once the passage is kept).
+        """
+        exact = hashlib.sha1(" ".join(words).encode("utf-8")).hexdigest()
+        if exact in self._exact:
+            return self._exact[exact], None
+        sig = None
+        if len(words) >= self.hasher.shingle_words:
+            sig = self.hasher.signature(words)
+            match = self.index.find(sig, self.threshold)
+            if match is not None:
+                return match, None
+        return None, (exact, sig)
+
+    def _remember(self, key, url):
+        exact, sig = key
+        self._exact[exact] = url
+        if sig is not None:
+            self.index.add(sig, url)
+
+    def add_source(self, res):
+        """Dedupe, budget and write one source (anything with title, url and text)."""
+        with span("core.source", url=res.url):
+            heading = f"## Source: {res.title}\n"
+            url_line = f"**URL**: {res.url}\n\n"
+            # The heading, URL and a possible truncation marker are paid for out of the source's share
+            overhead = sum(self.tokenizer.count(text) for text in (heading, url_line, TRUNCATED, "\n\n"))
+            allowance = max(0, self.remaining // self._expected - overhead)
+            self._expected = max(1, self._expected - 1)
+            self.stats["sources"] += 1
+            if overhead > self.remaining:
+                self.stats["truncated_sources"] += 1
+                return False
+
+            kept, duplicates = [], {}
+            spent = 0
+            separator = self.tokenizer.count("\n\n")
+            truncated = False
+            for passage in passages(res.text):
+                words = _WORD_RE.findall(passage.lower())
+                if not words:
+                    continue
+                match, key = self._duplicate_of(words)
+                if match is not None:
+                    duplicates[match] = duplicates.get(match, 0) + 1
+                    self.stats["dropped_passages"] += 1
+                    count("core.dropped_passages")
+                    continue
+                tokens = self.tokenizer.count(passage) + (separator if kept else 0)
+                if spent + tokens > allowance:
+                    truncated = True
+                    # Cut the first passage that does not fit, unless nothing of it would fit
+                    room = allowance - spent - (separator if kept else 0)
+                    if room > 20:
+                        cut = passage.split()
+                        keep = max(1, len(cut) * room // tokens)
+                        while keep > 1 and self.tokenizer.count(" ".join(cut[:keep])) > room:
+                            keep -= 1
+                        passage = " ".join(cut[:keep])
+                        spent += self.tokenizer.count(passage) + (separator if kept else 0)
+                        kept.append(passage)
+                        # A later mirror of the whole passage is still a duplicate of this source
+                        self._remember(key, res.url)
+                    break
+                kept.append(passage)
+                spent += tokens
+                self._remember(key, res.url)
+
+            self.stats["passages"] += len(kept)
+            if not kept and duplicates:
+                self.stats["duplicate_sources"] += 1
+                original = max(duplicates, key=duplicates.get)
+                note = f"**URL**: {res.url} (duplicates {original})\n\n"
+                if self.tokenizer.count(heading) + self.tokenizer.count(note) <= self.remaining:
+                    url_line = note
+                self._write(heading)
+                self._write(url_line)
+                return False
+            self._write(heading)
+            self._write(url_line)
+            if kept:
+                self._write("\n\n".join(kept), spent)
+            if truncated:
+                self.stats["truncated_sources"] += 1
+                self._write(TRUNCATED)
+            self._write("\n\n")
+            return True
+
+    def report(self):
+        s = self.stats
+        print(f"📚 Knowledge core: {s['sources']} source(s), {s['tokens']} tokens "
+              f"(budget {self.max_tokens}), {s['dropped_passages']} duplicate passage(s) dropped, "
+              f"{s['duplicate_sources']} duplicate source(s), {s['truncated_sources']} truncated")
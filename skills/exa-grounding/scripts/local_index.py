@@ -0,0 +1,294 @@
+"""
+Local, embedded vector store with a vecs-compatible collection interface.
+
+Layout of a collection directory:
+    collection.json  dimension and metric
+    vectors.f32      row-major float32 matrix, memory-mapped for search
+    meta.jsonl       append-only (row, id, metadata) log; last entry per row wins
+    ivf.npz          optional IVF index (centroids + row assignments)
+
+Vectors are L2-normalised on insert, so cosine search is a single
+matrix-vector product. Brute force is used by default; `create_index()`
+builds an IVF (k-means) index that restricts search to the closest lists
+for larger collections. Rows added after the index was built are always
+searched exhaustively, so the index never hides new data.
+
+Requires numpy.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+from instrument import traced
+
+# Below this many rows an IVF index is slower than brute force
+MIN_INDEX_ROWS = 2048
+
+
+class LocalCollection:
+    def __init__(self, path, dimension: int = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._config_path = self.path / "collection.json"
+        self._vectors_path = self.path / "vectors.f32"
+        self._meta_path = self.path / "meta.jsonl"
+        self._index_path = self.path / "ivf.npz"
+
+        if self._config_path.exists():
+            config = json.loads(self._config_path.read_text(encoding="utf-8"))
+            if dimension is not None and dimension != config["dimension"]:
+                raise ValueError(f"Collection {self.path} has dimension {config['dimension']}, not {dimension}")
+            self.dimension = config["dimension"]
+        else:
+            if dimension is None:
+                raise ValueError(f"No collection at {self.path}; a dimension is required to create one")
+            self.dimension = dimension
+            self._config_path.write_text(json.dumps({"dimension": dimension, "metric": "cosine"}), encoding="utf-8")
+
+        self.ids = []          # row -> id (None once deleted)
+        self.metadata = []     # row -> metadata
+        self.rows = {}         # id -> row
+        if self._meta_path.exists():
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    self._set_row(entry["row"], entry["id"], entry.get("metadata") or {})
+
+        # A crash mid-write can leave the log ahead of the vectors; rows without a vector are dropped
+        stored = self._vectors_path.stat().st_size // self._row_bytes if self._vectors_path.exists() else 0
+        if stored < len(self.ids):
+            for row in range(stored, len(self.ids)):
+                self._set_row(row, None, {})
+            del self.ids[stored:], self.metadata[stored:]
+
+        self._matrix = None
+        self._index = None
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dimension * np.dtype(np.float32).itemsize
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _set_row(self, row: int, record_id, metadata):
+        while len(self.ids) <= row:
+            self.ids.append(None)
+            self.metadata.append({})
+        old = self.ids[row]
+        if old is not None and self.rows.get(old) == row:
+            del self.rows[old]
+        self.ids[row] = record_id
+        self.metadata[row] = metadata
+        if record_id is not None:
+            self.rows[record_id] = row
+
+    @property
+    def matrix(self):
+        """Read-only memory map of all rows (reopened after writes)."""
+        if self._matrix is None:
+            n = len(self.ids)
+            if n == 0:
+                return np.empty((0, self.dimension), dtype=np.float32)
+            self._matrix = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(n, self.dimension))
+        return self._matrix
+
+    @staticmethod
+    def _normalise(vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    @traced("local_index.upsert")
+    def upsert(self, records):
+        """Insert or replace (id, vector, metadata) records."""
+        # The last record for an id wins, as if the batch were upserted one record at a time
+        records = list(records)
+        latest = {r[0]: i for i, r in enumerate(records)}
+        records = [records[i] for i in sorted(latest.values())]
+        if not records:
+            return
+        vectors = self._normalise([r[1] for r in records])
+        if vectors.shape[1] != self.dimension:
+            raise ValueError(f"Expected vectors of dimension {self.dimension}, got {vectors.shape[1]}")
+
+        self._matrix = None
+        updates = [(self.rows[r[0]], i) for i, r in enumerate(records) if r[0] in self.rows]
+        if updates:
+            mm = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=(len(self.ids), self.dimension))
+            for row, i in updates:
+                mm[row] = vectors[i]
+            mm.flush()
+            del mm
+            self._reassign(np.array([row for row, _ in updates]), vectors[[i for _, i in updates]])
+
+        updated = {i for _, i in updates}
+        appended = [i for i in range(len(records)) if i not in updated]
+        # Write at the offset the log expects, dropping any rows a crashed write left past the end
+        offset = len(self.ids) * self._row_bytes
+        with open(self._vectors_path, "r+b" if self._vectors_path.exists() else "wb") as f:
+            f.truncate(offset)
+            f.seek(offset)
+            f.write(vectors[appended].tobytes())
+
+        with open(self._meta_path, "a", encoding="utf-8") as f:
+            next_row = len(self.ids)
+            for i, (record_id, _, metadata) in enumerate(records):
+                row = self.rows[record_id] if i in updated else next_row
+                if i not in updated:
+                    next_row += 1
+                self._set_row(row, record_id, metadata or {})
+                f.write(json.dumps({"row": row, "id": record_id, "metadata": metadata or {}}) + "\n")
+
+    def fetch(self, ids):
+        """Return (id, vector, metadata) for the ids that exist."""
+        out = []
+        for record_id in ids:
+            row = self.rows.get(record_id)
+            if row is not None:
+                out.append((record_id, np.array(self.matrix[row]), self.metadata[row]))
+        return out
+
+    def delete(self, ids):
+        with open(self._meta_path, "a", encoding="utf-8") as f:
+            for record_id in ids:
+                row = self.rows.get(record_id)
+                if row is not None:
+                    self._set_row(row, None, {})
+                    f.write(json.dumps({"row": row, "id": None}) + "\n")
+
+    @traced("local_index.create_index")
+    def create_index(self, lists: int = None, iterations: int = 10, seed: int = 0):
+        """
+        Build an IVF index: k-means centroids plus a list assignment per row.
+
+        Defaults to ~sqrt(N) lists, the usual balance between list scans and
+        centroid comparisons.
+        """
+        matrix = self.matrix
+        n = matrix.shape[0]
+        if n < MIN_INDEX_ROWS:
+            print(f"ℹ️  {n} rows: brute-force search is faster than an index; skipping")
+            return
+        lists = lists or max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        centroids = np.array(matrix[rng.choice(n, size=lists, replace=False)])
+
+        for _ in range(iterations):
+            assignments = self._assign(matrix, centroids)
+            for k in range(lists):
+                members = matrix[assignments == k]
+                if len(members):
+                    centroids[k] = members.mean(axis=0)
+            centroids = self._normalise(centroids)
+
+        assignments = self._assign(matrix, centroids)
+        # Inverted lists: rows grouped by list, with offsets[k]:offsets[k + 1] spanning list k
+        order = np.argsort(assignments, kind="stable").astype(np.int64)
+        offsets = np.searchsorted(assignments[order], np.arange(lists + 1))
+        np.savez(self._index_path, centroids=centroids, order=order, offsets=offsets)
+        self._index = None
+
+    def _reassign(self, rows, vectors):
+        """Move updated rows to the IVF list of their nearest centroid."""
+        index = self.index
+        if index is None:
+            return
+        centroids, order, offsets = index
+        indexed = rows < len(order)
+        if not indexed.any():
+            return  # rows added after indexing are scanned anyway
+        assignments = np.empty(len(order), dtype=np.int64)
+        assignments[order] = np.repeat(np.arange(len(centroids)), np.diff(offsets))
+        assignments[rows[indexed]] = np.argmax(vectors[indexed] @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable").astype(np.int64)
+        offsets = np.searchsorted(assignments[order], np.arange(len(centroids) + 1))
+        np.savez(self._index_path, centroids=centroids, order=order, offsets=offsets)
+        self._index = (centroids, order, offsets)
+
+    @staticmethod
+    def _assign(matrix, centroids, block: int = 65536):
+        """Nearest centroid per row, computed in blocks to bound memory."""
+        out = np.empty(matrix.shape[0], dtype=np.int64)
+        for start in range(0, matrix.shape[0], block):
+            out[start:start + block] = np.argmax(matrix[start:start + block] @ centroids.T, axis=1)
+        return out
+
+    @property
+    def index(self):
+        if self._index is None and self._index_path.exists():
+            data = np.load(self._index_path)
+            self._index = (data["centroids"], data["order"], data["offsets"])
+        return self._index
+
+    def _candidate_rows(self, q, probes):
+        """Rows to score: members of the closest IVF lists plus anything added since indexing."""
+        index = self.index
+        if index is None:
+            return None
+        centroids, order, offsets = index
+        probes = min(probes or max(1, int(np.sqrt(len(centroids)))), len(centroids))
+        nearest = np.argpartition(-(centroids @ q), probes - 1)[:probes]
+        lists = [order[offsets[k]:offsets[k + 1]] for k in nearest]
+        tail = np.arange(len(order), len(self.ids))
+        return np.concatenate(lists + [tail])
+
+    @traced("local_index.query")
+    def query(self, data, limit: int = 10, filters: dict = None, include_value: bool = False,
+              include_metadata: bool = False, probes: int = None, **kwargs):
+        """
+        Top-k cosine search, vecs-style.
+
+        Returns:
+            ids, or tuples (id, distance[, metadata]) depending on the include_* flags
+        """
+        matrix = self.matrix
+        if matrix.shape[0] == 0:
+            return []
+        q = self._normalise(data)
+
+        rows = self._candidate_rows(q, probes)
+        scores = (matrix @ q) if rows is None else (matrix[rows] @ q)
+        if rows is None:
+            rows = np.arange(matrix.shape[0])
+
+        # Skip the per-row Python check in the common case: no filters, no deletions
+        if filters or len(self.rows) != len(self.ids):
+            live = np.array([self.ids[r] is not None and _matches(self.metadata[r], filters) for r in rows],
+                            dtype=bool)
+            rows, scores = rows[live], scores[live]
+        if len(rows) == 0:
+            return []
+
+        k = min(limit, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        results = []
+        for i in top:
+            row = rows[i]
+            if not include_value and not include_metadata:
+                results.append(self.ids[row])
+                continue
+            item = (self.ids[row],)
+            if include_value:
+                item += (float(1.0 - scores[i]),)
+            if include_metadata:
+                item += (self.metadata[row],)
+            results.append(item)
+        return results
+
+
+def _matches(metadata: dict, filters: dict) -> bool:
+    """Subset of the vecs filter syntax: {"key": {"$eq": value}} or {"key": value}."""
+    if not filters:
+        return True
+    for key, cond in filters.items():
+        expected = cond.get("$eq") if isinstance(cond, dict) else cond
+        if metadata.get(key) != expected:
+            return False
+    return True
+
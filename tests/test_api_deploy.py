@@ -0,0 +1,145 @@
+import json
+import sys
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from api_deploy import SkillsApiClient, deploy_to_api  # noqa: E402
+
+
+class MockSkillsApi(ThreadingHTTPServer):
+    """In-memory /v1/skills: lists, creates and versions skills, with scripted failures."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), MockHandler)
+        self.skills = {}      # id -> skill object
+        self.requests = []    # (method, path, form fields, uploaded filenames)
+        self.failures = []    # statuses to answer the next POSTs with
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.requests.append(("GET", self.path, {}, []))
+            data = list(self.server.skills.values())
+        self._reply(200, {"data": data, "has_more": False, "next_page": None})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        message = BytesParser(policy=HTTP).parsebytes(
+            f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("ascii") + body)
+        fields, files = {}, []
+        for part in message.iter_parts():
+            if part.get_filename():
+                files.append(part.get_filename())
+            else:
+                fields[part.get_param("name", header="content-disposition")] = part.get_content()
+        with self.server.lock:
+            self.server.requests.append(("POST", self.path, fields, files))
+            if self.server.failures:
+                status = self.server.failures.pop(0)
+                return self._reply(status, {"error": {"message": f"scripted {status}"}})
+            if self.path == "/v1/skills":
+                skill_id = f"skill_{len(self.server.skills) + 1}"
+                skill = {"id": skill_id, "display_title": fields["display_title"], "latest_version": "1"}
+                self.server.skills[skill_id] = skill
+                return self._reply(200, skill)
+            skill_id = self.path.split("/")[3]
+            skill = self.server.skills[skill_id]
+            skill["latest_version"] = str(int(skill["latest_version"]) + 1)
+            return self._reply(200, {"skill_id": skill_id, "version": skill["latest_version"]})
+
+
+@pytest.fixture
+def api():
+    server = MockSkillsApi()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_skill(root, name, body="Body"):
+    skill = root / "skills" / name
+    (skill / "scripts").mkdir(parents=True, exist_ok=True)
+    (skill / "SKILL.md").write_text(f"---\nname: {name}\ndescription: test\n---\n{body}\n", encoding="utf-8")
+    (skill / "scripts" / "run.py").write_text("print('hi')\n", encoding="utf-8")
+    return skill
+
+
+def deploy(api, repo, skills):
+    client = SkillsApiClient("key", api.url, workers=2, backoff=0)
+    try:
+        return {row[0]: row for row in deploy_to_api(skills, client=client, repo_root=repo)}
+    finally:
+        client.close()
+
+
+def posts(api):
+    return [r for r in api.requests if r[0] == "POST"]
+
+
+def test_creates_then_skips_then_versions(api, tmp_path):
+    alpha, beta = make_skill(tmp_path, "alpha"), make_skill(tmp_path, "beta")
+
+    rows = deploy(api, tmp_path, [alpha, beta])
+    assert all(row[2] and row[4] is None for row in rows.values())
+    created = sorted(posts(api), key=lambda r: r[2]["display_title"])
+    assert [(r[1], r[2]["display_title"]) for r in created] == [("/v1/skills", "alpha"), ("/v1/skills", "beta")]
+    assert created[0][3] == ["alpha/SKILL.md", "alpha/scripts/run.py"]
+
+    api.requests.clear()
+    rows = deploy(api, tmp_path, [alpha, beta])
+    assert {row[4] for row in rows.values()} == {"unchanged"}
+    assert posts(api) == []
+
+    make_skill(tmp_path, "alpha", body="Changed")
+    rows = deploy(api, tmp_path, [alpha, beta])
+    assert rows["alpha"][2] and rows["beta"][4] == "unchanged"
+    [(_, path, fields, files)] = posts(api)
+    alpha_id = next(s["id"] for s in api.skills.values() if s["display_title"] == "alpha")
+    assert path == f"/v1/skills/{alpha_id}/versions" and fields == {} and "alpha/SKILL.md" in files
+    assert len(api.skills) == 2
+
+
+def test_existing_remote_skill_gets_a_version(api, tmp_path):
+    api.skills["skill_9"] = {"id": "skill_9", "display_title": "alpha", "latest_version": "4"}
+    rows = deploy(api, tmp_path, [make_skill(tmp_path, "alpha")])
+    assert rows["alpha"][2]
+    assert [r[1] for r in posts(api)] == ["/v1/skills/skill_9/versions"]
+    assert len(api.skills) == 1
+
+
+def test_retries_server_errors_but_not_conflicts(api, tmp_path):
+    api.failures = [503]
+    rows = deploy(api, tmp_path, [make_skill(tmp_path, "alpha")])
+    assert rows["alpha"][2] and len(posts(api)) == 2
+
+    api.requests.clear()
+    api.failures = [409]
+    rows = deploy(api, tmp_path, [make_skill(tmp_path, "beta")])
+    assert not rows["beta"][2] and "409" in rows["beta"][4]
+    assert len(posts(api)) == 1
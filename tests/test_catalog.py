@@ -0,0 +1,25 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from catalog import SkillCatalog  # noqa: E402
+
+
+def make_skills(skills_dir, tagged):
+    for i in range(5):
+        skill = skills_dir / f"s{i}"
+        skill.mkdir(parents=True)
+        (skill / "SKILL.md").write_text(f"---\nname: s{i}\ndescription: alpha tool {i}\n---\n", encoding="utf-8")
+        tags = ["x"] if i in tagged else []
+        (skill / ".skillmeta").write_text(json.dumps({"version": "1.0.0", "tags": tags}), encoding="utf-8")
+
+
+def test_tag_filter_applies_before_limit(tmp_path):
+    make_skills(tmp_path / "skills", tagged={3, 4})
+    with SkillCatalog(tmp_path / "skills") as catalog:
+        catalog.refresh()
+        assert len(catalog.search("alpha", limit=2)) == 2
+        assert sorted(s["name"] for s in catalog.search("alpha", limit=2, tag="x")) == ["s3", "s4"]
+        assert [s["name"] for s in catalog.list(tag="x")] == ["s3", "s4"]